@@ -233,7 +233,7 @@ class EventSlashCommands(RezbotCommands):
                 arguments={'message': message},
             )
             scope = ItemScope(items=[message])
-            await ExecutableScript.execute_from_string(event.script, context, scope)
+            await ExecutableScript.execute_event(event, context, scope)
 
             # In case the script does not resolve the interaction. There is no way to resolve a slash command without a reply, so reply.
             if not interaction.response.is_done():
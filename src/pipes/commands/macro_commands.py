@@ -18,11 +18,11 @@ from rezbot_commands import RezbotCommands
 
 async def check_pipe_macro(code: str, reply):
     ''' Statically analyses pipe macro code for errors or warnings. '''
-    errors = Pipeline.from_string(code).get_static_errors()
+    errors = Pipeline.from_string(code).get_definition_errors()
     if not errors:
         return True
     if errors.terminal:
-        await reply('Failed to save Macro due to parsing errors:', embeds=[errors.embed()])
+        await reply('Failed to save Macro due to errors:', embeds=[errors.embed()])
         return False
     else:
         await reply('Encountered warnings while parsing Macro:', embeds=[errors.embed()])
@@ -31,11 +31,11 @@ async def check_pipe_macro(code: str, reply):
 
 async def check_source_macro(code: str, reply):
     ''' Statically analyses source macro code for errors or warnings. '''
-    errors = Pipeline.from_string_with_origin(code).get_static_errors()
+    errors = Pipeline.from_string_with_origin(code).get_definition_errors()
     if not errors:
         return True
     if errors.terminal:
-        await reply('Failed to save Macro due to parsing errors:', embeds=[errors.embed()])
+        await reply('Failed to save Macro due to errors:', embeds=[errors.embed()])
         return False
     else:
         await reply('Encountered warnings while parsing Macro:', embeds=[errors.embed()])
@@ -1,14 +1,16 @@
 from discord.ext import commands
 
 from pipes.core.state import BOT_STATE
-from pipes.core.pipe import PipeoidStore
+from pipes.core.pipe import PipeoidStore, Pipe
 from pipes.implementations.pipes import NATIVE_PIPES
 from pipes.implementations.sources import NATIVE_SOURCES
 from pipes.implementations.spouts import NATIVE_SPOUTS
 from pipes.core.macros import MACRO_PIPES, MACRO_SOURCES, Macros
+from pipes.core import parse_cache, compiled_cache
 from pipes.views.macro_views import MacroView
 from rezbot_commands import RezbotCommands
 import utils.texttools as texttools
+import permissions
 
 ###############################################################
 #            A module providing commands for pipes            #
@@ -131,6 +133,28 @@ class PipeCommands(RezbotCommands):
         await ctx.send( BOT_STATE.variables.list_names(pattern, True) +'\n'+ BOT_STATE.variables.list_names(pattern, False) )
 
 
+    # ========================== Diagnostics (message-commands) ==========================
+
+    @commands.command(hidden=True)
+    @permissions.check(permissions.owner)
+    async def pipe_cache(self, ctx, clear: str=None):
+        '''Shows statistics on the cache of pure Pipe applications, or clears it if given "clear".'''
+        if clear == 'clear':
+            Pipe.APPLY_CACHE.clear()
+            return await ctx.send('Cleared the pipe cache.')
+        await ctx.send('Pipe cache: ' + Pipe.APPLY_CACHE.stats_str())
+
+    @commands.command(hidden=True)
+    @permissions.check(permissions.owner)
+    async def parse_cache(self, ctx, clear: str=None):
+        '''Shows statistics on the caches of parsed script code, or clears them (including compiled scripts stored on disk) if given "clear".'''
+        if clear == 'clear':
+            parse_cache.clear_all()
+            compiled_cache.clear()
+            return await ctx.send('Cleared the parse caches and compiled scripts.')
+        await ctx.send('Parse caches:\n' + parse_cache.stats_str())
+
+
 # Load the bot cog
 async def setup(bot: commands.Bot):
     await bot.add_cog(PipeCommands(bot))
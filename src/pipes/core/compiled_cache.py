@@ -0,0 +1,177 @@
+'''
+A persistent on-disk cache of compiled Macro and Event scripts, so that they need not all be parsed from scratch after a restart.
+
+Each compiled Pipeline is pickled to its own file, named after a hash of the kind of script, its code, and PARSER_VERSION,
+    so that editing a script simply results in a new file, and changes to the parser can invalidate all files at once.
+Each file starts with a header stating the versions it was written with, files with a different header are compiled anew.
+The files of edited or deleted scripts are discarded, and the least recently used files are evicted once there are too many.
+References to the bot's native Pipes, Sources and Spouts (and their parameters) are pickled by name, and looked up again when loading.
+Pipelines are pickled as they were before constant folding (see `Pipeline.fold_constants`), and folded again when next applied.
+'''
+import os
+import io
+import pickle
+import hashlib
+import functools
+from typing import Callable
+
+from . import config
+# NOTE: More import statements at the end of the file due to circular dependencies
+
+
+PARSER_VERSION = 1
+'Bump this whenever a change to the parser or to the parsed classes would make previously pickled Pipelines invalid.'
+
+FORMAT_VERSION = 1
+'Bump this whenever the layout of the cache files themselves changes.'
+
+PICKLE_PROTOCOL = 5
+
+HEADER = f'rezbot compiled script\0format {FORMAT_VERSION}\0parser {PARSER_VERSION}\0pickle {PICKLE_PROTOCOL}\n'.encode()
+'Written at the start of each file, so that files written by a different version are recognized and not unpickled.'
+
+
+class StaleCacheFile(ValueError):
+    '''Raised when trying to load a cache file written by a different version.'''
+
+
+def DIR(filename=''):
+    return os.path.join(os.path.dirname(__file__), '..', 'macros', 'compiled', filename)
+
+
+def cache_key(kind: str, code: str) -> str:
+    return hashlib.sha256(f'{PARSER_VERSION}\0{kind}\0{code}'.encode()).hexdigest()
+
+
+@functools.cache
+def _external_objects() -> dict[int, tuple]:
+    '''Maps the ids of all objects that are pickled by reference, to a tuple that identifies them.'''
+    externals = {}
+    for owner in (pipeline_module.ParsedPipe, tmpl_source.TmplSource, groupmodes.Interval):
+        for attr, value in vars(owner).items():
+            # Sentinel objects
+            if type(value) is object:
+                externals[id(value)] = ('sentinel', owner.__name__, attr)
+    for kind, store in (('pipe', native_pipes.NATIVE_PIPES), ('source', native_sources.NATIVE_SOURCES), ('spout', native_spouts.NATIVE_SPOUTS)):
+        for name, pipeoid in store.by_primary_name.items():
+            externals[id(pipeoid)] = (kind, name)
+            externals[id(pipeoid.signature)] = (kind, name, 'signature')
+            for param_name, param in pipeoid.signature.items():
+                externals[id(param)] = (kind, name, 'signature', param_name)
+    return externals
+
+
+def _load_external(pid: tuple):
+    '''Inverse of _external_objects, raises a KeyError or AttributeError if the object no longer exists.'''
+    if pid[0] == 'sentinel':
+        _, owner_name, attr = pid
+        owner = {'ParsedPipe': pipeline_module.ParsedPipe, 'TmplSource': tmpl_source.TmplSource, 'Interval': groupmodes.Interval}[owner_name]
+        return getattr(owner, attr)
+    kind, name, *rest = pid
+    obj = {'pipe': native_pipes.NATIVE_PIPES, 'source': native_sources.NATIVE_SOURCES, 'spout': native_spouts.NATIVE_SPOUTS}[kind][name]
+    if rest:
+        obj = obj.signature
+    if len(rest) > 1:
+        obj = obj[rest[1]]
+    return obj
+
+
+class _Pickler(pickle.Pickler):
+    def persistent_id(self, obj):
+        return _external_objects().get(id(obj))
+
+class _Unpickler(pickle.Unpickler):
+    def persistent_load(self, pid):
+        return _load_external(pid)
+
+
+def dumps(pipeline: 'Pipeline') -> bytes:
+    buffer = io.BytesIO()
+    buffer.write(HEADER)
+    _Pickler(buffer, protocol=PICKLE_PROTOCOL).dump(pipeline)
+    return buffer.getvalue()
+
+def loads(data: bytes) -> 'Pipeline':
+    if not data.startswith(HEADER):
+        raise StaleCacheFile('Written by a different version.')
+    return _Unpickler(io.BytesIO(data[len(HEADER):])).load()
+
+
+def load_or_compile(kind: str, code: str, compile: Callable[[str], 'Pipeline']) -> 'Pipeline':
+    '''
+    Load the compiled Pipeline for the given kind of script and code from the cache, or compile it and store it in the cache.
+    Any failure to load or store the cache file is not an error, the script is then simply compiled as normal.
+    '''
+    if not config.PERSIST_COMPILED:
+        return compile(code)
+
+    path = get_path(kind, code)
+    try:
+        with open(path, 'rb') as file:
+            pipeline = loads(file.read())
+        if isinstance(pipeline, pipeline_module.Pipeline):
+            # Mark the file as recently used
+            os.utime(path)
+            return pipeline
+    except FileNotFoundError:
+        pass
+    except StaleCacheFile:
+        pass
+    except Exception as e:
+        print(f'[WARNING] Failed to load compiled {kind} from "{path}", compiling it anew: {type(e).__name__}: {e}')
+
+    pipeline = compile(code)
+    try:
+        data = dumps(pipeline)
+        os.makedirs(DIR(), exist_ok=True)
+        # Write to a temporary file first, so that a partially written file is never loaded
+        with open(path + '.tmp', 'wb') as file:
+            file.write(data)
+        os.replace(path + '.tmp', path)
+        evict()
+    except Exception as e:
+        print(f'[WARNING] Failed to store compiled {kind} in "{path}": {type(e).__name__}: {e}')
+    return pipeline
+
+
+def get_path(kind: str, code: str) -> str:
+    return DIR(cache_key(kind, code) + '.pickle')
+
+
+def discard(kind: str, code: str):
+    '''
+    Delete the compiled script for the given kind of script and code from the cache, for when a script is edited or deleted.
+    Another script with the exact same code would simply be compiled anew the next time it is loaded after a restart.
+    '''
+    try:
+        os.remove(get_path(kind, code))
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f'[WARNING] Failed to discard compiled {kind}: {type(e).__name__}: {e}')
+
+
+def evict():
+    '''Delete the least recently used compiled scripts from the cache, until there are at most `config.COMPILED_CACHE_MAX_FILES`.'''
+    if config.COMPILED_CACHE_MAX_FILES is None: return
+    paths = [DIR(filename) for filename in os.listdir(DIR()) if filename.endswith('.pickle')]
+    if len(paths) <= config.COMPILED_CACHE_MAX_FILES: return
+    paths.sort(key=os.path.getmtime)
+    for path in paths[:len(paths) - config.COMPILED_CACHE_MAX_FILES]:
+        os.remove(path)
+
+
+def clear():
+    '''Delete all compiled scripts from the cache.'''
+    if not os.path.exists(DIR()): return
+    for filename in os.listdir(DIR()):
+        if filename.endswith('.pickle'):
+            os.remove(DIR(filename))
+
+
+# NOTE: Only the modules are imported and not their contents, since this module may be imported while they are still being initialized
+from . import pipeline as pipeline_module, groupmodes
+from .templated_string import tmpl_source
+import pipes.implementations.pipes as native_pipes
+import pipes.implementations.sources as native_sources
+import pipes.implementations.spouts as native_spouts
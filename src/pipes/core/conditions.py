@@ -3,9 +3,11 @@ A file containing logic for parsing and evaluating logical conditions in a scrip
 '''
 
 import re
+import asyncio
 from pyparsing import ParseResults
 
 from . import grammar
+from .parse_cache import parse_cached
 from .state import ErrorLog, Context, ItemScope
 from .templated_string.templated_string import TemplatedString
 
@@ -39,17 +41,25 @@ class Condition:
                 raise Exception(f'Unimplemented ParseResult name "{bad_name}"')
 
     @classmethod
+    @parse_cached('condition', 100_000)
     def from_string(cls, string):
         return cls.from_parsed(grammar.condition.parse_string(string, True)[0])
 
     # ================ API ================
 
+    is_sync: bool = False
+    'Whether the Condition can be evaluated synchronously, i.e. it only depends on items.'
+
     def get_pre_errors(self) -> ErrorLog | None:
         raise NotImplementedError()
 
     async def evaluate(self, context: Context, scope: ItemScope) -> tuple[bool, ErrorLog]:
         raise NotImplementedError()
 
+    def evaluate_sync(self, scope: ItemScope) -> tuple[bool, ErrorLog]:
+        '''Evaluate a synchronous (see `is_sync`) Condition without creating any coroutines.'''
+        raise NotImplementedError()
+
 # ========================================= Root Conditions ========================================
 
 class RootCondition(Condition):
@@ -81,16 +91,41 @@ operation_map = {
 }
 
 class Comparison(RootCondition):
+    NUMERIC_OPS = (Operation.NUM_LT, Operation.NUM_GT, Operation.NUM_LTE, Operation.NUM_GTE)
+    REGEX_OPS = (Operation.LIKE, Operation.NLIKE)
+
+    lhs_number: float | None = None
+    'The left-hand side pre-converted to a number, if it is constant and the operation is numeric.'
+    rhs_number: float | None = None
+    'The right-hand side pre-converted to a number, if it is constant and the operation is numeric.'
+    regex: re.Pattern | None = None
+    'The right-hand side pre-compiled as a regex, if it is constant and the operation is LIKE or NOTLIKE.'
+
     def __init__(self, lhs: TemplatedString, op: Operation, rhs: TemplatedString):
         self.lhs = lhs
         self.op = op
         self.rhs = rhs
+        self.is_sync = lhs.is_sync and rhs.is_sync
 
         if lhs.pre_errors or rhs.pre_errors:
             self.pre_errors = ErrorLog()
             self.pre_errors.extend(lhs.pre_errors, 'left-hand side')
             self.pre_errors.extend(rhs.pre_errors, 'right-hand side')
 
+        ## Compile constant operands ahead of time
+        if op in Comparison.NUMERIC_OPS:
+            # NOTE: Non-numeric constants are left alone so they fail at evaluation time like non-constant ones.
+            if lhs.is_string and type_check(lhs.string, float):
+                self.lhs_number = float(lhs.string)
+            if rhs.is_string and type_check(rhs.string, float):
+                self.rhs_number = float(rhs.string)
+        elif op in Comparison.REGEX_OPS and rhs.is_string:
+            try:
+                self.regex = re.compile(rhs.string)
+            except re.error as e:
+                self.pre_errors = self.pre_errors or ErrorLog()
+                self.pre_errors.log(f'Invalid regex `{rhs.string}`: {e}', True, 'right-hand side')
+
     @classmethod
     def from_parsed(cls, result: ParseResults):
         lhs = TemplatedString.from_parsed(result[0])
@@ -108,9 +143,24 @@ class Comparison(RootCondition):
         return '%s%s%s' % (str(self.lhs), self.op, str(self.rhs))
 
     async def evaluate(self, context: Context, scope: ItemScope) -> tuple[bool, ErrorLog]:
+        if self.is_sync:
+            return self.evaluate_sync(scope)
+
+        # Evaluate both sides concurrently if both need to be awaited
+        if not self.lhs.is_sync and not self.rhs.is_sync:
+            (lhs, lhs_errors), (rhs, rhs_errors) = await asyncio.gather(self.lhs.evaluate(context, scope), self.rhs.evaluate(context, scope))
+        else:
+            lhs, lhs_errors = await self.lhs.evaluate(context, scope)
+            rhs, rhs_errors = await self.rhs.evaluate(context, scope)
+        return self.compare(lhs, lhs_errors, rhs, rhs_errors)
+
+    def evaluate_sync(self, scope: ItemScope) -> tuple[bool, ErrorLog]:
+        lhs, lhs_errors = self.lhs.evaluate_sync(scope)
+        rhs, rhs_errors = self.rhs.evaluate_sync(scope)
+        return self.compare(lhs, lhs_errors, rhs, rhs_errors)
+
+    def compare(self, lhs: str, lhs_errors: ErrorLog, rhs: str, rhs_errors: ErrorLog) -> tuple[bool, ErrorLog]:
         errors = ErrorLog()
-        lhs, lhs_errors = await self.lhs.evaluate(context, scope)
-        rhs, rhs_errors = await self.rhs.evaluate(context, scope)
         errors.extend(lhs_errors, 'left-hand side')
         errors.extend(rhs_errors, 'right-hand side')
         if errors.terminal:
@@ -121,18 +171,20 @@ class Comparison(RootCondition):
             return (lhs == rhs), errors
         if op is Operation.STR_NEQUALS:
             return (lhs != rhs), errors
-        if op is Operation.NUM_LT:
-            return (float(lhs) < float(rhs)), errors
-        if op is Operation.NUM_GT:
-            return (float(lhs) > float(rhs)), errors
-        if op is Operation.NUM_LTE:
-            return (float(lhs) <= float(rhs)), errors
-        if op is Operation.NUM_GTE:
-            return (float(lhs) >= float(rhs)), errors
-        if op is Operation.LIKE:
-            return re.search(rhs, lhs), errors
-        if op is Operation.NLIKE:
-            return not re.search(rhs, lhs), errors
+        if op in Comparison.NUMERIC_OPS:
+            lhs = self.lhs_number if self.lhs_number is not None else float(lhs)
+            rhs = self.rhs_number if self.rhs_number is not None else float(rhs)
+            if op is Operation.NUM_LT:
+                return (lhs < rhs), errors
+            if op is Operation.NUM_GT:
+                return (lhs > rhs), errors
+            if op is Operation.NUM_LTE:
+                return (lhs <= rhs), errors
+            if op is Operation.NUM_GTE:
+                return (lhs >= rhs), errors
+        if op in Comparison.REGEX_OPS:
+            found = (self.regex.search(lhs) if self.regex is not None else re.search(rhs, lhs)) is not None
+            return (found if op is Operation.LIKE else not found), errors
 
         raise Exception(f'Unimplemented comparison operation "{op}"')
 
@@ -160,6 +212,7 @@ class Predicate(RootCondition):
         self.subject = subject
         self.negated = negated
         self.category = category
+        self.is_sync = subject.is_sync
 
         if subject.pre_errors:
             self.pre_errors = subject.pre_errors
@@ -182,6 +235,13 @@ class Predicate(RootCondition):
 
     async def evaluate(self, context: Context, scope: ItemScope) -> tuple[bool, ErrorLog]:
         subject, errors = await self.subject.evaluate(context, scope)
+        return self.check(subject, errors)
+
+    def evaluate_sync(self, scope: ItemScope) -> tuple[bool, ErrorLog]:
+        subject, errors = self.subject.evaluate_sync(scope)
+        return self.check(subject, errors)
+
+    def check(self, subject: str, errors: ErrorLog) -> tuple[bool, ErrorLog]:
         neg = self.negated
 
         if errors.terminal:
@@ -215,6 +275,8 @@ class AggregatePredicate(RootCondition):
         ANYTHING = 'ANYTHING'
         NOTHING = 'NOTHING'
 
+    is_sync = True
+
     def __init__(self, negated: bool, type: Type):
         self.negated = negated
         self.type = type
@@ -236,6 +298,9 @@ class AggregatePredicate(RootCondition):
         return '%s%s' % ('NOT ' if self.negated else '', self.type)
 
     async def evaluate(self, context: Context, scope: ItemScope) -> tuple[bool, ErrorLog]:
+        return self.evaluate_sync(scope)
+
+    def evaluate_sync(self, scope: ItemScope) -> tuple[bool, ErrorLog]:
         neg = self.negated
         if self.type is AggregatePredicate.Type.ANYTHING:
             return neg ^ bool(scope.items), None
@@ -252,6 +317,7 @@ class JoinedCondition(Condition):
 
     def __init__(self, children: list[Condition]):
         self.children = children
+        self.is_sync = all(child.is_sync for child in children)
 
     def __repr__(self):
         return '(' + (' ' + self.joiner + ' ').join(repr(c) for c in self.children) + ')'
@@ -270,6 +336,8 @@ class Conjunction(JoinedCondition):
     joiner = 'AND'
 
     async def evaluate(self, context: Context, scope: ItemScope) -> tuple[bool, ErrorLog]:
+        if self.is_sync:
+            return self.evaluate_sync(scope)
         errors = ErrorLog()
         for child in self.children:
             value, child_errors = await child.evaluate(context, scope)
@@ -279,10 +347,22 @@ class Conjunction(JoinedCondition):
                 return False, errors
         return True, errors
 
+    def evaluate_sync(self, scope: ItemScope) -> tuple[bool, ErrorLog]:
+        errors = ErrorLog()
+        for child in self.children:
+            value, child_errors = child.evaluate_sync(scope)
+            if errors.extend(child_errors).terminal:
+                return None, errors
+            if not value:
+                return False, errors
+        return True, errors
+
 class Disjunction(JoinedCondition):
     joiner = 'OR'
 
     async def evaluate(self, context: Context, scope: ItemScope) -> tuple[bool, ErrorLog]:
+        if self.is_sync:
+            return self.evaluate_sync(scope)
         errors = ErrorLog()
         for child in self.children:
             value, child_errors = await child.evaluate(context, scope)
@@ -292,10 +372,21 @@ class Disjunction(JoinedCondition):
                 return True, errors
         return False, errors
 
+    def evaluate_sync(self, scope: ItemScope) -> tuple[bool, ErrorLog]:
+        errors = ErrorLog()
+        for child in self.children:
+            value, child_errors = child.evaluate_sync(scope)
+            if errors.extend(child_errors).terminal:
+                return None, errors
+            if value:
+                return True, errors
+        return False, errors
+
 
 class Negation(Condition):
     def __init__(self, child: Condition):
         self.child = child
+        self.is_sync = child.is_sync
 
     @classmethod
     def from_parsed(cls, result: ParseResults) -> 'Negation':
@@ -316,3 +407,7 @@ class Negation(Condition):
     async def evaluate(self, context: Context, scope: ItemScope) -> tuple[bool, ErrorLog]:
         value, errors = await self.child.evaluate(context, scope)
         return (None if value is None else not value), errors
+
+    def evaluate_sync(self, scope: ItemScope) -> tuple[bool, ErrorLog]:
+        value, errors = self.child.evaluate_sync(scope)
+        return (None if value is None else not value), errors
@@ -0,0 +1,108 @@
+'''
+Tunable settings for script execution, which may be overridden in the [PIPES] section of config.ini.
+'''
+from configparser import ConfigParser
+from utils.util import parse_bool
+
+_config = ConfigParser()
+_config.read('config.ini')
+_section = _config['PIPES'] if 'PIPES' in _config else {}
+
+_BUDGET_LIMITS = ('max_items', 'max_chars', 'max_pipe_calls', 'max_source_calls', 'max_macro_depth', 'max_seconds')
+
+def _get_int(key: str, default: int) -> int:
+    try:
+        return int(_section.get(key, default))
+    except ValueError:
+        print(f'[WARNING] Invalid value for "{key}" in the [PIPES] section of config.ini, using default value {default}.')
+        return default
+
+def _get_limit(key: str, default: int | None) -> int | None:
+    value = _section.get(key)
+    if value is None:
+        return default
+    if value.lower() == 'none':
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        print(f'[WARNING] Invalid value for "{key}" in the [PIPES] section of config.ini, using default value {default}.')
+        return default
+
+def _get_bool(key: str, default: bool) -> bool:
+    try:
+        return parse_bool(_section.get(key, str(default)))
+    except ValueError:
+        print(f'[WARNING] Invalid value for "{key}" in the [PIPES] section of config.ini, using default value {default}.')
+        return default
+
+
+GROUP_CONCURRENCY = _get_int('group_concurrency', 8)
+'The maximum number of groups within a single pipeline segment that are processed concurrently, 1 processes them one at a time and 0 means unlimited.'
+
+TEMPLATE_CONCURRENCY = _get_int('template_concurrency', 8)
+'The maximum number of TemplatedStrings in a list (e.g. an origin) that are evaluated concurrently.'
+
+MAX_COMBINATIONS = _get_limit('max_combinations', 10_000)
+'The maximum number of strings TemplatedString.multiple_evaluate produces, combining the values of its elements.'
+
+MAX_COMBINATION_CHARS = _get_limit('max_combination_chars', 1_000_000)
+'The maximum number of characters TemplatedString.multiple_evaluate produces in total.'
+
+INLINE_MACROS = _get_bool('inline_macros', True)
+'Whether Macros calling other Macros have the callee\'s segments spliced in where possible, or are otherwise statically linked to its compiled Pipeline, instead of resolving it by name each call.'
+
+STREAMING = _get_bool('streaming', False)
+'Whether runs of item-wise Pipes are streamed item by item, rather than each processing the full list of items in turn.'
+
+FUSE_PIPES = _get_bool('fuse_pipes', True)
+'Whether runs of one-to-one Pipes with fixed arguments are applied as a single step, skipping the per-segment overhead in between.'
+
+APPLY_CACHE_WEIGHT = _get_int('apply_cache_weight', 2_000_000)
+'How many characters of input and output of pure Pipe applications are memoized in total.'
+
+APPLY_CACHE_ENTRIES = _get_limit('apply_cache_entries', 10_000)
+'How many pure Pipe applications are memoized at most, regardless of their size.'
+
+PERSIST_COMPILED = _get_bool('persist_compiled', True)
+'Whether compiled Macros and Events are stored on disk, so they need not be parsed again after a restart.'
+
+COMPILED_CACHE_MAX_FILES = _get_limit('compiled_cache_max_files', 2000)
+'How many compiled Macros and Events are stored on disk at most, the least recently used ones are deleted first.'
+
+
+MACRO_TRAMPOLINE_DEPTH = _get_int('macro_trampoline_depth', 16)
+'Every how many levels of nested Macro calls a new asyncio Task is started, to keep deep recursion from exhausting the stack.'
+
+## Static cost estimate limits: Macros and Events estimated to exceed the "warn" limits are flagged when defined, and those exceeding the "max" limits are rejected.
+COST_WARN_PIPE_CALLS = _get_limit('cost_warn_pipe_calls', 5_000)
+COST_MAX_PIPE_CALLS = _get_limit('cost_max_pipe_calls', 500_000)
+COST_WARN_SOURCE_CALLS = _get_limit('cost_warn_source_calls', 2_000)
+COST_MAX_SOURCE_CALLS = _get_limit('cost_max_source_calls', 200_000)
+COST_WARN_ITEMS = _get_limit('cost_warn_items', 100_000)
+COST_MAX_ITEMS = _get_limit('cost_max_items', 10_000_000)
+
+
+def get_parse_cache_budget(kind: str, default: int) -> int:
+    '''Get the number of characters of parsed code the parse cache for the given kind of object may hold.'''
+    return _get_int(f'parse_cache_{kind}', default)
+
+
+def get_budget_limits(guild_id: int=None) -> dict[str, float | None]:
+    '''
+    Get the execution budget limits configured for the given guild, as given in the [BUDGET] section of config.ini,
+        overridden by those in the [BUDGET.<guild id>] section. A limit of "none" means unlimited.
+    '''
+    limits = {}
+    sections = ['BUDGET'] + ([f'BUDGET.{guild_id}'] if guild_id is not None else [])
+    for section in sections:
+        if section not in _config: continue
+        for key, value in _config[section].items():
+            if key not in _BUDGET_LIMITS:
+                print(f'[WARNING] Unknown key "{key}" in the [{section}] section of config.ini.')
+                continue
+            try:
+                limits[key] = None if value.lower() == 'none' else float(value) if key == 'max_seconds' else int(value)
+            except ValueError:
+                print(f'[WARNING] Invalid value for "{key}" in the [{section}] section of config.ini.')
+    return limits
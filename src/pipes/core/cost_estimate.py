@@ -0,0 +1,322 @@
+'''
+Static analysis estimating how much work a Pipeline may perform, without executing anything.
+
+The estimate is a rough upper bound: Group modes, `^N` iterations, parallel pipes, Source amounts and Macro calls are all
+    accounted for, but since the number of items produced by a native Pipe is generally unknowable ahead of time,
+    Pipes are assumed to produce as many items as they receive (or `FLATTEN_FANOUT` times as many, for Pipes known to split items up).
+'''
+import math
+
+from .state import ErrorLog, ExecutionBudget
+from .pipeline import Pipeline, ParsedPipe, ParsedOrigin
+from . import groupmodes, config
+# NOTE: Circular dependency imports at end of file
+
+
+class CostEstimate:
+    '''
+    The estimated cost of applying a Pipeline (or part of one) once.
+    All values saturate at `CostEstimate.CAP`, so that pathological scripts can't make the estimate itself blow up.
+    '''
+    __slots__ = ('items', 'pipe_calls', 'source_calls')
+
+    CAP = 10**12
+
+    items: int
+    'The number of items produced.'
+    pipe_calls: int
+    'The number of native Pipe invocations.'
+    source_calls: int
+    'The number of native Source invocations.'
+
+    def __init__(self, items: int=0, pipe_calls: int=0, source_calls: int=0):
+        self.items = min(items, CostEstimate.CAP)
+        self.pipe_calls = min(pipe_calls, CostEstimate.CAP)
+        self.source_calls = min(source_calls, CostEstimate.CAP)
+
+    def __repr__(self):
+        return 'CostEstimate(items=%s, pipe_calls=%s, source_calls=%s)' % (self.items, self.pipe_calls, self.source_calls)
+
+    def __add__(self, other: 'CostEstimate') -> 'CostEstimate':
+        return CostEstimate(self.items + other.items, self.pipe_calls + other.pipe_calls, self.source_calls + other.source_calls)
+
+    def times(self, n: int) -> 'CostEstimate':
+        '''The cost of performing the same work `n` times.'''
+        return CostEstimate(self.items * n, self.pipe_calls * n, self.source_calls * n)
+
+    def calls_only(self) -> 'CostEstimate':
+        '''The same cost but producing no items, e.g. for work whose values are only used as arguments.'''
+        return CostEstimate(0, self.pipe_calls, self.source_calls)
+
+
+class CostEstimator:
+    '''
+    Walks a Pipeline's parsed structure, estimating its cost.
+    Also keeps track of how deeply Macro calls are nested, and which Macros (indirectly) call themselves.
+    '''
+    FLATTEN_FANOUT = 8
+    'The number of items each item is assumed to turn into when passed through an item-wise Pipe which may produce multiple items.'
+    DEPLETE_ITEMS = 1000
+    'The number of items assumed to be produced by a {all source} expression.'
+    ITERATION_LIMIT = 100
+    'The number of `^N` iterations actually simulated, beyond that the cost per iteration is extrapolated.'
+
+    macro_stack: list[str]
+    macro_depth: int
+    'The deepest level of nested Macro calls encountered.'
+    recursive_macros: set[str]
+    'Names of Macros which were found to (indirectly) call themselves, meaning their cost can not be bounded.'
+
+    def __init__(self):
+        self.macro_stack = []
+        self.macro_depth = 0
+        self.recursive_macros = set()
+
+    # ========================================= Pipelines ==========================================
+
+    def estimate_pipeline(self, pipeline: Pipeline, items: int) -> CostEstimate:
+        '''Estimate the cost of applying the Pipeline to the given number of items.'''
+        total = CostEstimate(items)
+        for i in range(pipeline.iterations):
+            if i == CostEstimator.ITERATION_LIMIT:
+                # Extrapolate the cost of the remaining iterations from the last one
+                remaining = pipeline.iterations - i
+                total = CostEstimate(total.items, total.pipe_calls + last.pipe_calls * remaining, total.source_calls + last.source_calls * remaining)
+                break
+            last = self.estimate_iteration(pipeline, total.items)
+            total = CostEstimate(last.items, total.pipe_calls + last.pipe_calls, total.source_calls + last.source_calls)
+        return total
+
+    def estimate_iteration(self, pipeline: Pipeline, items: int) -> CostEstimate:
+        total = CostEstimate(items)
+        for segment in pipeline.segments:
+            if isinstance(segment, ParsedOrigin):
+                cost = self.estimate_origin(segment)
+            else:
+                cost = self.estimate_segment(*segment, total.items)
+            total = CostEstimate(cost.items, total.pipe_calls + cost.pipe_calls, total.source_calls + cost.source_calls)
+        return total
+
+    def estimate_segment(self, group_mode: 'groupmodes.GroupMode', parsed_pipes: list[ParsedPipe | Pipeline], items: int) -> CostEstimate:
+        '''Estimate the cost of applying a group mode and its set of parallel pipes to the given number of items.'''
+        groups = self.estimate_groups(group_mode, items)
+        group_size = math.ceil(items / groups) if groups else 0
+
+        # Condition arguments are evaluated once for each group
+        cost = CostEstimate()
+        for mode in group_mode.mid_modes:
+            if isinstance(mode, groupmodes.IfMode):
+                cost += self.estimate_condition(mode.condition).times(groups)
+        if isinstance(group_mode.assign_mode, groupmodes.Switch):
+            for condition in group_mode.assign_mode.conditions:
+                cost += self.estimate_condition(condition).times(groups)
+
+        if not parsed_pipes:
+            return cost + CostEstimate(items)
+        pipe_costs = [self.estimate_parsed_pipe(pipe, group_size) for pipe in parsed_pipes]
+        if group_mode.assign_mode.multiply:
+            # Each group is sent to each pipe
+            for pipe_cost in pipe_costs:
+                cost += pipe_cost.times(groups)
+        else:
+            # Each group is sent to one pipe, assume the most costly one
+            cost += CostEstimate(
+                max(c.items for c in pipe_costs), max(c.pipe_calls for c in pipe_costs), max(c.source_calls for c in pipe_costs)
+            ).times(groups)
+        return cost
+
+    @staticmethod
+    def estimate_groups(group_mode: 'groupmodes.GroupMode', items: int) -> int:
+        '''Estimate the number of groups the group mode splits the given number of items into, not counting ignored groups.'''
+        groups = 1
+        for split_mode in group_mode.split_modes:
+            if isinstance(split_mode, (groupmodes.Row, groupmodes.Column)):
+                size = split_mode.size
+                # Each existing group can produce one more group than evenly dividing all items would
+                groups = items // size + groups
+            elif isinstance(split_mode, groupmodes.Divide):
+                groups *= split_mode.count
+            elif isinstance(split_mode, groupmodes.Modulo):
+                groups *= split_mode.modulo
+            # Interval: Only selects a single group out of each group
+        for mode in group_mode.mid_modes:
+            if isinstance(mode, groupmodes.GroupBy):
+                groups = max(groups, items)
+        return min(groups, CostEstimate.CAP)
+
+    def estimate_parsed_pipe(self, parsed_pipe: ParsedPipe | Pipeline, items: int) -> CostEstimate:
+        '''Estimate the cost of applying a single ParsedPipe or inline Pipeline to a single group of items.'''
+        if isinstance(parsed_pipe, Pipeline):
+            return self.estimate_pipeline(parsed_pipe, items)
+
+        cost = self.estimate_arguments(parsed_pipe.arguments)
+        kind = parsed_pipe.type
+        if kind == ParsedPipe.NATIVE_PIPE:
+            pipe: Pipe = parsed_pipe.pipe
+            if getattr(pipe, 'item_flattens', False):
+                items *= CostEstimator.FLATTEN_FANOUT
+            return cost + CostEstimate(items, pipe_calls=1)
+        if kind == ParsedPipe.NATIVE_SOURCE:
+            return cost + CostEstimate(self.estimate_source_amount(parsed_pipe.arguments), source_calls=1)
+        if kind == ParsedPipe.MACRO_PIPE:
+            return cost + self.estimate_macro(parsed_pipe.name, MACRO_PIPES, items)
+        if kind == ParsedPipe.MACRO_SOURCE:
+            return cost + self.estimate_macro(parsed_pipe.name, MACRO_SOURCES, 0)
+        # Special pipes, Spouts and unknown pipes all leave the items unchanged
+        return cost + CostEstimate(items)
+
+    def estimate_macro(self, name: str, macros: 'Macros', items: int) -> CostEstimate:
+        '''Estimate the cost of calling a Macro, keeping track of the depth of nested Macro calls.'''
+        if name not in macros:
+            return CostEstimate(items)
+        if name in self.macro_stack:
+            self.recursive_macros.add(name)
+            return CostEstimate(items)
+        self.macro_stack.append(name)
+        self.macro_depth = max(self.macro_depth, len(self.macro_stack))
+        try:
+            return self.estimate_pipeline(macros[name].get_pipeline(), items)
+        finally:
+            self.macro_stack.pop()
+
+    # ====================================== TemplatedStrings ======================================
+
+    def estimate_origin(self, origin: ParsedOrigin) -> CostEstimate:
+        '''Estimate the cost of evaluating an origin.'''
+        if origin.random_tree is not None:
+            # Only a single origin is sampled at random, which can't be known ahead of time
+            return CostEstimate(1)
+        costs = [self.estimate_tstring(ts) for ts in origin.origins]
+        if not costs:
+            return CostEstimate()
+        if origin.pick_random:
+            return CostEstimate(max(c.items for c in costs), max(c.pipe_calls for c in costs), max(c.source_calls for c in costs))
+        total = CostEstimate()
+        for cost in costs:
+            total += cost
+        return total
+
+    def estimate_tstring(self, tstring: 'TemplatedString') -> CostEstimate:
+        '''Estimate the cost of evaluating a TemplatedString as a list of items, as happens in origins.'''
+        if tstring.is_source:
+            return self.estimate_tmpl_source(tstring.source)
+        if tstring.is_inline_script:
+            return self.estimate_pipeline(tstring.inline_script.pipeline, 1)
+        # Any other TemplatedString evaluates to a single item, but may still evaluate Sources in doing so
+        return self.estimate_tstring_calls(tstring) + CostEstimate(1)
+
+    def estimate_tstring_calls(self, tstring: 'TemplatedString') -> CostEstimate:
+        '''Estimate the number of Pipe and Source calls made in evaluating a TemplatedString to a single string.'''
+        cost = CostEstimate()
+        if tstring.is_string:
+            return cost
+        for piece in tstring.pieces:
+            if isinstance(piece, TmplSource):
+                cost += self.estimate_tmpl_source(piece).calls_only()
+            elif isinstance(piece, TmplInlineScript):
+                cost += self.estimate_pipeline(piece.pipeline, 1).calls_only()
+            elif isinstance(piece, TmplConditional):
+                cost += self.estimate_condition(piece.condition)
+                cost += self.estimate_tstring_calls(piece.case_if)
+                cost += self.estimate_tstring_calls(piece.case_else)
+        return cost
+
+    def estimate_tmpl_source(self, source: 'TmplSource') -> CostEstimate:
+        '''Estimate the cost of evaluating a `{source}` expression.'''
+        cost = self.estimate_arguments(source.args)
+        if source.remainder is not None:
+            cost += self.estimate_tstring_calls(source.remainder)
+        if source.type == TmplSource.NATIVE_SOURCE:
+            if source.amount == 'all':
+                amount = CostEstimator.DEPLETE_ITEMS
+            elif source.amount is not None:
+                amount = source.amount
+            else:
+                amount = self.estimate_source_amount(source.args)
+            return cost + CostEstimate(amount, source_calls=1)
+        if source.type == TmplSource.NATIVE_PIPE:
+            return cost + CostEstimate(1, pipe_calls=1)
+        if source.type == TmplSource.MACRO_PIPE:
+            return cost + self.estimate_macro(source.name, MACRO_PIPES, 1)
+        if source.type == TmplSource.MACRO_SOURCE:
+            return cost + self.estimate_macro(source.name, MACRO_SOURCES, 0)
+        return cost
+
+    def estimate_condition(self, condition: 'Condition') -> CostEstimate:
+        '''Estimate the number of Pipe and Source calls made in evaluating a Condition, assuming every part is evaluated.'''
+        if isinstance(condition, Comparison):
+            return self.estimate_tstring_calls(condition.lhs) + self.estimate_tstring_calls(condition.rhs)
+        if isinstance(condition, Predicate):
+            return self.estimate_tstring_calls(condition.subject)
+        if isinstance(condition, JoinedCondition):
+            cost = CostEstimate()
+            for child in condition.children:
+                cost += self.estimate_condition(child)
+            return cost
+        if isinstance(condition, Negation):
+            return self.estimate_condition(condition.child)
+        return CostEstimate()
+
+    # ========================================== Arguments =========================================
+
+    def estimate_arguments(self, arguments: 'Arguments | None') -> CostEstimate:
+        '''Estimate the number of Pipe and Source calls made in determining a set of Arguments.'''
+        cost = CostEstimate()
+        if arguments is None or arguments.predetermined:
+            return cost
+        for arg in arguments.args.values():
+            if not arg.predetermined and isinstance(arg, ValueArg):
+                cost += self.estimate_tstring_calls(arg.string)
+        return cost
+
+    @staticmethod
+    def estimate_source_amount(arguments: 'Arguments | None') -> int:
+        '''Estimate the number of items produced by a native Source, based on its `n` argument if it's known ahead of time.'''
+        if arguments is not None:
+            for name in ('n', 'N'):
+                arg = arguments.args.get(name)
+                if arg is not None and arg.predetermined and isinstance(arg.value, int):
+                    return max(arg.value, 1)
+        return 1
+
+
+def estimate_cost(pipeline: Pipeline) -> tuple[CostEstimate, CostEstimator]:
+    '''Estimate the cost of applying the Pipeline to a single item, returning the estimate and the estimator holding Macro call info.'''
+    estimator = CostEstimator()
+    return estimator.estimate_pipeline(pipeline, 1), estimator
+
+
+def check_cost(pipeline: Pipeline) -> ErrorLog:
+    '''
+    Statically estimate the Pipeline's cost, and produce warnings if it exceeds the configured soft limits,
+        or terminal errors if it exceeds the hard limits.
+    '''
+    errors = ErrorLog()
+    cost, estimator = estimate_cost(pipeline)
+
+    def check(value: int, warn: int | None, limit: int | None, description: str):
+        if limit is not None and value > limit:
+            errors.log(f'Script may {description} (estimated {value}), which is over the limit of {limit}.', True)
+        elif warn is not None and value > warn:
+            errors.log(f'Script may {description} (estimated {value}), consider simplifying it.')
+
+    check(cost.pipe_calls, config.COST_WARN_PIPE_CALLS, config.COST_MAX_PIPE_CALLS, 'invoke a very large number of Pipes')
+    check(cost.source_calls, config.COST_WARN_SOURCE_CALLS, config.COST_MAX_SOURCE_CALLS, 'invoke a very large number of Sources')
+    check(cost.items, config.COST_WARN_ITEMS, config.COST_MAX_ITEMS, 'produce a very large number of items')
+    # Macro depth is not an estimate but known exactly, so it's held to the same limit as when executing
+    check(estimator.macro_depth, None, ExecutionBudget(**config.get_budget_limits()).max_macro_depth, 'nest Macro calls too deeply')
+    if estimator.recursive_macros:
+        names = ', '.join(f'`{name}`' for name in sorted(estimator.recursive_macros))
+        errors.log(f'Script calls recursive Macro(s) {names}, whose cost could not be estimated.')
+    return errors
+
+
+# These lynes be down here dve to dependencyes cyrcvlaire
+from .templated_string.templated_string import TemplatedString
+from .templated_string.tmpl_source import TmplSource
+from .templated_string.tmpl_inline_script import TmplInlineScript
+from .templated_string.tmpl_conditional import TmplConditional
+from .conditions import Condition, Comparison, Predicate, JoinedCondition, Negation
+from .signature import Arguments, ValueArg
+from .pipe import Pipe
+from .macros import Macros, MACRO_PIPES, MACRO_SOURCES
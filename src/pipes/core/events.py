@@ -9,6 +9,8 @@ from utils.util import normalize_name
 from utils.texttools import block_format
 
 from .executable_script import ExecutableScript
+from .pipeline import Pipeline
+from . import compiled_cache
 
 
 def DIR(filename=''):
@@ -24,12 +26,39 @@ class Event:
 
     targets_current_message = False
 
+    _executable_script: ExecutableScript | None = None
+
     def __init__(self, *, name: str, desc: str='', author_id: int, channels: list[int]=None, script: str):
         self.name: str = name
         self.desc: str = desc
         self.author_id: int = author_id
         self.channels: list[int] = channels or []
-        self.script: str = script
+        self.script = script
+
+    @property
+    def script(self) -> str:
+        return self._script
+
+    @script.setter
+    def script(self, script: str):
+        if getattr(self, '_script', script) != script:
+            self.discard_compiled()
+        self._script = script
+        self._executable_script = None
+
+    def get_script(self) -> ExecutableScript:
+        '''
+        Get the Event's script as an ExecutableScript, which is parsed only once for each version of the script,
+            or loaded from the compiled cache if it was parsed before a restart.
+        '''
+        if self._executable_script is None:
+            pipeline = compiled_cache.load_or_compile('event', self.script, Pipeline.from_string_with_origin)
+            self._executable_script = ExecutableScript(pipeline)
+        return self._executable_script
+
+    def discard_compiled(self):
+        '''Delete the Event's compiled script from the compiled cache, for when its script is edited or it is deleted.'''
+        compiled_cache.discard('event', self.script)
 
     @staticmethod
     def from_trigger_str(**kwargs) -> 'Event':
@@ -87,7 +116,7 @@ class Event:
         return embed
 
     def get_static_errors(self):
-        return ExecutableScript.from_string(self.script).get_static_errors()
+        return ExecutableScript.from_string(self.script).get_definition_errors()
 
     # ================ Serialization ================
 
@@ -379,7 +408,7 @@ class Events:
             return True
 
         ## Statically analyse the script for parsing errors and warnings
-        errors = ExecutableScript.from_string(script).get_static_errors()
+        errors = ExecutableScript.from_string(script).get_definition_errors()
         if errors.terminal:
             await channel.send('Failed to save event due to parsing errors:', embed=errors.embed())
             return True
@@ -425,11 +454,14 @@ class Events:
         return self.events[name]
 
     def __setitem__(self, name, val):
+        if name in self.events and self.events[name].script != val.script:
+            self.events[name].discard_compiled()
         self.events[name] = val
         self.write()
         return val
 
     def __delitem__(self, name):
+        self.events[name].discard_compiled()
         del self.events[name]
         self.write()
 
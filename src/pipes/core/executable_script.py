@@ -1,11 +1,18 @@
+import asyncio
+from typing import Callable, TYPE_CHECKING
 from discord import TextChannel
 from pyparsing import ParseResults
 
-from .state import ErrorLog, BOT_STATE, Context, ItemScope, SpoutState
+from .state import ErrorLog, BOT_STATE, Context, ItemScope, SpoutState, Governor, ExecutionBudget, BudgetExceededError
 from .pipeline import Pipeline
+from . import config
 # NOTE: Circular dependency imports at end of file
 
 import utils.texttools as texttools
+import permissions
+
+if TYPE_CHECKING:
+    from .events import Event
 
 
 class TerminalError(Exception):
@@ -101,6 +108,10 @@ class ExecutableScript:
         ''' Collects errors that can be known before execution time. '''
         return self.pipeline.get_static_errors()
 
+    def get_definition_errors(self) -> ErrorLog:
+        ''' Collects static errors and cost estimate warnings, for checking scripts when they are saved as an Event. '''
+        return self.pipeline.get_definition_errors()
+
     def __repr__(self):
         return 'ExecutableScript(%s)' % repr(self.pipeline)
     def __str__(self):
@@ -111,8 +122,18 @@ class ExecutableScript:
     @staticmethod
     async def execute_from_string(script: str, context: Context, scope: ItemScope=None):
         ''' Parse and immediately execute an ExecutableScript without holding on to any parsed objects or results. '''
+        await ExecutableScript.execute_compiled(lambda: ExecutableScript.from_string(script), context, scope)
+
+    @staticmethod
+    async def execute_event(event: 'Event', context: Context, scope: ItemScope=None):
+        ''' Execute the Event's script, which is only parsed once for each version of the script. '''
+        await ExecutableScript.execute_compiled(event.get_script, context, scope)
+
+    @staticmethod
+    async def execute_compiled(compile: Callable[[], 'ExecutableScript'], context: Context, scope: ItemScope=None):
+        ''' Compile and immediately execute an ExecutableScript, reporting any unexpected error while compiling it. '''
         try:
-            executable_script = ExecutableScript.from_string(script)
+            executable_script = compile()
         except Exception as e:
             # Make a single-use error log so we can use the send_error_log method
             errors = ErrorLog().log_exception(f'🛑 **Unexpected script parsing error**', e)
@@ -121,6 +142,16 @@ class ExecutableScript:
         else:
             await executable_script.execute(context, scope)
 
+    @staticmethod
+    def create_governor(context: Context) -> Governor:
+        '''Create a Governor for an execution in the given Context, using the budget configured for its guild.'''
+        guild = context.channel and getattr(context.channel, 'guild', None)
+        budget = ExecutionBudget(**config.get_budget_limits(guild and guild.id))
+        # Like with MAXCHARS, the bot's owners are exempt from the character limit
+        if permissions.has(context.origin.activator.id, permissions.owner):
+            budget.max_chars = None
+        return Governor(budget)
+
     async def execute(self, context: 'Context', scope: 'ItemScope'=None):
         '''
         This function connects the three parts of executing a script:
@@ -132,9 +163,24 @@ class ExecutableScript:
         '''
         errors = ErrorLog()
 
+        # Nested executions share the outer execution's Governor
+        own_governor = context.governor is None
+        if own_governor:
+            context.governor = self.create_governor(context)
+
+        # Only the outermost execution enforces a hard deadline, nested executions are bound by its deadline
+        timeout = context.governor.budget.max_seconds if own_governor else None
+
         try:
             ## Execute the pipeline
-            values, exec_errors, spout_state = await self.execute_without_side_effects(context, scope)
+            # Checkpoints throughout the pipeline halt it cooperatively once its deadline passes,
+            #   the hard timeout is only there to also interrupt anything stuck awaiting e.g. a slow Source.
+            try:
+                async with asyncio.timeout(timeout) as hard_timeout:
+                    values, exec_errors, spout_state = await self.execute_without_side_effects(context, scope)
+            except TimeoutError:
+                if not hard_timeout.expired(): raise
+                raise BudgetExceededError(f'Script took longer than {timeout} seconds to execute.')
             errors.extend(exec_errors)
             if errors.terminal: raise TerminalError()
 
@@ -153,6 +199,12 @@ class ExecutableScript:
             print('Script execution halted due to error.')
             await self.send_error_log(context, errors)
 
+        except BudgetExceededError as e:
+            ## The script's Governor halted the script for using up too many resources.
+            print('Script execution halted due to exceeding its budget.')
+            errors.log(f'🛑 **Script execution halted:** {e}', True)
+            await self.send_error_log(context, errors)
+
         except Exception as e:
             ## An actual error has occurred in executing the script that we did not catch.
             # No script, no matter how poorly formed or thought-out, should be able to trigger this; if this occurs it's a Rezbot bug.
@@ -161,6 +213,10 @@ class ExecutableScript:
             await self.send_error_log(context, errors)
             raise e
 
+        finally:
+            if own_governor:
+                context.governor = None
+
     async def execute_without_side_effects(self, context: 'Context', scope: 'ItemScope'=None) -> tuple[ list[str], ErrorLog, SpoutState ]:
         '''
         Performs the ExecutableScript purely functionally, with its side-effects and final values to be handled by the caller.
@@ -253,13 +253,11 @@ At that point however, things get more complicated, as any attempt at grammatici
 
 ANALYSIS OF THE CURRENT NON-PYPARSING GRAMMARS RESPONSIBLE FOR PARSING A SCRIPT:
     1. The "butcher grammar", which does not care about the finer aspects of the script, merely cares about chopping it into [origin, pipe_chunk, pipe_chunk, ...]
-        This is implemented via a manually written state machine parser in Pipeline.split_into_segments.
+        This is implemented via a manually written state machine parser in script_lexer.split_segments.
     2. Parse each "pipe chunk"'s leading GroupMode
-    3. Then, for each "pipe chunk":
-        1. Use FOUL TRICKERY to temporarily evacuate all triple-quoted and parenthesized substrings
-        2. ChoiceTree expand
-        3. Put triple-quoted and parenthesized substrings back
-        Effectively, this is like a variant ChoiceTree grammar that acknowledges "ChoiceTree-invariant substrings"(!)
+    3. Then, for each "pipe chunk", ChoiceTree expand it while leaving triple-quoted and parenthesized substrings untouched.
+        This is a variant ChoiceTree grammar that acknowledges "ChoiceTree-invariant substrings"(!),
+        implemented via a manually written recursive descent parser in script_lexer.expand_segment.
     4. Then a really simple .split() followed by a grammar parse turns each one into a (pipe_name, Arguments),
         or a recursive parse for parenthesized sub-pipelines.
 
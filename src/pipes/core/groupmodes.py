@@ -1,12 +1,15 @@
 import re
-from typing import TypeVar
+from typing import TypeVar, Sequence
+from collections import abc
 from random import choice
 from pyparsing import ParseResults
 import itertools
 
+from utils.util import gather_bounded
 from .state import ErrorLog, Context, ItemScope
 from .conditions import Condition
-from . import grammar
+from . import grammar, config
+from .parse_cache import parse_cached
 
 # Pipe grouping syntax!
 
@@ -208,6 +211,95 @@ P = TypeVar('P')
 
 ################ SPLITMODES ################
 
+################ CONDITIONS ################
+
+def _check_group_sync(conditions: list[Condition], scope: ItemScope, first_only: bool) -> tuple[list[bool], ErrorLog, Condition | None]:
+    errors = ErrorLog()
+    values = []
+    for condition in conditions:
+        value, cond_errors = condition.evaluate_sync(scope)
+        if errors.extend(cond_errors).terminal:
+            return values, errors, condition
+        values.append(value)
+        if value and first_only: break
+    return values, errors, None
+
+async def _check_group(conditions: list[Condition], context: Context, scope: ItemScope, first_only: bool) -> tuple[list[bool], ErrorLog, Condition | None]:
+    context.check_deadline()
+    errors = ErrorLog()
+    values = []
+    for condition in conditions:
+        value, cond_errors = await condition.evaluate(context, scope)
+        if errors.extend(cond_errors).terminal:
+            return values, errors, condition
+        values.append(value)
+        if value and first_only: break
+    return values, errors, None
+
+async def check_conditions(conditions: list[Condition], groups: list[list[T]], context: Context, parent_scope: ItemScope, first_only=False) -> list[tuple[list[bool], ErrorLog, Condition | None]]:
+    '''
+    Evaluate the conditions in order against each group of items, as a single batch.
+    If the conditions only involve items they are all evaluated synchronously, otherwise groups are evaluated concurrently.
+
+    For each group, returns the values of the evaluated conditions (only up to the first that holds if `first_only` is set),
+        the ErrorLog, and the condition that caused a terminal error if any.
+    '''
+    context.check_deadline()
+    scopes = [ItemScope(parent_scope, items) for items in groups]
+    if all(condition.is_sync for condition in conditions):
+        return [_check_group_sync(conditions, scope, first_only) for scope in scopes]
+    return await gather_bounded((_check_group(conditions, context, scope, first_only) for scope in scopes), config.GROUP_CONCURRENCY)
+
+
+class GroupView(abc.Sequence):
+    '''
+    A read-only view of a group of items, as a range of indices into an underlying list of items, which is never copied.
+    Slicing a GroupView produces another GroupView into the same list, so that SplitModes can be applied in sequence
+        without ever copying the items, until `as_list` is called on a group that actually needs to be a list.
+    '''
+    __slots__ = ('base', 'indices')
+
+    base: list
+    indices: range
+
+    def __init__(self, base: list, indices: range=None):
+        self.base = base
+        self.indices = range(len(base)) if indices is None else indices
+
+    @staticmethod
+    def of(items: Sequence[P]) -> 'GroupView':
+        '''View the given items as a GroupView, without copying them.'''
+        if isinstance(items, GroupView): return items
+        if not isinstance(items, list): items = list(items)
+        return GroupView(items)
+
+    def __len__(self):
+        return len(self.indices)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return GroupView(self.base, self.indices[index])
+        return self.base[self.indices[index]]
+
+    def __iter__(self):
+        return map(self.base.__getitem__, self.indices)
+
+    def __repr__(self):
+        return 'GroupView(%s)' % repr(self.to_list())
+
+    def to_list(self) -> list:
+        indices = self.indices
+        # NOTE: A descending range's stop may be -1, which would mean something else entirely as a slice bound
+        if indices.step < 0:
+            return [self.base[i] for i in indices]
+        return self.base[indices.start: indices.stop: indices.step]
+
+
+def as_list(items: Sequence[P]) -> list[P]:
+    '''Materialise a group of items as a fresh list if it is a GroupView, to be passed to code that expects a list.'''
+    return items.to_list() if isinstance(items, GroupView) else items
+
+
 class SplitMode:
     '''
     Abstract class.
@@ -255,9 +347,15 @@ class SplitMode:
         if self.strictness == 1: return 'STRICT '
         if self.strictness == 2: return 'VERY STRICT '
 
-    def apply(self, items: list[P]) -> list[tuple[list[P], bool]]:
+    def apply(self, items: Sequence[P]) -> list[tuple[Sequence[P], bool]]:
+        '''Split the items into groups, each paired with whether the group is to be ignored, without copying any items (see GroupView).'''
         raise NotImplementedError()
 
+    @staticmethod
+    def pad(items: 'GroupView', count: int) -> 'GroupView':
+        '''Pad out the items with (count) default P's (i.e. empty strings or lists), the only case where items have to be copied.'''
+        return GroupView([*items, *[type(items[0])()] * count])
+
 
 class Row(SplitMode):
     __slots__ = ('size', 'padding')
@@ -274,7 +372,8 @@ class Row(SplitMode):
     def as_readable_str(self):
         return '{}ROWS SIZE {}{}'.format(self.strictness_as_readable_str(), self.size, ' WITH PADDING' if self.padding else '')
 
-    def apply(self, items: list[P]) -> list[tuple[list[P], bool]]:
+    def apply(self, items: Sequence[P]) -> list[tuple[Sequence[P], bool]]:
+        items = GroupView.of(items)
         length = len(items)     # The number of items we want to split
         size = self.size        # The size of each group (GIVEN)
         count= length //size    # The minimal number of groups we have to split it into
@@ -291,7 +390,7 @@ class Row(SplitMode):
                 items = items[:length]
             ## Padding: The last group is padded out with (size-rest) default P's (i.e. empty strings or lists).
             elif self.padding:
-                items += [ type(items[0])() ] * (size - rest)
+                items = self.pad(items, size - rest)
                 count += 1
                 length = count*size
                 rest = 0
@@ -326,7 +425,8 @@ class Divide(SplitMode):
     def as_readable_str(self):
         return '{}DIVIDE INTO {}{}'.format(self.strictness_as_readable_str(), self.count, ' WITH PADDING' if self.padding else '')
 
-    def apply(self, items: list[P]) -> list[tuple[list[P], bool]]:
+    def apply(self, items: Sequence[P]) -> list[tuple[Sequence[P], bool]]:
+        items = GroupView.of(items)
         length = len(items)     # The number of items we want to split
         count = self.count      # The number of groups we want to split it into (GIVEN)
         size = length //count   # The minimal size of each group
@@ -344,7 +444,7 @@ class Divide(SplitMode):
                 rest = 0
             ## Padding: The last group is padded out.
             elif self.padding:
-                items += [ type(items[0])() ] * (count - rest)
+                items = self.pad(items, count - rest)
                 size += 1
                 length = size*count
                 rest = 0
@@ -387,7 +487,8 @@ class Modulo(SplitMode):
     def as_readable_str(self):
         return '{}MODULO {}{}'.format(self.strictness_as_readable_str(), self.modulo, ' WITH PADDING' if self.padding else '')
 
-    def apply(self, items: list[P]) -> list[tuple[list[P], bool]]:
+    def apply(self, items: Sequence[P]) -> list[tuple[Sequence[P], bool]]:
+        items = GroupView.of(items)
         length = len(items)    # The number of items we want to split
         count = self.modulo     # The number of groups we want to split it into (GIVEN)
         size = length //count   # The minimal size of each group
@@ -405,7 +506,7 @@ class Modulo(SplitMode):
                 rest = 0
             ## Padding: The last (count-rest) groups are padded out with one empty string.
             if self.padding:
-                items += [ type(items[0])() ] * (count - rest)
+                items = self.pad(items, count - rest)
                 size += 1
                 length = size*count
                 rest = 0
@@ -418,12 +519,8 @@ class Modulo(SplitMode):
             if self.strictness == 1: return []
             return [([], False) for i in range(count)]
 
-        out = []
         ## Slice into groups of items whose indices are x+i where x is a multiple of (count)
-        for i in range(0, count):
-            vals = [items[x+i] for x in range(0, length, count) if x+i < length]
-            out.append((vals, False))
-        return out
+        return [(items[i: length: count], False) for i in range(0, count)]
 
 
 class Column(SplitMode):
@@ -441,7 +538,8 @@ class Column(SplitMode):
     def as_readable_str(self):
         return '{}COLUMNS SIZE {}{}'.format(self.strictness_as_readable_str(), self.size, ' WITH PADDING' if self.padding else '')
 
-    def apply(self, items: list[P]) -> list[tuple[list[P], bool]]:
+    def apply(self, items: Sequence[P]) -> list[tuple[Sequence[P], bool]]:
+        items = GroupView.of(items)
         length = len(items)     # The number of items we want to split
         size = self.size        # The size of each group (GIVEN)
         count= length //size    # The minimal number of groups we have to split it into
@@ -459,7 +557,7 @@ class Column(SplitMode):
                 rest = 0
             ## Padding: Pad out the tail so the last (size-rest) groups contain one empty string.
             if self.padding:
-                items += [ type(items[0])() ] * (size - rest)
+                items = self.pad(items, size - rest)
                 count += 1
                 length = size*count
                 rest = 0
@@ -472,12 +570,8 @@ class Column(SplitMode):
             if self.strictness == 1: return []
             else: return [([], False)]
 
-        out = []
         ## Slice into groups of items whose indices are x+i where x is a multiple of (count)
-        for i in range(0, count):
-            vals = [items[x+i] for x in range(0, length, count) if x+i < length]
-            out.append((vals, False))
-        return out
+        return [(items[i: length: count], False) for i in range(0, count)]
 
 
 class Interval(SplitMode):
@@ -503,7 +597,8 @@ class Interval(SplitMode):
         if self.end is None: return '{}INDEX AT {}'.format(self.strictness_as_readable_str(), self.start)
         return '{}INTERVAL FROM {} TO {}'.format(self.strictness_as_readable_str(), self.start, self.end)
 
-    def apply(self, items: list[P]) -> list[tuple[list[P], bool]]:
+    def apply(self, items: Sequence[P]) -> list[tuple[Sequence[P], bool]]:
+        items = GroupView.of(items)
         length = len(items)
 
         if length == 0: return [(items, False)]
@@ -651,21 +746,25 @@ class Switch(AssignMode):
         overflow_pipe_given = (p == c+1)
         # c is the number of conditions, p is the number of pipes to sort it in (either c or c+1)
 
-        if not self.multiply:
-            out = []
-            for items, ignore in tuples:
-                if ignore:
-                    out.append((items, None))
-                    continue
-
-                ## Run over all the conditions to see which one hits first and go with that pipe
-                scope = ItemScope(parent_scope, items)
-                for condition, pipe in zip(self.conditions, pipes):
-                    cond_value, cond_errors = await condition.evaluate(context, scope)
-                    if errors.extend(cond_errors).terminal:
-                        # TODO: Convey ErrorLog even when not terminal
-                        raise GroupModeError(f'Error while evaluating condition `{condition}`.', errors=errors)
-                    if cond_value:
+        ## Evaluate the conditions for all non-ignored groups at once
+        # Non-multiply only needs the conditions up to the first one that hits
+        active = [items for items, ignore in tuples if not ignore]
+        results = iter(await check_conditions(self.conditions, active, context, parent_scope, first_only=not self.multiply))
+
+        out = []
+        for items, ignore in tuples:
+            if ignore:
+                out.append((items, None))
+                continue
+            values, cond_errors, failed_condition = next(results)
+            if errors.extend(cond_errors).terminal:
+                # TODO: Convey ErrorLog even when not terminal
+                raise GroupModeError(f'Error while evaluating condition `{failed_condition}`.', errors=errors)
+
+            if not self.multiply:
+                ## Go with the pipe of the first condition that hit
+                for value, pipe in zip(values, pipes):
+                    if value:
                         out.append((items, pipe))
                         break
                 else:
@@ -678,25 +777,15 @@ class Switch(AssignMode):
                         pass # Throw this list of values away!
                     elif self.strictness == 2:
                         raise GroupModeError('Very strict switch error: Default case was reached!')
-            return out
-
-        else: ## Multiply
-            out = []
-            for items, ignore in tuples:
-                if ignore:
-                    out.append((items, None))
-                    continue
-                scope = ItemScope(parent_scope, items)
-                for (condition, pipe) in zip(self.conditions, pipes):
-                    cond_value, cond_errors = await condition.evaluate(context, scope)
-                    if errors.extend(cond_errors).terminal:
-                        # TODO: Convey ErrorLog even when not terminal
-                        raise GroupModeError(f'Error while evaluating condition `{condition}`.', errors=errors)
-                    if cond_value:
+
+            else: ## Multiply
+                for value, pipe in zip(values, pipes):
+                    if value:
                         out.append((items, pipe))
                 if overflow_pipe_given:
                     out.append((items, pipes[-1]))
-            return out
+
+        return out
 
 
 class Random(AssignMode):
@@ -740,18 +829,20 @@ class IfMode:
 
     async def apply(self, tuples: list[tuple[T, bool]], context: Context, parent_scope: ItemScope) -> list[tuple[T, bool]]:
         errors = ErrorLog()
+        active = [items for items, ignore in tuples if not ignore]
+        results = iter(await check_conditions([self.condition], active, context, parent_scope))
+
         out = []
         for (items, ignore) in tuples:
             if ignore:
                 out.append((items, True))
                 continue
 
-            scope = ItemScope(parent_scope, items)
-            cond_value, cond_errors = await self.condition.evaluate(context, scope)
+            values, cond_errors, _ = next(results)
             if errors.extend(cond_errors).terminal:
                 # TODO: Convey ErrorLog even when not terminal
                 raise GroupModeError(f'Error while evaluating condition `{self.condition}`.', errors=errors)
-            if cond_value:
+            if values[0]:
                 out.append((items, False))
 
             elif not self.strictness:
@@ -811,8 +902,9 @@ class GroupBy:
             if key not in known_keys:
                 ## COLLECT mode tells us to float the keys to the front
                 ## EXTRACT mode tells us to get rid of the keys entirely
+                ## NOTE: The first group with a key is copied since it's extended by all repeat groups
                 if self.mode == GroupBy.GROUP:
-                    values = items
+                    values = list(items)
                 elif self.mode == GroupBy.COLLECT:
                     values = list(key) + [ items[i] for i in range(n) if i > self.max_index or not self.is_key[i] ]
                 else:
@@ -918,6 +1010,7 @@ class GroupMode:
         return GroupMode(split_modes, mid_modes, assign_mode)
 
     @staticmethod
+    @parse_cached('groupmode', 100_000)
     def from_string_with_remainder(string: str) -> tuple['GroupMode', str]:
         result = grammar.groupmode_and_remainder.parse_string(string, parse_all=True)
         groupmode = GroupMode.from_parsed(result[0])
@@ -944,9 +1037,16 @@ class GroupMode:
     def is_singular(self):
         return not self.split_modes and not self.assign_mode.multiply
 
+    def get_conditions(self) -> list[Condition]:
+        '''All Conditions evaluated by this GroupMode's IF and SWITCH modes.'''
+        conditions = [mid_mode.condition for mid_mode in self.mid_modes if isinstance(mid_mode, IfMode)]
+        if isinstance(self.assign_mode, Switch):
+            conditions.extend(self.assign_mode.conditions)
+        return conditions
+
     # ========================================= Application ========================================
 
-    async def apply(self, items: list[T], pipes: list[P], context: Context, scope: ItemScope) -> list[tuple[ list[T], P|None ]]:
+    async def apply(self, items: Sequence[T], pipes: list[P], context: Context, scope: ItemScope) -> list[tuple[ Sequence[T], P|None ]]:
         groups = [(items, False)]
 
         ## Apply the SplitModes
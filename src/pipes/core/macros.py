@@ -5,8 +5,9 @@ from shutil import copyfile
 
 from discord import Embed, TextChannel, Client
 from .signature import ArgumentError
-from .pipeline import Pipeline
+from .pipeline import Pipeline, ParsedPipe
 from .state import ErrorLog
+from . import config
 import utils.texttools as texttools
 import permissions
 
@@ -57,8 +58,19 @@ class Macro:
         'kind', 'name', 'code', 'authorName', 'authorId', 'desc', 'visible', 'command'
     ]
 
+    revision: int
+    'Incremented each time the Macro\'s code changes, used to tell if a compiled Pipeline is out of date.'
+    dependents: set['Macro']
+    'The Macros whose compiled Pipelines were statically linked against this Macro\'s compiled Pipeline.'
+    _pipeline: Pipeline | None
+
+    # The kind of script each kind of Macro is stored as in the compiled cache
+    COMPILED_KINDS = {'Pipe': 'pipe_macro', 'Source': 'source_macro'}
+
     def __init__(self, kind, name, code, authorName, authorId, desc=None, visible=True, command=False):
-        self.version = 4
+        self.revision = 0
+        self.dependents = set()
+        self._pipeline = None
         self.kind: str = kind
         self.name: str = name
         self.code: str = code
@@ -69,6 +81,100 @@ class Macro:
         self.command: bool = command
         self.signature: dict[str, MacroParam] = {}
 
+    @property
+    def code(self) -> str:
+        return self._code
+
+    @code.setter
+    def code(self, code: str):
+        if getattr(self, '_code', code) != code:
+            self.discard_compiled()
+        self._code = code
+        self.invalidate()
+
+    def invalidate(self):
+        '''Drop the Macro's compiled Pipeline, so that it is parsed anew next time it is used, as well as those of its dependents.'''
+        self.revision += 1
+        self._pipeline = None
+        dependents, self.dependents = self.dependents, set()
+        for dependent in dependents:
+            dependent.invalidate()
+
+    def get_pipeline(self) -> Pipeline:
+        '''
+        Get the Macro's code as a parsed Pipeline, which is parsed only once for each revision of the code,
+            or loaded from the compiled cache if it was parsed before a restart.
+        '''
+        if self._pipeline is None:
+            if config.INLINE_MACROS:
+                self.link()
+            else:
+                self._pipeline = self.compile()
+        return self._pipeline
+
+    def compile(self) -> Pipeline:
+        '''Parse the Macro's code, or load it from the compiled cache.'''
+        if self.kind == "Pipe":
+            return compiled_cache.load_or_compile(Macro.COMPILED_KINDS[self.kind], self.code, Pipeline.from_string)
+        elif self.kind == "Source":
+            return compiled_cache.load_or_compile(Macro.COMPILED_KINDS[self.kind], self.code, Pipeline.from_string_with_origin)
+
+    def discard_compiled(self):
+        '''Delete the Macro's compiled Pipeline from the compiled cache, for when its code is edited or it is deleted.'''
+        compiled_cache.discard(Macro.COMPILED_KINDS[self.kind], self.code)
+
+    def link(self):
+        '''
+        Compile the Macro's Pipeline, as well as those of the Pipe Macros it calls (and that they call, etc.), and statically link each call
+            to the callee's compiled Pipeline (see `ParsedPipe.link_macro`), splicing in the callee's segments where possible (see `Pipeline.splice_macros`).
+        Each linked Macro registers its callers as dependents, so that editing it causes them to be recompiled as well.
+        Cyclical calls are refused, and are instead resolved by name at execution time.
+
+        The Macros are visited depth-first using an explicit stack rather than recursion, so that chains of Macros of any length can be linked,
+            with each callee fully linked before its callers, so that they splice in its final segments.
+        '''
+        # Each Macro being linked along with its calls that are left to be linked, in reverse order
+        stack: list[tuple[Macro, list[tuple[ParsedPipe, Macro]]]] = []
+        linking: set[Macro] = set()
+
+        def enter(macro: Macro):
+            # The compiled Pipeline may be shared with identical code through the parse cache, so link a private copy of it
+            macro._pipeline = macro.compile().copy()
+            calls = [
+                (parsed_pipe, MACRO_PIPES[parsed_pipe.name]) for parsed_pipe in macro._pipeline.iter_parsed_pipes()
+                if parsed_pipe.type == ParsedPipe.MACRO_PIPE and parsed_pipe.name in MACRO_PIPES
+            ]
+            calls.reverse()
+            stack.append((macro, calls))
+            linking.add(macro)
+
+        enter(self)
+        try:
+            while stack:
+                macro, calls = stack[-1]
+                if not calls:
+                    macro._pipeline.splice_macros()
+                    stack.pop()
+                    linking.discard(macro)
+                    continue
+                parsed_pipe, callee = calls[-1]
+                if callee in linking:
+                    # Cyclical call
+                    calls.pop()
+                    continue
+                if callee._pipeline is None:
+                    # Link the callee first, then come back to this call
+                    enter(callee)
+                    continue
+                calls.pop()
+                parsed_pipe.link_macro(callee)
+                callee.dependents.add(macro)
+        except BaseException:
+            # Don't leave any partially linked Pipelines behind
+            for macro, _ in stack:
+                macro._pipeline = None
+            raise
+
     def embed(self, bot: Client=None, channel: TextChannel=None, **kwargs):
         title = self.name + (' `hidden`' if not self.visible else '')
         embed = Embed(title=self.kind + ' Macro: ' + title, description=self.desc, color=0x06ff83)
@@ -122,10 +228,7 @@ class Macro:
     # ========================================= Validation =========================================
 
     def get_static_errors(self) -> ErrorLog:
-        if self.kind == "Pipe":
-            return Pipeline.from_string(self.code).get_static_errors()
-        elif self.kind == "Source":
-            return Pipeline.from_string_with_origin(self.code).get_static_errors()
+        return self.get_pipeline().get_static_errors()
 
     # ======================================== Serialization =======================================
 
@@ -222,11 +325,18 @@ class Macros:
     def __setitem__(self, name, val):
         if type(val).__name__ != 'Macro':
             raise ValueError('Macros should only contain items of class Macro!')
+        if name in self.macros:
+            if self.macros[name].code != val.code:
+                self.macros[name].discard_compiled()
+            self.macros[name].invalidate()
+        val.invalidate()
         self.macros[name] = val
         self.write()
         return val
 
     def __delitem__(self, name):
+        self.macros[name].discard_compiled()
+        self.macros[name].invalidate()
         del self.macros[name]
         self.write()
 
@@ -238,4 +348,7 @@ class Macros:
 
 
 MACRO_PIPES = Macros(DIR, 'Pipe', 'pipe_macros')
-MACRO_SOURCES = Macros(DIR, 'Source', 'source_macros')
\ No newline at end of file
+MACRO_SOURCES = Macros(DIR, 'Source', 'source_macros')
+
+# NOTE: Import at the end of the file due to circular dependencies
+from . import compiled_cache
@@ -0,0 +1,118 @@
+'''
+A single registry of bounded caches for the results of parsing script code, so the same code need only be parsed once.
+Each kind of parsed object has its own cache and budget, which may be configured in the [PIPES] section of config.ini.
+'''
+import time
+import functools
+from typing import Callable, Hashable, TypeVar
+
+from utils.sized_cache import SizedLRUCache
+from . import config
+
+R = TypeVar('R')
+
+
+class ParseCache(SizedLRUCache):
+    '''
+    A SizedLRUCache of parse results, weighed by the number of characters parsed,
+        which also keeps track of the total time spent parsing on cache misses,
+        and of the lookups which could not use the cache at all due to unhashable arguments.
+    '''
+    kind: str
+    parse_seconds: float
+    unhashable: int
+
+    def __init__(self, kind: str, max_weight: int, max_entries: int=None):
+        super().__init__(max_weight, max_entries)
+        self.kind = kind
+        self.parse_seconds = 0.0
+        self.unhashable = 0
+
+    def stats_str(self) -> str:
+        return '`{}`: {}, {} unhashable, {:.3f}s spent parsing'.format(self.kind, super().stats_str(), self.unhashable, self.parse_seconds)
+
+
+class ByIdentity:
+    '''
+    Wraps an object so it can be used in a cache key by its identity, even if it is unhashable (e.g. a Signature).
+    Holds on to the object, so its id cannot be reused by another object while the key is in use.
+    '''
+    __slots__ = ('obj',)
+
+    def __init__(self, obj):
+        self.obj = obj
+
+    def __hash__(self):
+        return id(self.obj)
+
+    def __eq__(self, other):
+        return isinstance(other, ByIdentity) and other.obj is self.obj
+
+
+PARSE_CACHES: dict[str, ParseCache] = {}
+'All ParseCaches, by the kind of object they hold.'
+
+_MISSING = object()
+
+
+def get_cache(kind: str, default_budget: int) -> ParseCache:
+    '''
+    Get the ParseCache for the given kind, registering it if needed.
+    Its budget is the number of characters of code it may hold, given by the `parse_cache_<kind>` setting or `default_budget`.
+    '''
+    if kind not in PARSE_CACHES:
+        PARSE_CACHES[kind] = ParseCache(kind, config.get_parse_cache_budget(kind, default_budget))
+    return PARSE_CACHES[kind]
+
+
+def parse_cached(kind: str, default_budget: int, *, key: Callable[..., Hashable]=None, copy: Callable[[R], R]=None):
+    '''
+    Decorator memoizing a parsing function in the ParseCache for the given kind, see `get_cache`.
+
+    The cache key is made from the function's arguments, or by calling `key` with the same arguments if given.
+    Calls whose key is unhashable are not cached, but counted.
+
+    Results are shared between all callers, and thus must not be modified,
+        except to memoize values derived purely from the result itself (e.g. `Pipeline.get_plan`).
+    If part of the result is meant to be modified, `copy` is applied to the result each time it is returned.
+    Parsing exceptions are not cached, but simply raised again the next time.
+    '''
+    cache = get_cache(kind, default_budget)
+
+    def _parse_cached(func: Callable[..., R]) -> Callable[..., R]:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs) -> R:
+            if key is not None:
+                cache_key = key(*args, **kwargs)
+            else:
+                cache_key = (args, tuple(kwargs.items())) if kwargs else args
+            try:
+                result = cache.get(cache_key, _MISSING)
+            except TypeError:
+                # Unhashable arguments, don't cache
+                cache.unhashable += 1
+                return func(*args, **kwargs)
+
+            if result is _MISSING:
+                start = time.perf_counter()
+                try:
+                    result = func(*args, **kwargs)
+                finally:
+                    cache.parse_seconds += time.perf_counter() - start
+                cache.put(cache_key, result, weight=sum(len(a) for a in args if isinstance(a, str)) or 1)
+
+            return copy(result) if copy is not None else result
+
+        wrapper.cache = cache
+        return wrapper
+
+    return _parse_cached
+
+
+def clear_all():
+    for cache in PARSE_CACHES.values():
+        cache.clear()
+
+
+def stats_str() -> str:
+    return '\n'.join(cache.stats_str() for cache in PARSE_CACHES.values())
@@ -11,8 +11,10 @@ from textwrap import dedent
 import discord
 from discord import Embed
 
-from .signature import Signature
+from .signature import Signature, Par
 from .state import Context, SpoutState
+from . import config
+from utils.sized_cache import SizedLRUCache
 
 
 class Pipeoid:
@@ -26,6 +28,11 @@ class Pipeoid:
     signature: Signature
     doc: str = None
     small_doc: str = None
+    pure: bool = False
+    '''
+    Whether the Pipeoid is deterministic and free of side-effects, i.e. the same input and arguments always produce the same output,
+        even across restarts. If it is only pure for some arguments, this is True and `is_pure` tells which.
+    '''
 
     def __init__(
         self,
@@ -36,8 +43,14 @@ class Pipeoid:
         category: str=None,
         doc: str=None,
         may_use: Callable[[discord.User], bool]=None,
+        pure: bool | Callable[[dict[str]], bool]=False,
     ):
         self.name = name
+        if callable(pure):
+            self.pure = True
+            self.is_pure = pure
+        else:
+            self.pure = pure
         self.aliases = aliases or []
         if name in self.aliases: self.aliases.remove(name)
         self.category = category
@@ -53,6 +66,10 @@ class Pipeoid:
     def may_use(self, user: discord.Member | discord.User) -> bool:
         return True
 
+    def is_pure(self, args: dict[str]) -> bool:
+        '''Whether the Pipeoid is pure (see `pure`) when given these arguments.'''
+        return self.pure
+
     # ======================================= REPRESENTATION ======================================
 
     def __repr__(self):
@@ -112,6 +129,10 @@ class Pipe(Pipeoid):
     pipe_function: Callable[..., list[str]]
     is_smart: bool
     is_coroutine: bool
+    item_function: Callable[..., str | list[str]] | None
+    'For Pipes applied to each item separately (cf. @one_to_one and @one_to_many), the function applied to each item.'
+    item_flattens: bool
+    'Whether item_function produces a list of items for each item, rather than a single item.'
 
     def __init__(self, signature: Signature, function: Callable[..., list[str]], is_smart=False, **kwargs):
         super().__init__(signature=signature, **kwargs)
@@ -119,10 +140,34 @@ class Pipe(Pipeoid):
         self.pipe_function = function
         self.is_smart = bool(is_smart or getattr(function, "is_smart_pipe", False))
         self.is_coroutine = inspect.iscoroutinefunction(function)
+        self.item_function = getattr(function, "item_function", None)
+        self.item_flattens = getattr(function, "item_flattens", False)
+
+    # Memoizes applications of pure Pipes, weighed by their total number of input and output characters
+    APPLY_CACHE: SizedLRUCache[tuple, tuple[str, ...]] = SizedLRUCache(max_weight=config.APPLY_CACHE_WEIGHT, max_entries=config.APPLY_CACHE_ENTRIES)
 
     async def apply(self, items: list[str], context: Context, pipe_args: dict[str]) -> list[str]:
         ''' Apply the pipe to a list of items. '''
         # TODO: Call may_use here?
+        if self.is_smart or not self.is_pure(pipe_args):
+            return await self._apply(items, context, pipe_args)
+
+        ## Only arguments that are compared by value make for useful keys, others (e.g. a parsed `map`) would only ever match themselves
+        if not all(isinstance(value, Par.SHAREABLE_TYPES) for value in pipe_args.values()):
+            return await self._apply(items, context, pipe_args)
+
+        ## Pure Pipes: Look up the result in the cache first
+        key = (self.name, tuple(pipe_args.items()), tuple(items))
+        cached = Pipe.APPLY_CACHE.get(key)
+        if cached is not None:
+            return list(cached)
+
+        result = await self._apply(items, context, pipe_args)
+        weight = sum(len(i) for i in items) + sum(len(r) for r in result)
+        Pipe.APPLY_CACHE.put(key, tuple(result), weight)
+        return result
+
+    async def _apply(self, items: list[str], context: Context, pipe_args: dict[str]) -> list[str]:
         if self.is_smart:
             if self.is_coroutine:
                 return await self.pipe_function(items, context, **pipe_args)
@@ -144,12 +189,15 @@ class Source(Pipeoid):
     '''
     source_function: Callable[..., list[str]]
     depletable: bool
+    stable: bool
+    'Whether the Source always produces the same values given the same arguments within a single script execution, allowing them to be memoized.'
     plural: str | None = None
 
-    def __init__(self, signature: Signature, function: Callable[..., list[str]], *, plural: str=None, depletable=False, **kwargs):
+    def __init__(self, signature: Signature, function: Callable[..., list[str]], *, plural: str=None, depletable=False, stable=False, **kwargs):
         super().__init__(signature=signature, **kwargs)
         self.source_function = function
         self.depletable = depletable
+        self.stable = stable
 
         if plural:
             self.plural = plural.lower()
@@ -158,8 +206,11 @@ class Source(Pipeoid):
         if self.plural and self.plural != self.name:
             self.aliases.insert(0, self.plural)
 
-    def generate(self, context: Context, args: dict[str, Any], n=None):
-        ''' Call the Source to produce items using a parsed dict of arguments. '''
+    async def generate(self, context: Context, args: dict[str, Any], n=None) -> list[str]:
+        '''
+        Call the Source to produce items using a parsed dict of arguments.
+        Values of stable Sources are memoized in the Context, so they are only produced once per script execution.
+        '''
         # TODO: Call may_use here?
 
         # Handle the magic `n` argument that may be given using the {n sources} syntax
@@ -170,7 +221,19 @@ class Source(Pipeoid):
             if 'n' in args: args['n'] = int(n)
             elif 'N' in args: args['N'] = int(n)
 
-        return self.source_function(context, **args)
+        if not self.stable or context.stable_sources is None:
+            return await self.source_function(context, **args)
+
+        key = (self.name, tuple((k, tuple(v) if isinstance(v, list) else v) for k, v in args.items()))
+        try:
+            if key in context.stable_sources:
+                return list(context.stable_sources[key])
+        except TypeError:
+            # Unhashable arguments, don't memoize
+            return await self.source_function(context, **args)
+        values = await self.source_function(context, **args)
+        context.stable_sources[key] = tuple(values)
+        return values
 
     def get_source_code_url(self):
         return self._get_github_url(self.source_function)
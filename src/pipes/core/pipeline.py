@@ -1,20 +1,48 @@
 import re
-from typing import Union, TypeAlias
+import random
+import asyncio
+import itertools
+from typing import Union, TypeAlias, Callable, Awaitable, Iterator
 from pyparsing import ParseBaseException, ParseResults
-from functools import lru_cache
+from functools import partial
 
 import permissions
 from utils.choicetree import ChoiceTree
 
 from .state import ErrorLog, SpoutState, Context, ItemScope
-from . import groupmodes
+from . import groupmodes, config
+from .parse_cache import parse_cached
+from .script_lexer import split_segments, expand_segment, describe_position
 # NOTE: More import statements at the end of the file due to circular dependencies
 
 
+parse_choice_tree = parse_cached('choice_tree', 500_000)(ChoiceTree)
+'ChoiceTree constructor, memoized by the parse cache.'
+
+
 class PipelineError(ValueError):
     '''Special error for some invalid element when processing a pipeline.'''
 
 
+class SegmentState:
+    '''
+    Mutable state collected while applying a single pipeline segment, written to by the executors of each of its groups.
+    '''
+    __slots__ = ('next_items', 'printed_items', 'spout_state', 'extend_print')
+
+    next_items: list[str]
+    printed_items: list[str]
+    spout_state: SpoutState
+    extend_print: bool
+    'Whether print values of nested Pipelines/Macros may be kept, only true for singular group modes.'
+
+    def __init__(self, spout_state: SpoutState, extend_print: bool):
+        self.next_items = []
+        self.printed_items = []
+        self.spout_state = spout_state
+        self.extend_print = extend_print
+
+
 class ParsedPipe:
     '''In a parsed Pipeline represents a single, specific pipeoid along with its specific assigned arguments.'''
     # Different types of ParsedPipe, determined at moment of parsing
@@ -26,35 +54,45 @@ class ParsedPipe:
     MACRO_SOURCE    = object()
     UNKNOWN         = object()
 
-    __slots__ = ('name', 'type', 'arguments', 'errors', 'pipe')
+    __slots__ = ('name', 'type', 'arguments', 'errors', 'position', 'pipe', 'executor', 'macro_source', 'linked_macro')
 
-    def __init__(self, name: str, arguments: 'Arguments', *, errors: ErrorLog=None):
+    def __init__(self, name: str, arguments: 'Arguments', *, errors: ErrorLog=None, position: int=None):
         self.errors = errors if errors is not None else ErrorLog()
         self.arguments = arguments
+        self.position = position
 
         # Validate name
         self.name = name.strip().lower()
         if self.name and not re.match(r'^[_a-z]\w*$', self.name):
             self.errors.log(f'Invalid pipe name "{self.name}"', True)
 
-        ## (Attempt to) determine what kind of pipe it is ahead of time
+        ## (Attempt to) determine what kind of pipe it is ahead of time, and bind the executor for that kind
+        self.macro_source = None
+        self.linked_macro = None
         if self.name in ['', 'nop', 'print']:
             self.type = ParsedPipe.SPECIAL
+            self.executor = self._execute_print if self.name == 'print' else self._execute_nop
         elif self.name in NATIVE_PIPES:
             self.type = ParsedPipe.NATIVE_PIPE
             self.pipe = NATIVE_PIPES[self.name]
+            self.executor = self._execute_native_pipe
         elif self.name in NATIVE_SPOUTS:
             self.type = ParsedPipe.NATIVE_SPOUT
             self.pipe = NATIVE_SPOUTS[self.name]
+            self.executor = self._execute_native_spout
         elif self.name in NATIVE_SOURCES:
             self.type = ParsedPipe.NATIVE_SOURCE
             self.pipe = NATIVE_SOURCES[self.name]
+            self.executor = self._execute_native_source
         elif self.name in MACRO_PIPES:
             self.type = ParsedPipe.MACRO_PIPE
+            self.executor = self._execute_macro_pipe
         elif self.name in MACRO_SOURCES:
             self.type = ParsedPipe.MACRO_SOURCE
+            self.executor = self._execute_macro_source
         else:
             self.type = ParsedPipe.UNKNOWN
+            self.executor = self._execute_unresolved
             # NOTE: Don't issue a warning here, since the warning will be repeated even once the pipe name is found
 
     @staticmethod
@@ -72,13 +110,13 @@ class ParsedPipe:
         return None
 
     @staticmethod
-    def from_string(pipestr: str) -> 'ParsedPipe':
+    def from_string(pipestr: str, position: int=None) -> 'ParsedPipe':
         name, *args = pipestr.strip().split(' ', 1)
         name = name.lower()
         argstr = args[0] if args else ''
         signature = ParsedPipe.find_signature(name)
         arguments, _, errors = Arguments.from_string(argstr, signature)
-        return ParsedPipe(name, arguments, errors=errors)
+        return ParsedPipe(name, arguments, errors=errors, position=position)
 
     @staticmethod
     def from_parsed(result: ParseResults) -> 'ParsedPipe':
@@ -87,31 +125,249 @@ class ParsedPipe:
         arguments, _, errors = Arguments.from_parsed(result['args'], signature)
         return ParsedPipe(name, arguments, errors=errors)
 
+    def __reduce__(self):
+        # Only the parsed data is pickled, the pipe's type, executor and Macro link are determined anew when unpickled
+        return (ParsedPipe._unpickle, (self.name, self.arguments, self.errors, self.position))
+
+    @staticmethod
+    def _unpickle(name: str, arguments: 'Arguments', errors: ErrorLog, position: int | None) -> 'ParsedPipe':
+        parsed_pipe = ParsedPipe(name, arguments, position=position)
+        # Any errors logged by the constructor are already among the pickled errors
+        parsed_pipe.errors = errors
+        return parsed_pipe
+
     # ======================================= Representation =======================================
 
+    def copy(self) -> 'ParsedPipe':
+        '''
+        Copy this ParsedPipe, sharing its parsed arguments and errors, but without any Macro link.
+        Used to link a ParsedPipe to a Macro without modifying one which may be shared through the parse caches.
+        '''
+        parsed_pipe = object.__new__(ParsedPipe)
+        for attr in ParsedPipe.__slots__:
+            if hasattr(self, attr):
+                setattr(parsed_pipe, attr, getattr(self, attr))
+        # The executor is a bound method, bind it to the copy instead
+        parsed_pipe.executor = getattr(parsed_pipe, self.executor.__name__)
+        parsed_pipe.linked_macro = None
+        return parsed_pipe
+
+    def may_have_side_effects(self) -> bool:
+        '''
+        Whether applying this pipe might do anything besides producing items and hooking Spouts (whose effects only happen after execution),
+            i.e. whether it might evaluate Sources, either as itself or in its arguments.
+        '''
+        if self.type is ParsedPipe.NATIVE_PIPE:
+            # Smart pipes receive the Context, which they may use to evaluate Sources or scripts
+            if self.pipe.is_smart: return True
+        elif self.type is not ParsedPipe.SPECIAL and self.type is not ParsedPipe.NATIVE_SPOUT:
+            # Sources, Macros, or names that may yet turn out to be either
+            return True
+        return self.arguments is not None and self.arguments.evaluates_sources()
+
+    def may_await(self) -> bool:
+        '''
+        Whether applying this pipe might actually suspend, i.e. whether there is anything to be gained from applying it to several groups concurrently.
+        Only coroutine Pipes, Macros, Sources and arguments that evaluate Sources do, everything else runs synchronously from start to finish.
+        '''
+        if self.type is ParsedPipe.NATIVE_PIPE:
+            if self.pipe.is_coroutine: return True
+        elif self.type is not ParsedPipe.SPECIAL and self.type is not ParsedPipe.NATIVE_SPOUT:
+            return True
+        return self.arguments is not None and self.arguments.evaluates_sources()
+
     def __repr__(self):
         return 'ParsedPipe(%s, %s)' % (repr(self.name), repr(self.arguments))
     def __str__(self):
         return self.name + ((' ' + str(self.arguments)) if self.arguments else '')
 
+    # ========================================= Application ========================================
+
+    async def execute(self, items: list[str], context: Context, scope: ItemScope, state: SegmentState, errors: ErrorLog):
+        '''Determine the arguments and apply this pipe to a single group of items, writing the results into the SegmentState.'''
+        errors.extend(self.errors, self.name)
+        if errors.terminal: return
+
+        #### Determine the arguments (if needed)
+        args = None
+        if self.arguments is not None:
+            args, arg_errors = await self.arguments.determine(context, scope)
+            errors.extend(arg_errors, context=self.name)
+            if errors.terminal: return
+
+        # Handle certain items being ignoring/filtering depending on their use in arguments
+        ignored, items = scope.extract_ignored()
+        state.next_items.extend(ignored)
+
+        await self.executor(items, args, context, scope, state, errors)
+
+    # ======== Executors, one of which is bound to `self.executor` at parse time depending on `self.type`
+
+    async def _execute_nop(self, items: list[str], args, context: Context, scope: ItemScope, state: SegmentState, errors: ErrorLog):
+        ## NO OPERATION
+        state.next_items.extend(items)
+
+    async def _execute_print(self, items: list[str], args, context: Context, scope: ItemScope, state: SegmentState, errors: ErrorLog):
+        ## HARDCODED 'PRINT' SPOUT (TODO: GET RID OF THIS)
+        state.next_items.extend(items)
+        state.printed_items.extend(items)
+        NATIVE_SPOUTS['print'].hook(state.spout_state, groupmodes.as_list(items))
+
+    async def _execute_native_pipe(self, items: list[str], args, context: Context, scope: ItemScope, state: SegmentState, errors: ErrorLog):
+        pipe: Pipe = self.pipe
+        if not pipe.may_use(context.origin.activator):
+            errors.log(f'User lacks permission to use Pipe `{self.name}`.', True)
+            return
+        if context.governor:
+            context.governor.count_pipe_call()
+        try:
+            # Pipes are written to receive actual lists, so this is where the items of a group are finally copied
+            state.next_items.extend(await pipe.apply(groupmodes.as_list(items), context, args))
+        except Exception as e:
+            errors.log_exception(f'Failed to process Pipe `{self.name}` with args {args}', e)
+
+    async def _execute_native_spout(self, items: list[str], args, context: Context, scope: ItemScope, state: SegmentState, errors: ErrorLog):
+        spout: Spout = self.pipe
+        # Hook the spout into the SpoutState
+        spout.hook(state.spout_state, groupmodes.as_list(items), **args)
+        # As a rule, spouts do not affect the values
+        state.next_items.extend(items)
+
+    async def _execute_native_source(self, items: list[str], args, context: Context, scope: ItemScope, state: SegmentState, errors: ErrorLog):
+        source: Source = self.pipe
+        # Sources don't accept input values: Discard them but warn about it if nontrivial input is being discarded.
+        # This is just a style warning, if it turns out this is annoying then it should be removed.
+        # NOTE: This turned out to be annoying
+        # if items and not (len(items) == 1 and not items[0]):
+        #     errors.log(f'Source-as-pipe `{name}` received nonempty input; either use all items as arguments or explicitly `remove` unneeded items.')
+        if context.governor:
+            context.governor.count_source_call()
+        try:
+            state.next_items.extend(await source.generate(context, args))
+        except Exception as e:
+            errors.log_exception(f'Failed to process Source-as-Pipe `{self.name}` with args {args}', e)
+
+    def link_macro(self, macro: 'Macro'):
+        '''
+        Statically link this pipe to the given Macro's compiled Pipeline, so the Macro need not be looked up by name when applied.
+        If the arguments are predetermined, the Macro's signature is applied to them ahead of time as well,
+            which may allow the Macro's segments to be spliced into the caller entirely, see `Pipeline.splice_macros`.
+        The link is dropped as soon as the Macro's revision changes.
+        Only to be called on a ParsedPipe that is not shared through the parse caches, see `copy`.
+        '''
+        macro_pl = macro.get_pipeline()
+        signature_args = None
+        if self.arguments is not None and self.arguments.predetermined:
+            try:
+                signature_args = macro.apply_signature(self.arguments.predetermined_args)
+            except ArgumentError:
+                # The error will be reported when the pipe is applied
+                pass
+        self.linked_macro = (macro, macro.revision, macro_pl, signature_args)
+
+    async def _execute_macro_pipe(self, items: list[str], args, context: Context, scope: ItemScope, state: SegmentState, errors: ErrorLog):
+        ## Linked case: Use the statically linked Macro, as long as it hasn't been edited (or deleted) since
+        if self.linked_macro is not None:
+            macro, revision, macro_pl, signature_args = self.linked_macro
+            if macro.revision != revision:
+                self.linked_macro = None
+        if self.linked_macro is not None:
+            try:
+                # Get the set of arguments and put them in Context
+                args = signature_args if signature_args is not None else macro.apply_signature(args)
+                macro_ctx = context.into_macro(macro, args)
+            except ArgumentError as e:
+                errors.log(e, True, context=self.name)
+                return
+
+        ## Dynamic case: Macros may be deleted after parsing, in which case we have to look again
+        else:
+            if self.name not in MACRO_PIPES:
+                return await self._execute_unresolved(items, args, context, scope, state, errors)
+            macro = MACRO_PIPES[self.name]
+            try:
+                # Get the set of arguments and put them in Context
+                args = macro.apply_signature(args)
+                macro_ctx = context.into_macro(macro, args)
+            except ArgumentError as e:
+                errors.log(e, True, context=self.name)
+                return
+            macro_pl = macro.get_pipeline()
+
+        newvals, macro_errors, macro_spout_state = await macro_pl.apply_as_macro(items, macro_ctx)
+        errors.extend(macro_errors, self.name)
+        if errors.terminal: return
+
+        state.next_items.extend(newvals)
+        # group_mode.is_singular is a special case where we can safely extend print values, otherwise they're discarded here
+        state.spout_state.extend(macro_spout_state, extend_print=state.extend_print)
+
+    async def _execute_macro_source(self, items: list[str], args, context: Context, scope: ItemScope, state: SegmentState, errors: ErrorLog):
+        # Macros may be deleted after parsing, in which case we have to look again
+        if self.name not in MACRO_SOURCES:
+            return await self._execute_unresolved(items, args, context, scope, state, errors)
+
+        # Source Macro functioning is implemented in TmplSource, we hold on to a single instance of it
+        if self.macro_source is None:
+            self.macro_source = TmplSource(self.name, None)
+        new_vals, src_errs = await self.macro_source.evaluate(context, scope, args)
+        errors.extend(src_errs, context='source-as-pipe')
+        if new_vals is None:
+            errors.terminal = True
+        if errors.terminal: return
+        state.next_items.extend(new_vals)
+
+    async def _execute_unresolved(self, items: list[str], args, context: Context, scope: ItemScope, state: SegmentState, errors: ErrorLog):
+        # The name was not known at parse time, but may since have been defined as a Macro
+        if self.name in MACRO_PIPES:
+            return await self._execute_macro_pipe(items, args, context, scope, state, errors)
+        if self.name in MACRO_SOURCES:
+            return await self._execute_macro_source(items, args, context, scope, state, errors)
+        ## UNKNOWN NAME
+        errors.log(f'Unknown pipe `{self.name}`.', True)
+
 
 class ParsedOrigin:
     '''
     Holds an 'origin' for a script (better name pending).
     '''
-    __slots__ = ('origin',)
+    __slots__ = ('origin', 'origins', 'pre_errors', 'position', 'pick_random', 'random_tree', 'random_memo')
 
     origin: str | list['TemplatedString']
-
-    def __init__(self, origin: str | list['TemplatedString']):
+    origins: list['TemplatedString']
+    'The origin, expanded and parsed ahead of time.'
+    pre_errors: ErrorLog
+    position: int | None
+    'The position of the origin in the script it was parsed from, if known.'
+    pick_random: bool
+    'Whether only a single random one of `origins` is evaluated, due to the "[?]" ChoiceTree flag.'
+    random_tree: ChoiceTree | None
+    'In case of a "[?]" ChoiceTree too large to fully expand, the tree to sample from on each evaluation instead.'
+    random_memo: dict[str, 'TemplatedString'] | None
+
+    RANDOM_EXPAND_LIMIT = 256
+    RANDOM_MEMO_SIZE = 64
+
+    def __init__(self, origin: str | list['TemplatedString'], position: int=None):
         # NOTE: Origin may be a single str or a list of TemplatedStrings.
         # We keep the str case because the "[?]" ChoiceTree flag has special behaviour
         #   that we can't/don't want to emulate (yet?) by expanding it to a list of TemplatedStrings.
         self.origin = origin
+        self.position = position
+        self.pick_random = False
+        self.random_tree = None
+        self.random_memo = None
+        if isinstance(origin, str):
+            self.origins, self.pre_errors = self.process_str_origin()
+        else:
+            self.origins = origin
+            self.pre_errors = ErrorLog()
+            for ts in origin:
+                self.pre_errors.extend(ts.pre_errors)
 
-    def process_str_origin(self) -> tuple[list['TemplatedString'] | None, ErrorLog]:
+    def process_str_origin(self) -> tuple[list['TemplatedString'], ErrorLog]:
         '''
-        Expands the str-type origin and parses each one as a TemplatedString.
+        Expands the str-type origin and parses each one as a TemplatedString, only called once at construction.
         '''
         origins = []
         expand = True
@@ -128,17 +384,30 @@ class ParsedOrigin:
         ## ChoiceTree expand
         if expand:
             try:
-                expanded = ChoiceTree(origin_str, parse_flags=True)
+                tree = parse_choice_tree(origin_str, parse_flags=True)
             except ParseBaseException as e:
                 errors.log_parse_exception(e)
                 return origins, errors
+            if tree.flag_random:
+                # NOTE: Sampling uniformly from the full expansion is equivalent to ChoiceTree.random()
+                self.pick_random = True
+                if len(tree.root) > self.RANDOM_EXPAND_LIMIT:
+                    # Too many options to parse them all ahead of time, sample and parse them as needed instead
+                    self.random_tree = tree
+                    self.random_memo = {}
+                    return origins, errors
+            expanded = tree.root
         else:
             expanded = [origin_str]
 
         ## Parse each string as a TemplatedString, collecting errors along the way
+        parsed: dict[str, TemplatedString] = {}
         for origin_str in expanded:
+            if origin_str in parsed:
+                origins.append(parsed[origin_str])
+                continue
             try:
-                origin = TemplatedString.from_string(origin_str)
+                origin = parsed[origin_str] = TemplatedString.from_string(origin_str)
                 origins.append(origin)
                 errors.extend(origin.pre_errors)
             except ParseBaseException as e:
@@ -146,20 +415,32 @@ class ParsedOrigin:
 
         return origins, errors
 
+    def sample_random_tree(self, errors: ErrorLog) -> 'TemplatedString | None':
+        '''Sample a single origin from the "[?]" ChoiceTree, parsing it if it hasn't been recently.'''
+        origin_str = self.random_tree.random()
+        if origin_str in self.random_memo:
+            return self.random_memo[origin_str]
+        try:
+            origin = TemplatedString.from_string(origin_str)
+        except ParseBaseException as e:
+            errors.log_parse_exception(e)
+            return None
+        if len(self.random_memo) >= self.RANDOM_MEMO_SIZE:
+            del self.random_memo[next(iter(self.random_memo))]
+        self.random_memo[origin_str] = origin
+        return origin
+
     # ======================================= Representation =======================================
 
+    def is_constant(self) -> bool:
+        '''Whether the origin always evaluates to the exact same items.'''
+        return not self.pick_random and not self.pre_errors and all(ts.is_string for ts in self.origins)
+
     def get_static_errors(self) -> ErrorLog:
         '''
         Collects errors that can be known before execution time.
         '''
-        if isinstance(self.origin, str):
-            _, origin_errors = self.process_str_origin()
-            return origin_errors
-        else:
-            errors = ErrorLog()
-            for ts in self.origin:
-                errors.extend(ts.pre_errors)
-            return errors
+        return self.pre_errors
 
     def __repr__(self):
         return 'ParsedOrigin(%s)' % repr(self.origin)
@@ -172,16 +453,220 @@ class ParsedOrigin:
         '''
         Evaluates the origin.
         '''
-        if isinstance(self.origin, str):
-            origins, errors = self.process_str_origin()
+        if not isinstance(self.origin, str):
+            return await TemplatedString.map_evaluate(self.origins, context, scope)
+
+        errors = ErrorLog().extend(self.pre_errors)
+        if errors.terminal: return (None, errors)
+        origins = self.origins
+        if self.random_tree is not None:
+            origin = self.sample_random_tree(errors)
+            if origin is None: return (None, errors)
+            errors.extend(origin.pre_errors)
             if errors.terminal: return (None, errors)
-            values, map_errors = await TemplatedString.map_evaluate(origins, context, scope)
-            return values, errors.extend(map_errors)
-        else:
-            return await TemplatedString.map_evaluate(self.origin, context, scope)
+            origins = [origin]
+        elif self.pick_random:
+            origins = [random.choice(origins)] if origins else []
+        values, map_errors = await TemplatedString.map_evaluate(origins, context, scope)
+        return values, errors.extend(map_errors)
+
+    async def apply_as_step(self, items: list[str], context: 'Context', item_scope: 'ItemScope', spout_state: SpoutState, errors: ErrorLog) -> list[str] | None:
+        '''Plan step that replaces the current items with the values of this origin.'''
+        item_scope.set_items(items)
+        values, origin_errors = await self.evaluate(context, item_scope)
+        errors.extend(origin_errors, 'origin')
+        return values
 
 
 PipeSegment: TypeAlias = tuple['groupmodes.GroupMode', list[Union[ParsedPipe, 'Pipeline']]]
+PlanStep: TypeAlias = Callable[[list[str], Context, ItemScope, SpoutState, ErrorLog], Awaitable[list[str] | None]]
+
+
+class StreamedRun:
+    '''
+    In streaming mode, a run of consecutive segments that each apply a single item-wise Pipe to all items,
+    which is applied as a single plan step that streams items one by one through each Pipe in turn.
+    This includes Pipes that filter items (e.g. `remove`), which are item-wise Pipes that produce zero or one items per item.
+    If the run is followed by a segment that only keeps the first N items, no more than N items are ever produced,
+        and if the Pipes produce more than MAXCHARS characters the run stops as soon as they do.
+
+    NOTE: The items are streamed through synchronous generators rather than async iterators, since item-wise Pipes
+        (cf. @one_to_one and @one_to_many) are always synchronous, so there would never be anything to await.
+    NOTE: The Pipes' item functions are applied directly rather than through `Pipe.apply`, so they bypass APPLY_CACHE,
+        whose entries are keyed by whole lists of items and would never match a partially consumed stream.
+    '''
+    __slots__ = ('parsed_pipes', 'limit')
+
+    parsed_pipes: list[ParsedPipe]
+    limit: int | None
+
+    def __init__(self, parsed_pipes: list[ParsedPipe], limit: int=None):
+        self.parsed_pipes = parsed_pipes
+        self.limit = limit
+
+    @staticmethod
+    def from_segments(segments: list['ParsedOrigin | PipeSegment'], start: int) -> 'StreamedRun | None':
+        '''Collects the longest streamable run of segments starting at the given index, if it is worth streaming.'''
+        parsed_pipes = []
+        limit = None
+        for segment in segments[start:]:
+            parsed_pipe = StreamedRun.get_streamable_pipe(segment)
+            if parsed_pipe is None:
+                limit = StreamedRun.get_head_limit(segment)
+                break
+            parsed_pipes.append(parsed_pipe)
+        if not parsed_pipes or (len(parsed_pipes) == 1 and limit is None):
+            return None
+        return StreamedRun(parsed_pipes, limit)
+
+    @staticmethod
+    def get_streamable_pipe(segment: 'ParsedOrigin | PipeSegment') -> ParsedPipe | None:
+        '''If the segment simply applies a single item-wise native Pipe with fixed arguments to all items, return that pipe.'''
+        if isinstance(segment, ParsedOrigin):
+            return None
+        group_mode, parsed_pipes = segment
+        if not group_mode.is_singular() or group_mode.mid_modes or group_mode.pre_errors:
+            return None
+        if not isinstance(group_mode.assign_mode, groupmodes.DefaultAssign):
+            return None
+        if len(parsed_pipes) != 1 or not isinstance(parsed_pipes[0], ParsedPipe):
+            return None
+        parsed_pipe: ParsedPipe = parsed_pipes[0]
+        if parsed_pipe.type != ParsedPipe.NATIVE_PIPE or parsed_pipe.errors.terminal:
+            return None
+        if parsed_pipe.arguments is None or not parsed_pipe.arguments.predetermined:
+            return None
+        pipe: Pipe = parsed_pipe.pipe
+        if pipe.item_function is None or pipe.is_smart or pipe.is_coroutine:
+            return None
+        return parsed_pipe
+
+    @staticmethod
+    def get_head_limit(segment: 'ParsedOrigin | PipeSegment') -> int | None:
+        '''
+        If the segment throws away all items past some fixed index, return that index.
+        That is the case if its first split mode is a strict interval from the start (e.g. `#0:5!` or `#2!`),
+            regardless of how the remaining items are split, filtered or assigned after that.
+        '''
+        if isinstance(segment, ParsedOrigin):
+            return None
+        group_mode, parsed_pipes = segment
+        if not group_mode.split_modes or group_mode.pre_errors:
+            return None
+        # The segment's arguments and conditions might refer to the full list of items, which we will have cut short
+        for parsed_pipe in parsed_pipes:
+            if not isinstance(parsed_pipe, ParsedPipe):
+                return None
+            if parsed_pipe.arguments is not None and not parsed_pipe.arguments.predetermined:
+                return None
+        if group_mode.get_conditions():
+            return None
+        interval = group_mode.split_modes[0]
+        if not isinstance(interval, groupmodes.Interval) or interval.strictness != 1:
+            return None
+        start, end = interval.start, interval.end
+        if start is groupmodes.Interval.END or start < 0:
+            return None
+        if end is None:
+            return start + 1
+        if end is groupmodes.Interval.END or end < 0:
+            return None
+        return max(start, end)
+
+    async def apply_as_step(self, items: list[str], context: 'Context', item_scope: 'ItemScope', spout_state: SpoutState, errors: ErrorLog) -> list[str] | None:
+        '''Plan step that streams the items through each pipe in the run.'''
+        if not self.check_pipes(context, errors): return
+
+        check_chars = not permissions.has(context.origin.activator.id, permissions.owner)
+        stream = iter(items)
+        for parsed_pipe in self.parsed_pipes:
+            stream = self.stream_pipe(parsed_pipe, stream, errors, check_chars)
+        if self.limit is not None:
+            stream = itertools.islice(stream, self.limit)
+
+        items = list(stream)
+        if errors.terminal: return
+        if context.governor:
+            context.governor.count_items(len(items), sum(len(i) for i in items))
+        return items
+
+    def check_pipes(self, context: 'Context', errors: ErrorLog) -> bool:
+        '''Log the pipes' static errors, check permissions and count the invocations, returns whether it's okay to proceed.'''
+        for parsed_pipe in self.parsed_pipes:
+            errors.extend(parsed_pipe.errors, parsed_pipe.name)
+            if not parsed_pipe.pipe.may_use(context.origin.activator):
+                errors.log(f'User lacks permission to use Pipe `{parsed_pipe.name}`.', True)
+        if errors.terminal: return False
+        if context.governor:
+            for _ in self.parsed_pipes:
+                context.governor.count_pipe_call()
+        return True
+
+    @staticmethod
+    def stream_pipe(parsed_pipe: ParsedPipe, stream: Iterator[str], errors: ErrorLog, check_chars: bool) -> Iterator[str]:
+        '''Lazily applies a single item-wise pipe to a stream of items, keeping count of characters to check against MAXCHARS.'''
+        pipe: Pipe = parsed_pipe.pipe
+        args = parsed_pipe.arguments.predetermined_args
+        chars = 0
+        for item in stream:
+            try:
+                values = pipe.item_function(item, **args)
+            except Exception as e:
+                errors.log_exception(f'Failed to process Pipe `{parsed_pipe.name}` with args {args}', e)
+                return
+            if not pipe.item_flattens:
+                values = (values,)
+            for value in values:
+                chars += len(value)
+                if check_chars and chars > Pipeline.MAXCHARS:
+                    raise PipelineError(f'Attempted to process a flow of over {chars} total characters at once, try staying under {Pipeline.MAXCHARS}.')
+                yield value
+
+
+class FusedRun(StreamedRun):
+    '''
+    A run of consecutive segments that each apply a single one-to-one Pipe with fixed arguments to all items,
+    which is applied as a single plan step that applies each of the Pipes to the full list of items in turn.
+
+    This skips the per-segment work of splitting the items into groups, determining arguments and tracking each group's state,
+        but otherwise behaves exactly like applying the segments one by one: Each Pipe is applied through `Pipe.apply` (using APPLY_CACHE),
+        and permissions, errors, MAXCHARS and the execution budget are checked and counted at the same points, in the same order.
+    '''
+    __slots__ = ()
+
+    @staticmethod
+    def from_segments(segments: list['ParsedOrigin | PipeSegment'], start: int) -> 'FusedRun | None':
+        '''Collects the longest fusable run of segments starting at the given index, if it contains at least two pipes.'''
+        parsed_pipes = []
+        for segment in segments[start:]:
+            parsed_pipe = StreamedRun.get_streamable_pipe(segment)
+            if parsed_pipe is None or parsed_pipe.pipe.item_flattens:
+                break
+            parsed_pipes.append(parsed_pipe)
+        if len(parsed_pipes) < 2:
+            return None
+        return FusedRun(parsed_pipes)
+
+    async def apply_as_step(self, items: list[str], context: 'Context', item_scope: 'ItemScope', spout_state: SpoutState, errors: ErrorLog) -> list[str] | None:
+        '''Plan step that applies each pipe in the run to the items in turn.'''
+        for i, parsed_pipe in enumerate(self.parsed_pipes):
+            # Mirrors Pipeline._apply_iteration, _apply_segment, ParsedPipe.execute and ParsedPipe._execute_native_pipe
+            if i: context.check_deadline()
+            errors.extend(parsed_pipe.errors, parsed_pipe.name)
+            pipe: Pipe = parsed_pipe.pipe
+            if not pipe.may_use(context.origin.activator):
+                errors.log(f'User lacks permission to use Pipe `{parsed_pipe.name}`.', True)
+                return
+            if context.governor:
+                context.governor.count_pipe_call()
+            args = parsed_pipe.arguments.predetermined_args
+            try:
+                items = await pipe.apply(items, context, args)
+            except Exception as e:
+                errors.log_exception(f'Failed to process Pipe `{parsed_pipe.name}` with args {args}', e)
+                return
+            Pipeline.check_items(items, context)
+        return items
 
 
 class Pipeline:
@@ -197,6 +682,14 @@ class Pipeline:
     parser_errors: ErrorLog
     iterations: int
 
+    _plan: list[PlanStep] | None = None
+    _static_errors: ErrorLog | None = None
+    _unfolded_segments: list[ParsedOrigin | PipeSegment] | None = None
+    _fold_pending: bool = True
+    'Whether constant folding is yet to be attempted, see `fold_constants`.'
+
+    MAXCHARS = 10000
+
     def __init__(self, segments: list[ParsedOrigin | PipeSegment], *, parser_errors: ErrorLog=None, iterations: int=1):
         self.segments = segments
         self.parser_errors = parser_errors if parser_errors is not None else ErrorLog()
@@ -204,20 +697,19 @@ class Pipeline:
         if self.iterations < 0:
             self.parser_errors.log('Negative iteration counts are not allowed.', True)
 
-    @lru_cache(100)
     @staticmethod
+    @parse_cached('pipeline', 1_000_000)
     def from_string(string: str, *, iterations: str=None, start_with_origin=False):
         errors = ErrorLog()
 
         segments: list[ParsedOrigin | PipeSegment] = []
-        segment_strs = Pipeline.split_into_segments(string, start_with_origin=start_with_origin)
-        for segment_str in segment_strs:
-            if isinstance(segment_str, ParsedOrigin):
-                segments.append(segment_str)
+        for token in split_segments(string, start_with_origin=start_with_origin):
+            if token.is_origin:
+                segments.append(ParsedOrigin(token.text, position=token.position))
                 continue
             try:
                 ## Parse groupmode
-                groupmode, segment_str = groupmodes.GroupMode.from_string_with_remainder(segment_str)
+                groupmode, segment_str = groupmodes.GroupMode.from_string_with_remainder(token.text)
             except ParseBaseException as e:
                 errors.log_parse_exception(e)
                 continue
@@ -226,7 +718,7 @@ class Pipeline:
                 continue
             try:
                 ## Parse (parallel) pipe(lines)
-                parallel = Pipeline.parse_segment(segment_str)
+                parallel = Pipeline.parse_segment(segment_str, token.position + len(token.text) - len(segment_str))
             except ParseBaseException as e:
                 errors.log_parse_exception(e)
                 continue
@@ -283,141 +775,161 @@ class Pipeline:
 
         return Pipeline(parsed_segments)
 
-    # =========================================== Parsing ==========================================
+    # ====================================== Constant folding ======================================
 
-    @classmethod
-    def split_into_segments(cls, string: str, start_with_origin=False) -> list[str | ParsedOrigin]:
+    def copy(self) -> 'Pipeline':
         '''
-        Split the pipeline into top-level segments (segment > segment > segment >> segment > segment)
+        Copy this Pipeline along with all of its ParsedPipes (see `ParsedPipe.copy`), sharing all other parsed parts.
+        Used to link a Pipeline's pipes to Macros without modifying one which may be shared through the parse caches.
         '''
-        OPEN_PAREN, CLOSE_PAREN = '()'
-        OPEN_BRACE, CLOSE_BRACE = '{}'
-        OPEN_BRACK, CLOSE_BRACK = '[]'
-        TRIPLE_QUOTES = ('"""', "'''")
-        SINGLE_QUOTES = ('"', "'")
-        ALL_QUOTES = TRIPLE_QUOTES + SINGLE_QUOTES
-
+        pipeline = object.__new__(Pipeline)
+        pipeline.__dict__.update(self.__dict__)
+        pipeline._plan = None
+        pipeline.segments = [
+            segment if isinstance(segment, ParsedOrigin) else (segment[0], [parsed_pipe.copy() for parsed_pipe in segment[1]])
+            for segment in self.segments
+        ]
+        return pipeline
+
+    FOLD_MAX_ITEMS = 1000
+
+    def fold_constants(self, context: 'Context'):
+        '''
+        Folds each constant origin, together with any directly following segments that apply a pure Pipe to all items,
+            into a single constant origin, so the results don't have to be recomputed each time the Pipeline is applied.
+        The segments as they were before folding are remembered for pickling, so that folded results are never persisted.
+
+        This is only done once, on the Pipeline's first Governed application rather than when it is parsed,
+            since a pure Pipe may still do an unbounded amount of work (e.g. `repeat times=1000000000`),
+            which the Governor can then hold to the execution's budget. The folded Pipes are counted as they would be if applied,
+            so the first application uses exactly the same budget whether or not it folded anything.
+        '''
+        self._fold_pending = False
+        if self.parser_errors.terminal: return
+        governor = context.governor
+        unfolded_segments = self.segments
         segments = []
-
-        stack = []
-        start = 0
+        folded_any = False
         i = 0
-        in_origin_str = start_with_origin
-
-        def append_segment(s: str):
-            s = s.strip()
-            segments.append(s if not in_origin_str else ParsedOrigin(s))
-
-        def find_next_segment_start():
-            '''Skips any leading whitespace at the start of a segment.'''
-            nonlocal i, start
-            ls = len(string)
-            while i < ls and string[i].isspace():
+        try:
+            while i < len(self.segments):
+                segment = self.segments[i]
                 i += 1
-            start = i
-
-        find_next_segment_start()
-
-        while i < len(string):
-            c = string[i]
-            escaped = i > 0 and string[i-1] == '~'
-            stack_top = stack[-1] if stack else None
-
-            if not in_origin_str:
-                ## Parentheses: Only top-level or within other parentheses, unescapable
-                if c == OPEN_PAREN and (not stack or stack_top == OPEN_PAREN):
-                    stack.append(c)
-                    i += 1; continue
-                if c == CLOSE_PAREN and stack_top == OPEN_PAREN:
-                    stack.pop()
-                    i += 1; continue
-
-            if not escaped:
-                ## Braces
-                if c == OPEN_BRACE:
-                    stack.append(c)
-                    i += 1; continue
-                if c == CLOSE_BRACE and stack_top == OPEN_BRACE:
-                    stack.pop()
-                    i += 1; continue
-
-                ## Brackets: Not openable if anywhere inside triple quotes
-                # I'm actually not sure what merit there is to taking consideration of
-                # square brackets in this parse anyway. I guess I thought it couldn't hurt.
-                if c == OPEN_BRACK and not any(s in TRIPLE_QUOTES for s in stack):
-                    stack.append(c)
-                    i += 1; continue
-                if c == CLOSE_BRACK and stack_top == OPEN_BRACK:
-                    stack.pop()
-                    i += 1; continue
-
-                if in_origin_str:
-                    may_open_quotes = (i == start)
-                else:
-                    may_open_quotes = True
-                    # May only open quotes if we're not already inside a quoted string
-                    #   (with optionally some brackets inside the quoted string)
-                    for s in stack[::-1]:
-                        if s == OPEN_BRACK: continue
-                        if s in ALL_QUOTES:
-                            may_open_quotes = False
-                        break
+                if not isinstance(segment, ParsedOrigin) or not segment.is_constant():
+                    segments.append(segment)
+                    continue
 
-                # Triple quotes
-                if (ccc := string[i:i+3]) in TRIPLE_QUOTES:
-                    if may_open_quotes:
-                        stack.append(ccc)
-                        i += 3; continue
-                    if stack and stack[-1] == ccc:
-                        stack.pop()
-                        i += 3; continue
-
-                # Single quotes
-                if c in SINGLE_QUOTES:
-                    if may_open_quotes:
-                        stack.append(c)
-                        i += 1; continue
-                    if stack and stack[-1] == c:
-                        stack.pop()
-                        i += 1; continue
-
-            ## Un-nested >, ending the segment
-            if not stack and c == '>':
-                if (i > 0 and string[i-1] == '=') or (i > 1 and string[i-2:i] == '=>'):
-                    # Special case: '>' is probably part of
-                    #   '=>' Pipeline-as-argument or
-                    #   '=>>' Script-as-argument assignment; don't end the segment
+                items = [ts.string for ts in segment.origins]
+                folded = False
+                while i < len(self.segments) and (parsed_pipe := Pipeline.get_foldable_pipe(self.segments[i])):
+                    governor.check()
+                    try:
+                        new_items = parsed_pipe.pipe.pipe_function(list(items), **parsed_pipe.arguments.predetermined_args)
+                    except Exception:
+                        # Leave it to cause an error at execution time
+                        break
+                    if not isinstance(new_items, list) or len(new_items) > Pipeline.FOLD_MAX_ITEMS:
+                        break
+                    if not all(isinstance(item, str) for item in new_items):
+                        break
+                    chars = sum(len(item) for item in new_items)
+                    if chars > Pipeline.MAXCHARS:
+                        break
+                    governor.count_pipe_call()
+                    governor.count_items(len(new_items), chars)
+                    items = new_items
+                    folded = True
                     i += 1
-                    continue
 
-                elif i > 0 and string[i-1] == '-':
-                    # Special case: '->' is shorthand for '> print >'
-                    append_segment(string[start:i-1])
-                    in_origin_str = False
-                    append_segment('print')
-                else:
-                    append_segment(string[start:i])
+                if folded:
+                    segment = ParsedOrigin([TemplatedString([item]) for item in items], position=segment.position)
+                    folded_any = True
+                segments.append(segment)
+        except BaseException:
+            # The execution exceeded its budget, try again next time
+            self._fold_pending = True
+            raise
 
-                if string[i:i+2] == '>>':
-                    # Start a new OriginString segment
-                    in_origin_str = True
-                    i += 2
-                else:
-                    # Start a new pipe segment
-                    in_origin_str = False
-                    i += 1
+        if folded_any:
+            self._unfolded_segments = unfolded_segments
+            self.segments = segments
+            self._plan = None
 
-                find_next_segment_start()
-                continue
+    @staticmethod
+    def get_foldable_pipe(segment: ParsedOrigin | PipeSegment) -> ParsedPipe | None:
+        '''If the segment simply applies a single pure, synchronous native Pipe with fixed arguments to all items, return that pipe.'''
+        if isinstance(segment, ParsedOrigin):
+            return None
+        group_mode, parsed_pipes = segment
+        if not group_mode.is_singular() or group_mode.mid_modes or group_mode.pre_errors:
+            return None
+        if not isinstance(group_mode.assign_mode, groupmodes.DefaultAssign):
+            return None
+        if len(parsed_pipes) != 1 or not isinstance(parsed_pipes[0], ParsedPipe):
+            return None
+        parsed_pipe: ParsedPipe = parsed_pipes[0]
+        if parsed_pipe.type != ParsedPipe.NATIVE_PIPE or parsed_pipe.errors:
+            return None
+        if parsed_pipe.arguments is None or not parsed_pipe.arguments.predetermined:
+            return None
+        pipe: Pipe = parsed_pipe.pipe
+        if pipe.is_smart or pipe.is_coroutine or not pipe.is_pure(parsed_pipe.arguments.predetermined_args):
+            return None
+        # Pipes with restricted usage have to be checked at execution time
+        if 'may_use' in vars(pipe):
+            return None
+        return parsed_pipe
 
-            ## Nothing special
-            i += 1
+    # ======================================= Macro inlining =======================================
 
-        ## Add the final segment, regardless of unclosed delimiters on the stack
-        if final_segment := string[start:]:
-            append_segment(final_segment)
+    def splice_macros(self):
+        '''
+        Replaces each segment that simply applies a statically linked Macro to all items (see `get_spliceable_macro`)
+            by the segments of that Macro's Pipeline, so that applying them no longer involves a Macro call at all.
+        Only to be called on a Pipeline that is not shared through the parse caches, see `copy`.
+        '''
+        segments = []
+        for segment in self.segments:
+            if not isinstance(segment, ParsedOrigin):
+                for parsed_pipe in segment[1]:
+                    if isinstance(parsed_pipe, Pipeline):
+                        parsed_pipe.splice_macros()
+            if macro_pl := Pipeline.get_spliceable_macro(segment):
+                segments.extend(macro_pl.segments)
+            else:
+                segments.append(segment)
+        self.segments = segments
+        self._plan = None
+        self._static_errors = None
 
-        return segments
+    @staticmethod
+    def get_spliceable_macro(segment: ParsedOrigin | PipeSegment) -> Union['Pipeline', None]:
+        '''
+        If the segment simply applies a single linked Macro with predetermined arguments to all items,
+            and that Macro's Pipeline does not depend on the Context it is called in, return that Pipeline.
+        That is the case if it evaluates no Sources (which includes the Macro's own arguments), calls no (unspliced) Macros and uses no smart Pipes.
+        '''
+        if isinstance(segment, ParsedOrigin):
+            return None
+        group_mode, parsed_pipes = segment
+        if not group_mode.is_singular() or group_mode.mid_modes or group_mode.pre_errors:
+            return None
+        if not isinstance(group_mode.assign_mode, groupmodes.DefaultAssign):
+            return None
+        if len(parsed_pipes) != 1 or not isinstance(parsed_pipes[0], ParsedPipe):
+            return None
+        parsed_pipe: ParsedPipe = parsed_pipes[0]
+        if parsed_pipe.linked_macro is None or parsed_pipe.errors:
+            return None
+        _, _, macro_pl, signature_args = parsed_pipe.linked_macro
+        # Otherwise the arguments still have to be checked against the Macro's signature each call
+        if signature_args is None:
+            return None
+        if macro_pl.iterations != 1 or macro_pl.get_static_errors() or macro_pl.may_have_side_effects():
+            return None
+        return macro_pl
+
+    # =========================================== Parsing ==========================================
 
     # Matches the first (, until either the last ) or if there are no ), the end of the string
     # Use of this regex relies on the knowledge/assumption that the nested parentheses in the string are matched
@@ -425,102 +937,13 @@ class Pipeline:
     #                                        ^^         ^^^^^     ^^
 
     @classmethod
-    def steal_parentheses(cls, segment):
-        '''Steals all (intelligently-parsed) parentheses-wrapped parts from a string and puts them in a list so we can put them back later.'''
-        ## Prepare the segment for Magic
-        # Pretty sure the magic markers don't need to be different from the triple quote ones, but it can't hurt so why not haha
-        segment = segment.replace('µ', '?µ?')
-
-        # Parsing loop similar to the one in split_into_segments.
-        # NOTE: So why not combine the two into one? Well, I tried, but BETWEEN splitting into segments and stealing parentheses
-        # we have to consume the group mode from each segment! Which is hard to squeeze in here! Especially since one group mode also uses parentheses!!!
-        stolen = []
-        bereft = []
-
-        quotes = False
-        parens = 0
-        start = 0
-
-        for i in range(len(segment)):
-            c = segment[i]
-
-            ## If we're in quotes: ONLY look for closing quotes.
-            if quotes:
-                ## Open quotes
-                if c == '"': quotes = False
-            ## Close quotes
-            elif c == '"': quotes = True
-
-            ## Open parentheses
-            elif c == '(':
-                parens += 1
-                ## This '(' opens a top level parenthesis: Start stealing it.
-                if parens == 1:
-                    ## Leave behind a Magic Marker in its place, and remember where it started
-                    bereft += (segment[start:i], 'µ',  str(len(stolen)), 'µ')
-                    start = i
-
-            ## Close parentheses
-            elif c == ')':
-                if parens > 0:
-                    parens -= 1
-                    ## This ')' closes a top-level parenthesis: Complete stealing it.
-                    if parens == 0:
-                        ## Add the portion to our spoils, and continue from there.
-                        stolen.append( segment[start:i+1] )
-                        start = i+1
-
-        ## Parentheses weren't closed before the segment (and thus also the script) ended: Pretend they were closed.
-        if parens > 0: stolen.append(segment[start:])
-        ## Parentheses were closed: Just add the last bit of text and we're done.
-        else: bereft.append( segment[start:] )
-
-        return ''.join(bereft), stolen
-
-    rp_regex = re.compile(r'µ(\d+)µ')
-    rq_regex = re.compile(r'§(\d+)§')
-
-    @classmethod
-    def restore_parentheses(cls, bereft, stolen):
-        bereft = cls.rp_regex.sub(lambda m: stolen[int(m[1])], bereft)
-        return bereft.replace('?µ?', 'µ')
-
-    @classmethod
-    def steal_triple_quotes(cls, segment):
-        '''Steals all triple quoted parts from a string and puts them in a list so we can put them back later.'''
-        stolen = []
-        def steal(match):
-            stolen.append(match[0])
-            return '§' + str(len(stolen)-1) + '§'
-        segment = segment.replace('§', '!§!')
-        segment = re.sub(r'(?s)""".*?"""', steal, segment) # (?s) means "dot matches all"
-        return segment, stolen
-
-    @classmethod
-    def restore_triple_quotes(cls, bereft, stolen):
-        bereft = cls.rq_regex.sub(lambda m: stolen[int(m[1])], bereft)
-        return bereft.replace('!§!', '§')
-
-    @classmethod
-    def parse_segment(cls, segment: str) -> list[Union[ParsedPipe, 'Pipeline']]:
+    def parse_segment(cls, segment: str, position: int=0) -> list[Union[ParsedPipe, 'Pipeline']]:
         '''Turn a single string describing one or more parallel pipes into a list of ParsedPipes or Pipelines.'''
-        #### True and utter hack: Steal triple-quoted strings and parentheses wrapped strings out of the segment string.
-        # This way these types of substrings are not affected by ChoiceTree expansion, because we only put them back afterwards.
-        # For triple quotes: This allows us to pass string arguments containing [|] without having to escape them, which is nice to have.
-        # For parentheses: This allows us to use parallel segments inside of inline pipelines, giving them a lot more power and utility.
-        segment, stolen_parens = cls.steal_parentheses(segment)
-        segment, stolen_quotes = cls.steal_triple_quotes(segment)
-
-        ### Parse the simultaneous pipes into a usable form: A list[Union[Pipeline, ParsedPipe]]
         parsed_pipes: list[ParsedPipe | Pipeline] = []
 
-        # ChoiceTree expands the segment into the different parallel pipes
-        for pipestr in ChoiceTree(segment):
-            ## Put the stolen triple-quoted strings and parentheses back.
-            pipestr = cls.restore_triple_quotes(pipestr, stolen_quotes)
-            pipestr = cls.restore_parentheses(pipestr, stolen_parens)
-            pipestr = pipestr.strip()
-
+        # Expands the segment's ChoiceTree syntax into the different parallel pipes,
+        #   leaving triple-quoted strings and parenthesized inline pipelines as they are
+        for pipestr, pipe_position in expand_segment(segment, position):
             ## Inline pipeline: (foo > bar > baz)
             if pipestr and pipestr[0] == '(':
                 # TODO: This shouldn't happen via regex.
@@ -532,7 +955,7 @@ class Pipeline:
 
             ## Normal pipe: foo bar=baz n=10
             else:
-                parsed = ParsedPipe.from_string(pipestr)
+                parsed = ParsedPipe.from_string(pipestr, position=pipe_position)
                 parsed_pipes.append(parsed)
 
         return parsed_pipes
@@ -548,17 +971,35 @@ class Pipeline:
             errors.extend(self.parser_errors)
         for segment in self.segments:
             if isinstance(segment, ParsedOrigin):
-                errors.extend(segment.get_static_errors(), 'origin')
+                errors.extend(segment.get_static_errors(), describe_position('origin', segment.position))
             else:
                 groupmode, pipes = segment
                 errors.extend(groupmode.pre_errors, 'groupmode')
                 for pipe in pipes:
                     if isinstance(pipe, ParsedPipe):
-                        errors.extend(pipe.errors, pipe.name)
+                        errors.extend(pipe.errors, describe_position(pipe.name, pipe.position))
                     else:
                         errors.extend(pipe.get_static_errors(), 'parens')
         return errors
 
+    def get_definition_errors(self) -> ErrorLog:
+        '''
+        Collects static errors, as well as warnings or errors about the Pipeline's estimated cost,
+            for checking Macros and Events when they are defined.
+        '''
+        return ErrorLog().extend(self.get_static_errors()).extend(check_cost(self), 'cost estimate')
+
+    def __getstate__(self):
+        # The execution plan and static errors are not pickled, they are simply computed again when needed
+        state = self.__dict__.copy()
+        state.pop('_plan', None)
+        state.pop('_static_errors', None)
+        # Folded results are not pickled either, since the pipes that produced them may have changed by the time it's unpickled
+        if '_unfolded_segments' in state:
+            state['segments'] = state.pop('_unfolded_segments')
+        state.pop('_fold_pending', None)
+        return state
+
     def __repr__(self):
         return 'Pipeline(%s)' % repr(self.segments)
     def __str__(self):
@@ -585,14 +1026,94 @@ class Pipeline:
 
     # ========================================= Application ========================================
 
-    def check_items(self, values: list[str], context: 'Context'):
+    @staticmethod
+    def check_items(values: list[str], context: 'Context'):
         '''Raises an error if the user is asking too much of the bot.'''
         # TODO: this could stand to be smarter/more oriented to the type of operation you're trying to do, or something, maybe...?
         # meditate on this...
-        MAXCHARS = 10000
+        MAXCHARS = Pipeline.MAXCHARS
         chars = sum(len(i) for i in values)
         if chars > MAXCHARS and not permissions.has(context.origin.activator.id, permissions.owner):
             raise PipelineError(f'Attempted to process a flow of {chars} total characters at once, try staying under {MAXCHARS}.')
+        if context.governor:
+            context.governor.count_items(len(values), chars)
+
+    def get_plan(self) -> list[PlanStep]:
+        '''
+        Lowers the Pipeline's segments into a list of steps, compiled once and reused for each application.
+        Each ParsedPipe has already bound its own executor at parse time, so applying a step only has to dispatch.
+        '''
+        if self._plan is None:
+            plan = []
+            i = 0
+            while i < len(self.segments):
+                segment = self.segments[i]
+                if config.STREAMING and (run := StreamedRun.from_segments(self.segments, i)):
+                    plan.append(run.apply_as_step)
+                    i += len(run.parsed_pipes)
+                    continue
+                if config.FUSE_PIPES and (run := FusedRun.from_segments(self.segments, i)):
+                    plan.append(run.apply_as_step)
+                    i += len(run.parsed_pipes)
+                    continue
+                if isinstance(segment, ParsedOrigin):
+                    plan.append(segment.apply_as_step)
+                else:
+                    group_mode, parsed_pipes = segment
+                    # Groups are only worth processing concurrently if they might actually await something, and are only safe to if they have no side effects
+                    concurrent = (
+                        any(parsed_pipe.may_await() for parsed_pipe in parsed_pipes)
+                        and not any(parsed_pipe.may_have_side_effects() for parsed_pipe in parsed_pipes)
+                    )
+                    plan.append(partial(self._apply_segment, group_mode, parsed_pipes, concurrent))
+                i += 1
+            self._plan = plan
+        return self._plan
+
+    def iter_parsed_pipes(self) -> Iterator[ParsedPipe]:
+        '''Iterate over all ParsedPipes in the Pipeline, including those of inlined Pipelines.'''
+        for segment in self.segments:
+            if isinstance(segment, ParsedOrigin):
+                continue
+            for parsed_pipe in segment[1]:
+                if isinstance(parsed_pipe, ParsedPipe):
+                    yield parsed_pipe
+                else:
+                    yield from parsed_pipe.iter_parsed_pipes()
+
+    def may_have_side_effects(self) -> bool:
+        '''Whether applying this Pipeline might evaluate Sources, either in its origins, its group modes' conditions or its pipes.'''
+        for segment in self.segments:
+            if isinstance(segment, ParsedOrigin):
+                if segment.random_tree is not None or not all(ts.is_sync for ts in segment.origins):
+                    return True
+                continue
+            group_mode, parsed_pipes = segment
+            if any(not condition.is_sync for condition in group_mode.get_conditions()):
+                return True
+            if any(parsed_pipe.may_have_side_effects() for parsed_pipe in parsed_pipes):
+                return True
+        return False
+
+    def may_await(self) -> bool:
+        '''Whether applying this Pipeline might actually suspend, see ParsedPipe.may_await.'''
+        for segment in self.segments:
+            if isinstance(segment, ParsedOrigin):
+                if not all(ts.is_sync for ts in segment.origins):
+                    return True
+                continue
+            group_mode, parsed_pipes = segment
+            if any(not condition.is_sync for condition in group_mode.get_conditions()):
+                return True
+            if any(parsed_pipe.may_await() for parsed_pipe in parsed_pipes):
+                return True
+        return False
+
+    def get_cached_static_errors(self) -> ErrorLog:
+        '''Same as get_static_errors, but only computed once since the Pipeline is immutable past parsing.'''
+        if self._static_errors is None:
+            self._static_errors = self.get_static_errors()
+        return self._static_errors
 
     async def apply(self, items: list[str], context: 'Context', parent_scope: 'ItemScope'=None, exclude_static_errors=False) -> tuple[ list[str], ErrorLog, SpoutState ]:
         '''Apply the pipeline to a list of items the denoted amount of times.'''
@@ -601,8 +1122,10 @@ class Pipeline:
 
         NOTHING_BUT_ERRORS = (None, errors, None)
         if not exclude_static_errors:
-            errors.extend(self.get_static_errors())
+            errors.extend(self.get_cached_static_errors())
             if errors.terminal: return NOTHING_BUT_ERRORS
+        if self._fold_pending and context.governor is not None:
+            self.fold_constants(context)
 
         for step in range(self.iterations):
             step_items, step_errors, step_spout_state = await self._apply_iteration(items, context, parent_scope)
@@ -613,10 +1136,38 @@ class Pipeline:
 
         return items, errors, spout_state
 
+    async def apply_as_macro(self, items: list[str], context: 'Context') -> tuple[ list[str], ErrorLog, SpoutState ]:
+        '''
+        Apply the Pipeline as the code of a Macro, given the Context created for that Macro call.
+
+        Macro calls are always Governed, so that their nesting depth is limited by the execution budget's `max_macro_depth`,
+            a Macro called outside of a Governed execution (e.g. through a command) starts its own.
+
+        Every `config.MACRO_TRAMPOLINE_DEPTH` levels of nested Macro calls, the call is run as a separate asyncio Task,
+            so that each Task only ever resumes a bounded chain of coroutines, regardless of how deeply Macros recurse.
+        NOTE: This stands in for an explicit work stack, which would mean flattening the whole recursive chain of
+            segments, groups, pipes and Macro calls into a loop. Awaiting the Task keeps the same semantics as awaiting the call itself:
+            Cancelling the caller cancels the Task, its exceptions (including BudgetExceededError) are raised in the caller,
+            and the Task runs in a copy of the caller's contextvars.
+        '''
+        if context.governor is None:
+            context.governor = executable_script.ExecutableScript.create_governor(context)
+            context.governor.enter_macro(context.macro_depth, context.describe_macro_chain)
+        if config.MACRO_TRAMPOLINE_DEPTH and context.macro_depth % config.MACRO_TRAMPOLINE_DEPTH == 0:
+            return await asyncio.create_task(self.apply(items, context))
+        return await self.apply(items, context)
+
+    async def execute(self, items: list[str], context: Context, scope: ItemScope, state: SegmentState, errors: ErrorLog):
+        '''Apply this Pipeline as an inlined (parenthesised) pipeline to a single group of items, writing the results into the SegmentState.'''
+        items, pl_errors, pl_spout_state = await self.apply(items, context, scope, exclude_static_errors=True)
+        errors.extend(pl_errors, 'parens')
+        if errors.terminal: return
+        state.next_items.extend(items)
+        # group_mode.is_singular is a special case where we can safely extend print values, otherwise they're discarded here
+        state.spout_state.extend(pl_spout_state, extend_print=state.extend_print)
+
     async def _apply_iteration(self, items: list[str], context: 'Context', parent_scope: 'ItemScope'=None) -> tuple[ list[str], ErrorLog, SpoutState ]:
         '''Apply the pipeline to a list of items a single time.'''
-        ## This is the big method where everything happens.
-
         errors = ErrorLog()
         # When a terminal error is encountered, cut script execution short and only return the error log
         # This suggestively named tuple is for such cases.
@@ -629,173 +1180,141 @@ class Pipeline:
 
         self.check_items(loose_items, context)
 
-        ### This loop iterates over the pipeline's segments as they are applied in sequence. (first > second > third)
-        for segment in self.segments:
-
-            ## CASE: Origin String
-            if isinstance(segment, ParsedOrigin):
-                item_scope.set_items(loose_items)
-                loose_items, origin_errors = await segment.evaluate(context, item_scope)
-                if errors.extend(origin_errors, 'origin').terminal:
-                    return NOTHING_BUT_ERRORS
-                continue
-
-            ## CASE: Groupmode and a set of parallel pipes or pipelines
-            group_mode, parsed_pipes = segment
-            next_items = []
-            new_printed_items = []
-
-            # GroupMode errors
-            errors.extend(group_mode.pre_errors, 'groupmode')
-            if errors.terminal: return NOTHING_BUT_ERRORS
+        ### This loop iterates over the pipeline's compiled steps as they are applied in sequence. (first > second > third)
+        for step in self.get_plan():
+            context.check_deadline()
+            loose_items = await step(loose_items, context, item_scope, spout_state, errors)
+            if errors.terminal:
+                return NOTHING_BUT_ERRORS
 
-            # Non-trivial groupmodes add a new item scope layer
-            if group_mode.splits_trivially():
-                group_scope = item_scope
-            else:
-                item_scope.set_items(loose_items)
-                group_scope = ItemScope(item_scope)
+        return loose_items, errors, spout_state
 
-            try:
-                applied_group_mode = await group_mode.apply(loose_items, parsed_pipes, context, group_scope)
-            except groupmodes.GroupModeError as e:
-                errors.log('**in groupmode:** ' + str(e), True)
-                if e.errors: errors.extend(e.errors, 'groupmode')
-                return NOTHING_BUT_ERRORS
+    async def _apply_segment(self, group_mode: 'groupmodes.GroupMode', parsed_pipes: list[Union[ParsedPipe, 'Pipeline']], concurrent: bool,
+            loose_items: list[str], context: 'Context', item_scope: 'ItemScope', spout_state: SpoutState, errors: ErrorLog) -> list[str] | None:
+        '''
+        Plan step applying a groupmode and a set of parallel pipes or pipelines.
+        If `concurrent` is set, none of the pipes have side effects, and multiple groups may be processed concurrently.
+        '''
+        # GroupMode errors
+        errors.extend(group_mode.pre_errors, 'groupmode')
+        if errors.terminal: return
 
-            ### The group mode turns the list[item], list[pipe] into  list[Tuple[ list[item], Optional[Pipe] ]]
-            # i.e. it splits the list of items into smaller lists, and assigns each one a pipe to be applied to (if any).
-            # The implemenation of this arcane flowchart magicke is detailed in `./groupmodes.py`
-            # In the absolute simplest (and most common) case, all values are simply sent to a single pipe, and this loop iterates exactly once.
+        # Non-trivial groupmodes add a new item scope layer
+        if group_mode.splits_trivially():
+            group_scope = item_scope
+        else:
+            item_scope.set_items(loose_items)
+            group_scope = ItemScope(item_scope)
+
+        try:
+            applied_group_mode = await group_mode.apply(loose_items, parsed_pipes, context, group_scope)
+        except groupmodes.GroupModeError as e:
+            errors.log('**in groupmode:** ' + str(e), True)
+            if e.errors: errors.extend(e.errors, 'groupmode')
+            return
+
+        extend_print = group_mode.is_singular()
+
+        ### The group mode turns the list[item], list[pipe] into  list[Tuple[ list[item], Optional[Pipe] ]]
+        # i.e. it splits the list of items into smaller lists, and assigns each one a pipe to be applied to (if any).
+        # The implemenation of this arcane flowchart magicke is detailed in `./groupmodes.py`
+        # In the absolute simplest (and most common) case, all values are simply sent to a single pipe, and this loop iterates exactly once.
+        ## Groups whose pipes may have side effects (i.e. evaluate Sources) are processed one at a time, in order,
+        #   so that a terminal error in one group prevents any of the following groups from ever being processed.
+        if len(applied_group_mode) == 1 or not concurrent or config.GROUP_CONCURRENCY == 1:
+            state = SegmentState(spout_state, extend_print)
             for items, parsed_pipe in applied_group_mode:
+                context.check_deadline()
                 group_scope.set_items(items)
+                await self._apply_group(items, parsed_pipe, context, group_scope, state, errors)
+                if errors.terminal: return
 
-                ## CASE: `None` is how the groupmode assigns values to remain unaffected
-                if parsed_pipe is None:
-                    next_items.extend(items)
-                    continue
-
-                ## CASE: The pipe is itself an inlined Pipeline (recursion!)
-                if isinstance(parsed_pipe, Pipeline):
-                    items, pl_errors, pl_spout_state = await parsed_pipe.apply(items, context, group_scope, exclude_static_errors=True)
-                    errors.extend(pl_errors, 'parens')
-                    if errors.terminal: return NOTHING_BUT_ERRORS
-                    next_items.extend(items)
-                    # group_mode.is_singular is a special case where we can safely extend print values, otherwise they're discarded here
-                    spout_state.extend(pl_spout_state, extend_print=group_mode.is_singular())
-
-                    continue
+        ### Otherwise, groups are independent of one another and can be processed concurrently.
+        else:
+            state = SegmentState(spout_state, extend_print)
+            if not await self._apply_groups_concurrently(applied_group_mode, context, group_scope.parent, state, errors):
+                return
 
-                ## CASE: The pipe is a ParsedPipe: something of the form "name [argument_list]"
-                name = parsed_pipe.name
-                errors.extend(parsed_pipe.errors, parsed_pipe.name)
-                if errors.terminal: return NOTHING_BUT_ERRORS
-
-                #### Determine the arguments (if needed)
-                if parsed_pipe.arguments is not None:
-                    args, arg_errors = await parsed_pipe.arguments.determine(context, group_scope)
-                    errors.extend(arg_errors, context=name)
-
-                # Check if something went wrong while determining arguments
-                if errors.terminal: return NOTHING_BUT_ERRORS
-                # Handle certain items being ignoring/filtering depending on their use in arguments
-                ignored, items = group_scope.extract_ignored()
-                next_items.extend(ignored)
-
-                ###################################################
-                #### Figure out what the pipe is, this is important
-
-                ## NO OPERATION
-                if name in ['', 'nop']:
-                    next_items.extend(items)
-
-                ## HARDCODED 'PRINT' SPOUT (TODO: GET RID OF THIS)
-                elif name == 'print':
-                    next_items.extend(items)
-                    new_printed_items.extend(items)
-                    NATIVE_SPOUTS['print'].hook(spout_state, items)
-
-                ## A NATIVE PIPE
-                elif parsed_pipe.type == ParsedPipe.NATIVE_PIPE:
-                    pipe: Pipe = parsed_pipe.pipe
-                    if not pipe.may_use(context.origin.activator):
-                        errors.log(f'User lacks permission to use Pipe `{name}`.', True)
-                        return NOTHING_BUT_ERRORS
-                    try:
-                        next_items.extend(await pipe.apply(items, context, args))
-                    except Exception as e:
-                        errors.log_exception(f'Failed to process Pipe `{name}` with args {args}', e)
-                        return NOTHING_BUT_ERRORS
-
-                ## A SPOUT
-                elif parsed_pipe.type == ParsedPipe.NATIVE_SPOUT:
-                    spout: Spout = parsed_pipe.pipe
-                    # Hook the spout into the SpoutState
-                    spout.hook(spout_state, items, **args)
-                    # As a rule, spouts do not affect the values
-                    next_items.extend(items)
-
-                ## A NATIVE SOURCE
-                elif parsed_pipe.type == ParsedPipe.NATIVE_SOURCE:
-                    source: Source = parsed_pipe.pipe
-                    # Sources don't accept input values: Discard them but warn about it if nontrivial input is being discarded.
-                    # This is just a style warning, if it turns out this is annoying then it should be removed.
-                    # NOTE: This turned out to be annoying
-                    # if items and not (len(items) == 1 and not items[0]):
-                    #     errors.log(f'Source-as-pipe `{name}` received nonempty input; either use all items as arguments or explicitly `remove` unneeded items.')
+        # Clean up after applying every group mode, prepare for the next pipeline segment
+        if state.printed_items:
+            spout_state.print_values.append(state.printed_items)
+        self.check_items(state.next_items, context)
+        return state.next_items
 
-                    try:
-                       next_items.extend( await source.generate(context, args) )
-                    except Exception as e:
-                        errors.log_exception(f'Failed to process Source-as-Pipe `{name}` with args {args}', e)
-                        return NOTHING_BUT_ERRORS
-
-                ## A PIPE MACRO
-                elif name in MACRO_PIPES:
-                    macro = MACRO_PIPES[name]
-                    try:
-                        # Get the set of arguments and put them in Context
-                        args = macro.apply_signature(args)
-                        macro_ctx = context.into_macro(macro, args)
-                    except ArgumentError as e:
-                        errors.log(e, True, context=name)
-                        return NOTHING_BUT_ERRORS
-
-                    macro_pl = Pipeline.from_string(macro.code)
-                    newvals, macro_errors, macro_spout_state = await macro_pl.apply(items, macro_ctx)
-                    errors.extend(macro_errors, name)
-                    if errors.terminal: return NOTHING_BUT_ERRORS
-
-                    next_items.extend(newvals)
-                    # group_mode.is_singular is a special case where we can safely extend print values, otherwise they're discarded here
-                    spout_state.extend(macro_spout_state, extend_print=group_mode.is_singular())
-
-                ## A SOURCE MACRO
-                elif name in MACRO_SOURCES:
-                    macro = MACRO_SOURCES[name]
-
-                    # Source Macro functioning is implemented in ParsedSource
-                    temp_parsed_source = TmplSource(name, None)
-                    new_vals, src_errs = await temp_parsed_source.evaluate(context, group_scope, args)
-                    errors.extend(src_errs, context='source-as-pipe')
-
-                    if new_vals is None or errors.terminal:
-                        errors.terminal = True
-                        return NOTHING_BUT_ERRORS
-                    next_items.extend(new_vals)
-
-                ## UNKNOWN NAME
-                else:
-                    errors.log(f'Unknown pipe `{name}`.', True)
-                    return NOTHING_BUT_ERRORS
+    @staticmethod
+    async def _apply_groups_concurrently(groups: list[tuple[list[str], Union[ParsedPipe, 'Pipeline', None]]], context: 'Context',
+            parent_scope: 'ItemScope', state: SegmentState, errors: ErrorLog) -> bool:
+        '''
+        Apply each group's assigned pipe to its items concurrently, with each group getting its own scope, state and errors,
+            which are merged back into the given state and errors in the original group order. Returns False on a terminal error.
 
-            # Clean up after applying every group mode, prepare for the next pipeline segment
-            if new_printed_items:
-                spout_state.print_values.append(new_printed_items)
-            loose_items = next_items
-            self.check_items(loose_items, context)
+        The outcome is the same as processing the groups in order: A terminal error (or exception) in one group cancels all groups after it,
+            and is only reported if none of the groups before it also failed.
+        '''
+        # Groups are only started once there is room for them, and none are started after a group has failed
+        limit = config.GROUP_CONCURRENCY or len(groups)
+        tasks: list[asyncio.Task | None] = [None] * len(groups)
+        pending: set[asyncio.Task] = set()
+        index_of: dict[asyncio.Task, int] = {}
+        failed_at = len(groups)
+        started = 0
+
+        async def apply_group(items: list[str], parsed_pipe: Union[ParsedPipe, 'Pipeline', None]):
+            context.check_deadline()
+            group_state = SegmentState(SpoutState(), state.extend_print)
+            group_errors = ErrorLog()
+            await Pipeline._apply_group(items, parsed_pipe, context, ItemScope(parent_scope, items), group_state, group_errors)
+            return group_state, group_errors
+
+        try:
+            while True:
+                while started < failed_at and len(pending) < limit:
+                    task = asyncio.create_task(apply_group(*groups[started]))
+                    tasks[started] = task
+                    index_of[task] = started
+                    pending.add(task)
+                    started += 1
+                if not pending: break
+
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    index = index_of[task]
+                    # NOTE: Retrieving the exception of every finished task, so none of them are reported as never retrieved
+                    if task.cancelled() or (task.exception() is None and not task.result()[1].terminal):
+                        continue
+                    if index < failed_at:
+                        failed_at = index
+                        for later in pending:
+                            if index_of[later] > failed_at: later.cancel()
+        finally:
+            # In case we ourselves were cancelled, or an exception was raised
+            if pending:
+                for task in pending:
+                    task.cancel()
+                await asyncio.wait(pending)
+                for task in pending:
+                    if not task.cancelled(): task.exception()
+
+        # NOTE: Every group before the first failed group is finished, and no group after it is merged, just like processing them in order
+        for task in tasks[:failed_at+1]:
+            if task is None: break
+            group_state, group_errors = task.result()
+            errors.extend(group_errors)
+            if errors.terminal: return False
+            state.next_items.extend(group_state.next_items)
+            state.printed_items.extend(group_state.printed_items)
+            state.spout_state.extend(group_state.spout_state, extend_print=state.extend_print)
+        return True
 
-        return loose_items, errors, spout_state
+    @staticmethod
+    async def _apply_group(items: list[str], parsed_pipe: Union[ParsedPipe, 'Pipeline', None], context: 'Context', scope: 'ItemScope', state: SegmentState, errors: ErrorLog):
+        '''Apply a single group's assigned pipe to its items.'''
+        ## CASE: `None` is how the groupmode assigns values to remain unaffected
+        if parsed_pipe is None:
+            state.next_items.extend(items)
+            return
+        ## CASE: Either a ParsedPipe or an inlined Pipeline (recursion!), both know how to execute themselves
+        await parsed_pipe.execute(items, context, scope, state, errors)
 
 
 # These lynes be down here dve to dependencyes cyrcvlaire
@@ -806,4 +1325,7 @@ from .pipe import Pipe, Source, Spout
 from pipes.implementations.pipes import NATIVE_PIPES
 from pipes.implementations.sources import NATIVE_SOURCES
 from pipes.implementations.spouts import NATIVE_SPOUTS
-from .macros import MACRO_PIPES, MACRO_SOURCES
+from .macros import Macro, MACRO_PIPES, MACRO_SOURCES
+from .cost_estimate import check_cost
+# NOTE: Only the module is imported, since it may be the one importing this module
+from . import executable_script
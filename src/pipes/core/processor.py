@@ -51,7 +51,7 @@ class PipelineProcessor:
                 message=message,
                 arguments=arguments,
             )
-            await ExecutableScript.execute_from_string(event.script, context, ItemScope(items=items))
+            await ExecutableScript.execute_event(event, context, ItemScope(items=items))
 
     async def on_reaction(self, channel: TextChannel, emoji: str, user_id: int, msg_id: int):
         '''Check if an incoming reaction triggers any custom Events.'''
@@ -81,7 +81,7 @@ class PipelineProcessor:
                 arguments={'emoji': emoji},
             )
             scope = ItemScope(items=[emoji, str(user_id)]) # Legacy way of conveying who reacted
-            await ExecutableScript.execute_from_string(event.script, context, scope)
+            await ExecutableScript.execute_event(event, context, scope)
 
     async def on_direct_message(self, message: Message):
         if message.author.id in BOT_STATE.awaiting_dm_reply:
@@ -0,0 +1,323 @@
+'''
+Hand-written lexer for the top-level structure of scripts, which the pyparsing grammar does not cover (see the note at the end of grammar.py):
+    1. Splitting a script into its segments: origin >> segment > segment > ...
+    2. Expanding a pipe segment's ChoiceTree syntax into its parallel pipes, while treating parenthesized inline pipelines
+        and triple-quoted strings as ChoiceTree-invariant, i.e. leaving any "[|]" inside them untouched.
+
+Each step is a single pass over the text, producing pieces of text along with their position in the script for error reporting.
+'''
+from pyparsing import ParseException
+
+from utils.choicetree import ChoiceTree
+
+
+TRIPLE_QUOTES = ('"""', "'''")
+SINGLE_QUOTES = ('"', "'")
+ALL_QUOTES = TRIPLE_QUOTES + SINGLE_QUOTES
+
+
+class SegmentToken:
+    '''A single top-level segment of a script, which is either an origin or a pipe segment.'''
+    __slots__ = ('text', 'position', 'is_origin')
+
+    text: str
+    position: int
+    'The position of the segment\'s first character in the script.'
+    is_origin: bool
+
+    def __init__(self, text: str, position: int, is_origin: bool):
+        self.text = text
+        self.position = position
+        self.is_origin = is_origin
+
+    def __repr__(self):
+        return 'SegmentToken(%r, %d%s)' % (self.text, self.position, ', origin' if self.is_origin else '')
+
+
+def split_segments(string: str, start_with_origin=False) -> list[SegmentToken]:
+    '''
+    Split the script into top-level segments (segment > segment > segment >> segment > segment),
+        taking into account that ">" may also appear inside of quotes, braces, brackets or parentheses.
+    '''
+    segments: list[SegmentToken] = []
+
+    stack = []
+    start = 0
+    i = 0
+    n = len(string)
+    in_origin_str = start_with_origin
+
+    def append_segment(end: int, text: str=None):
+        segments.append(SegmentToken(string[start:end].rstrip() if text is None else text, start, in_origin_str))
+
+    def find_next_segment_start():
+        '''Skips any leading whitespace at the start of a segment.'''
+        nonlocal i, start
+        while i < n and string[i].isspace():
+            i += 1
+        start = i
+
+    find_next_segment_start()
+
+    while i < n:
+        c = string[i]
+        escaped = i > 0 and string[i-1] == '~'
+        stack_top = stack[-1] if stack else None
+
+        if not in_origin_str:
+            ## Parentheses: Only top-level or within other parentheses, unescapable
+            if c == '(' and (not stack or stack_top == '('):
+                stack.append(c)
+                i += 1; continue
+            if c == ')' and stack_top == '(':
+                stack.pop()
+                i += 1; continue
+
+        if not escaped:
+            ## Braces
+            if c == '{':
+                stack.append(c)
+                i += 1; continue
+            if c == '}' and stack_top == '{':
+                stack.pop()
+                i += 1; continue
+
+            ## Brackets: Not openable if anywhere inside triple quotes
+            if c == '[' and not any(s in TRIPLE_QUOTES for s in stack):
+                stack.append(c)
+                i += 1; continue
+            if c == ']' and stack_top == '[':
+                stack.pop()
+                i += 1; continue
+
+            if in_origin_str:
+                may_open_quotes = (i == start)
+            else:
+                may_open_quotes = True
+                # May only open quotes if we're not already inside a quoted string
+                #   (with optionally some brackets inside the quoted string)
+                for s in reversed(stack):
+                    if s == '[': continue
+                    if s in ALL_QUOTES:
+                        may_open_quotes = False
+                    break
+
+            # Triple quotes
+            if (ccc := string[i:i+3]) in TRIPLE_QUOTES:
+                if may_open_quotes:
+                    stack.append(ccc)
+                    i += 3; continue
+                if stack_top == ccc:
+                    stack.pop()
+                    i += 3; continue
+
+            # Single quotes
+            if c in SINGLE_QUOTES:
+                if may_open_quotes:
+                    stack.append(c)
+                    i += 1; continue
+                if stack_top == c:
+                    stack.pop()
+                    i += 1; continue
+
+        ## Un-nested >, ending the segment
+        if not stack and c == '>':
+            if (i > 0 and string[i-1] == '=') or (i > 1 and string[i-2:i] == '=>'):
+                # Special case: '>' is probably part of
+                #   '=>' Pipeline-as-argument or
+                #   '=>>' Script-as-argument assignment; don't end the segment
+                i += 1
+                continue
+
+            elif i > 0 and string[i-1] == '-':
+                # Special case: '->' is shorthand for '> print >'
+                append_segment(i-1)
+                in_origin_str = False
+                start = i-1
+                append_segment(i, text='print')
+            else:
+                append_segment(i)
+
+            if string[i:i+2] == '>>':
+                # Start a new origin segment
+                in_origin_str = True
+                i += 2
+            else:
+                # Start a new pipe segment
+                in_origin_str = False
+                i += 1
+
+            find_next_segment_start()
+            continue
+
+        ## Nothing special
+        i += 1
+
+    ## Add the final segment, regardless of unclosed delimiters on the stack
+    if start < n:
+        append_segment(n)
+
+    return segments
+
+
+class _SegmentExpander:
+    '''
+    Recursive descent parser for the ChoiceTree syntax of a pipe segment, building the same tree ChoiceTree's own grammar would,
+        except that parenthesized and triple-quoted substrings are consumed whole as plain text.
+    '''
+    __slots__ = ('text', 'i', 'in_quotes')
+
+    text: str
+    i: int
+    in_quotes: bool
+    'Whether we are inside "double quotes", in which parentheses are not special.'
+
+    def __init__(self, text: str):
+        self.text = text
+        self.i = 0
+        self.in_quotes = False
+
+    def error(self, message: str, loc: int=None):
+        return ParseException(self.text, self.i if loc is None else loc, message)
+
+    def parse_root(self) -> list[tuple[ChoiceTree.Concat, int]]:
+        '''Parse the entire segment as a top-level choice, returning each option along with its start position.'''
+        options = [(self.parse_concat(), 0)]
+        while self.i < len(self.text):
+            c = self.text[self.i]
+            if c == ']':
+                raise self.error('Unmatched "]"')
+            # Otherwise c == '|'
+            self.i += 1
+            start = self.i
+            options.append((self.parse_concat(), start))
+        return options
+
+    def parse_choice(self) -> ChoiceTree.Node:
+        '''Parse a bracketed choice or ordinal, starting right after its opening "[".'''
+        text, open_loc = self.text, self.i - 1
+        j = self.i
+        while j < len(text) and text[j] in '0123456789':
+            j += 1
+        if j > self.i and j < len(text) and text[j] == ']':
+            ordinal = ChoiceTree.Ordinal(int(text[self.i:j]))
+            self.i = j + 1
+            return ordinal
+
+        options = [self.parse_concat()]
+        while True:
+            if self.i >= len(text):
+                raise self.error('Expected "]" to close the "[" at position %d' % open_loc)
+            c = text[self.i]
+            self.i += 1
+            if c == ']':
+                return ChoiceTree.Choice(options)
+            options.append(self.parse_concat())
+
+    def parse_concat(self) -> ChoiceTree.Concat:
+        '''Parse text, ordinals and choices up until the next unescaped "|" or "]", or the end of the text.'''
+        text, n = self.text, len(self.text)
+        nodes: list[ChoiceTree.Node] = []
+        chunk: list[str] = []
+
+        while self.i < n:
+            i = self.i
+            c = text[i]
+
+            if c in '|]':
+                break
+
+            elif c == '[':
+                if chunk:
+                    nodes.append(ChoiceTree.Text(''.join(chunk)))
+                    chunk = []
+                self.i += 1
+                nodes.append(self.parse_choice())
+                continue
+
+            elif c == '~':
+                # Escape symbol: "~[", "~|" and "~]" are the literal symbols, "~~" and any other "~" are left as is
+                if text[i+1:i+2] in ('[', '|', ']'):
+                    chunk.append(text[i+1])
+                    self.i += 2
+                elif text[i+1:i+2] == '~':
+                    chunk.append('~~')
+                    self.i += 2
+                else:
+                    chunk.append(c)
+                    self.i += 1
+                continue
+
+            elif c == '"' and self.in_quotes:
+                self.in_quotes = False
+
+            elif c == '"':
+                if text.startswith('"""', i):
+                    # Triple-quoted string: Consumed whole, if closed
+                    end = text.find('"""', i+3)
+                    if end != -1:
+                        chunk.append(text[i:end+3])
+                        self.i = end + 3
+                        continue
+                    chunk.append('"""')
+                    self.i += 3
+                    self.in_quotes = True
+                    continue
+                self.in_quotes = True
+
+            elif c == '(' and not self.in_quotes:
+                # Parenthesized inline pipeline: Consumed whole, up to its matching parenthesis or the end of the text
+                end = self.find_closing_paren(i)
+                chunk.append(text[i:end])
+                self.i = end
+                continue
+
+            chunk.append(c)
+            self.i += 1
+
+        if chunk:
+            nodes.append(ChoiceTree.Text(''.join(chunk)))
+        if not nodes:
+            nodes.append(ChoiceTree.Text(''))
+        return ChoiceTree.Concat(nodes)
+
+    def find_closing_paren(self, i: int) -> int:
+        '''Find the position right after the parenthesis matching the one at position i, or the end of the text if there is none.'''
+        text, n = self.text, len(self.text)
+        depth = 0
+        while i < n:
+            c = text[i]
+            if self.in_quotes:
+                if c == '"': self.in_quotes = False
+            elif c == '"':
+                self.in_quotes = True
+            elif c == '(':
+                depth += 1
+            elif c == ')':
+                depth -= 1
+                if depth == 0:
+                    return i + 1
+            i += 1
+        return n
+
+
+def expand_segment(segment: str, position: int=0) -> list[tuple[str, int]]:
+    '''
+    Expand a single pipe segment into the strings for its parallel pipes, each along with its position in the script,
+        i.e. the position of the top-level option it is expanded from, plus the given position of the segment itself.
+    Raises a ParseException for unbalanced brackets, same as ChoiceTree would.
+    '''
+    expander = _SegmentExpander(segment)
+    pipes: list[tuple[str, int]] = []
+    for option, start in expander.parse_root():
+        # Point at the option's first non-whitespace character
+        while start < len(segment) and segment[start].isspace():
+            start += 1
+        for pipestr in option:
+            pipes.append((pipestr.strip(), position + start))
+    return pipes
+
+
+def describe_position(name: str, position: int | None) -> str:
+    '''Describe a part of a script by its name and, if known, its position, to give context to its errors.'''
+    return name if position is None else f'{name} (at position {position})'
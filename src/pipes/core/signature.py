@@ -1,7 +1,12 @@
+import re
+import time
+import asyncio
+from copy import copy
 from typing import Optional, TypeVar, Callable, Union
 from pyparsing import ParseBaseException, ParseResults
 
 from . import grammar
+from .parse_cache import parse_cached, get_cache, ByIdentity
 from .state import ErrorLog, Context, ItemScope
 # NOTE: Additional circular imports at the bottom of the file
 
@@ -24,6 +29,14 @@ class Par:
     checkfun: Callable[[T], bool] | None
     required: bool
 
+    VALUE_CACHE = get_cache('argument_values', 200_000)
+    'Parsed argument values by (type, raw string), shared by all Pars, only holding values that are safe to share.'
+    SHAREABLE_TYPES = (str, int, float, bool, type(None), re.Pattern, Option.Str)
+    'Immutable types of parsed values, which may be shared between all arguments with the same type and raw string.'
+    UNCACHED_TYPES: set[Callable] = set()
+    'The types which have produced values that are unsafe to share, which are not looked up in the cache anymore.'
+    _MISSING = object()
+
     def __init__(self, type: Callable[[str], T], default: str | T=None, desc: str=None, check: Callable[[T], bool]=None, required: bool=True):
         '''
         Arguments:
@@ -96,18 +109,43 @@ class Par:
 
     def parse(self, raw: str):
         ''' Attempt to parse and check the given string as an argument for this parameter, raises ArgumentError if it fails. '''
+        cached = self.type not in Par.UNCACHED_TYPES
+        val = Par.VALUE_CACHE.get((self.type, raw), Par._MISSING) if cached else Par._MISSING
+        if val is Par._MISSING:
+            val = self._parse_uncached(raw)
+            if cached:
+                self._store(raw, val)
+        elif isinstance(val, ListOf.List):
+            val = copy(val)
+
+        if self.checkfun and not self.checkfun(val):
+            raise ArgumentError(f'Parameter `{self.name}` is not allowed to be "{raw}".')
+        return val
+
+    def _parse_uncached(self, raw: str):
+        start = time.perf_counter()
         try:
-            val = self.type(raw)
+            return self.type(raw)
         except ArgumentError as e:
             ## ArgumentError means it's a nicely formatted error that we made ourselves
             raise ArgumentError(f'Invalid value "{raw}" for parameter `{self.name}`: {e}')
         except Exception as e:
             ## Exceptions may be less clear so we need to be more verbose
             raise ArgumentError(f'Invalid value "{raw}" for parameter `{self.name}`: Must be of type `{self.type.__name__}` ({e})')
-
-        if self.checkfun and not self.checkfun(val):
-            raise ArgumentError(f'Parameter `{self.name}` is not allowed to be "{raw}".')
-        return val
+        finally:
+            Par.VALUE_CACHE.parse_seconds += time.perf_counter() - start
+
+    def _store(self, raw: str, val):
+        '''Store the parsed value in the cache if it is safe to share, otherwise stop caching values of this type altogether.'''
+        if isinstance(val, ListOf.List):
+            # Lists are mutable, but their copies may be shared as long as their items are immutable
+            shareable = all(isinstance(v, Par.SHAREABLE_TYPES) for v in val)
+        else:
+            shareable = isinstance(val, Par.SHAREABLE_TYPES)
+        if not shareable:
+            Par.UNCACHED_TYPES.add(self.type)
+            return
+        Par.VALUE_CACHE.put((self.type, raw), copy(val) if isinstance(val, ListOf.List) else val, weight=len(raw) if isinstance(raw, str) else 1)
 
 
 class Signature(dict[str, Par]):
@@ -221,6 +259,14 @@ class ValueArg(Arg):
         if self.predetermined: return self.value
 
         value, arg_errs = await self.string.evaluate(context, scope)
+        return self._parse(value, arg_errs, errors)
+
+    def determine_sync(self, scope: ItemScope, errors: ErrorLog) -> T | None:
+        '''Same as `determine`, for the case where the TemplatedString can be evaluated synchronously.'''
+        value, arg_errs = self.string.evaluate_sync(scope)
+        return self._parse(value, arg_errs, errors)
+
+    def _parse(self, value: str | None, arg_errs: ErrorLog, errors: ErrorLog) -> T | None:
         if arg_errs: errors.extend(arg_errs, context=f'parameter `{self.name}`')
         if errors.terminal: return
 
@@ -273,6 +319,11 @@ class Arguments:
             self.predetermined_args.defaults = self.defaults
 
     @staticmethod
+    @parse_cached('arguments', 500_000,
+        # NOTE: Signatures are unhashable dicts, but they are never modified past their definition, so their identity will do
+        key=lambda string, signature=None, greedy=True: (string, ByIdentity(signature), greedy),
+        copy=lambda result: (result[0], result[1], ErrorLog().extend(result[2])),
+    )
     def from_string(string: str, signature: Signature=None, greedy=True) -> tuple['Arguments', Optional['TemplatedString'], ErrorLog]:
         try:
             parsed = grammar.argument_list.parse_string(string, parseAll=True)
@@ -399,6 +450,10 @@ class Arguments:
 
         return Arguments(args), remainder, errors
 
+    def evaluates_sources(self) -> bool:
+        '''Whether determining these arguments might involve evaluating Sources (or inline scripts), rather than only items.'''
+        return any(not a.predetermined and not (isinstance(a, ValueArg) and a.string.is_sync) for a in self.args.values())
+
     def adjust_implicit_item_indices(self, new_start_index: int):
         '''
         Upon creation of an Arguments object we assign indices to implicitly indexed items,
@@ -421,19 +476,53 @@ class Arguments:
         return len(self.args) > len(self.defaults)
 
     async def determine(self, context: Context, scope: ItemScope=None) -> tuple[dict[str], ErrorLog]:
-        ''' Returns a parsed {parameter: argument} dict ready for use. '''
+        '''
+        Returns a parsed {parameter: argument} dict ready for use.
+        Arguments that need to be awaited are determined concurrently, each into their own ErrorLog, which are combined in parameter order.
+        '''
         errors = ErrorLog()
         if self.predetermined: return self.predetermined_args, errors
 
         values = EvaluatedArguments()
         values.defaults = self.defaults
+        arg_errors: list[ErrorLog] = []
+        pending: list[tuple[str, Arg, ErrorLog]] = []
         # Gather values
         for p, a in self.args.items():
             if a.predetermined:
                 values[p] = a.value
+                continue
+            a_errors = ErrorLog()
+            arg_errors.append(a_errors)
+            if isinstance(a, ValueArg) and a.string.is_sync:
+                values[p] = a.determine_sync(scope, a_errors)
             else:
-                values[p] = await a.determine(context, scope, errors)
-
+                # Insert a placeholder so the dict keeps the parameters' order
+                values[p] = None
+                pending.append((p, a, a_errors))
+
+        if pending:
+            # Check before creating any coroutines, so that none are left un-awaited if it raises
+            context.check_deadline()
+            if len(pending) == 1:
+                p, a, a_errors = pending[0]
+                values[p] = await a.determine(context, scope, a_errors)
+            else:
+                tasks = [asyncio.create_task(a.determine(context, scope, a_errors)) for _, a, a_errors in pending]
+                try:
+                    results = await asyncio.gather(*tasks)
+                except BaseException:
+                    # gather leaves the other arguments running when one raises (e.g. a BudgetExceededError), and a TaskGroup would wrap
+                    #   the exception in an ExceptionGroup, so cancel them here, retrieving their exceptions so none go unreported
+                    for task in tasks:
+                        task.cancel()
+                    await asyncio.gather(*tasks, return_exceptions=True)
+                    raise
+                for (p, _, _), value in zip(pending, results):
+                    values[p] = value
+
+        for a_errors in arg_errors:
+            errors.extend(a_errors)
         return values, errors
 
 
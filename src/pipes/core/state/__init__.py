@@ -7,4 +7,5 @@ from .bot_state import BOT_STATE
 from .error_log import ErrorLog
 from .context import Context, ContextError
 from .item_scope import ItemScope, ItemScopeError
-from .spout_state import SpoutState
\ No newline at end of file
+from .spout_state import SpoutState
+from .governor import Governor, ExecutionBudget, BudgetExceededError
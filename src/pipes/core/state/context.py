@@ -18,6 +18,7 @@ An ItemScope may be created ahead of execution, but often is only created (or de
 from discord import Message, Member, Interaction, TextChannel, Client
 
 from .bot_state import BOT_STATE
+from .governor import Governor
 
 from typing import TYPE_CHECKING
 if TYPE_CHECKING:
@@ -109,6 +110,9 @@ class Context:
     button: 'RezbotButton' = None
     'The specific button that triggered this interaction.'
 
+    governor: Governor = None
+    'The Governor keeping track of the current execution\'s resource usage, if any.'
+
     # == Macro context values
 
     macro: 'Macro' = None
@@ -117,6 +121,12 @@ class Context:
     arguments: dict[str, str|None] = None
     'Arguments passed into the current Event or Macro, accessible through {arg param_name}'
 
+    macro_depth: int = 0
+    'The number of nested Macro calls the current execution is in.'
+
+    stable_sources: dict[tuple, tuple[str, ...]] = None
+    'Values produced by execution-stable Sources, memoized for the current script run. Shared with child Contexts that change nothing a Source may depend on.'
+
     # ====================================== Creating Context ======================================
 
     def __init__(
@@ -140,7 +150,7 @@ class Context:
 
         # If a parent Context is given, use most of its properties as defaults
         if parent:
-            for attr in ('author', 'message', 'interaction', 'channel', 'macro', 'arguments', 'button'):
+            for attr in ('author', 'message', 'interaction', 'channel', 'macro', 'arguments', 'button', 'governor', 'macro_depth'):
                 setattr(self, attr, getattr(parent, attr, None))
 
         self.author = author or self.author
@@ -156,6 +166,15 @@ class Context:
 
         self.macro = macro or self.macro
         self.arguments = arguments if arguments is not None else self.arguments
+        if macro:
+            self.macro_depth += 1
+            if self.governor:
+                self.governor.enter_macro(self.macro_depth, self.describe_macro_chain)
+
+        if parent and not (author or message or interaction or tunnel_channel or button or macro or arguments is not None):
+            self.stable_sources = parent.stable_sources
+        else:
+            self.stable_sources = {}
 
     def into_macro(self, macro: 'Macro', arguments: dict[str, str]) -> 'Context':
         '''Create a new child Context for execution inside the given Macro.'''
@@ -164,6 +183,32 @@ class Context:
             author = self.channel.guild.get_member(macro.authorId)
         return Context(self, author=author, macro=macro, arguments=arguments)
 
+    def get_macro_chain(self) -> list[str]:
+        '''The names of the nested Macros currently being called, from outermost to innermost.'''
+        chain = []
+        context = self
+        while context is not None:
+            if context.macro and (context.parent is None or context.parent.macro_depth < context.macro_depth):
+                chain.append(context.macro.name)
+            context = context.parent
+        chain.reverse()
+        return chain
+
+    def describe_macro_chain(self, max_length: int=10) -> str:
+        '''The chain of nested Macro calls as a human-readable string, with the middle left out if it is too long.'''
+        chain = [f'`{name}`' for name in self.get_macro_chain()]
+        if len(chain) > max_length:
+            chain = chain[:3] + [f'... ({len(chain) - max_length + 1} more) ...'] + chain[-(max_length - 4):]
+        return ' → '.join(chain)
+
+    def check_deadline(self):
+        '''
+        Checkpoint for cooperative cancellation: Raises a BudgetExceededError if the current execution ran out of time or budget.
+        Cheap enough to call between every segment, group, source or argument.
+        '''
+        if self.governor is not None:
+            self.governor.check()
+
     # ======================================== Using Context =======================================
 
     async def get_member(self, key: str):
@@ -0,0 +1,109 @@
+'''
+The Governor keeps a single script execution from using up more than its fair share of the bot's resources.
+'''
+import time
+from typing import Callable
+
+
+class BudgetExceededError(BaseException):
+    '''
+    Special error raised when a script's execution exceeds its ExecutionBudget, halting it.
+    Like asyncio.CancelledError it is not an Exception, so that it passes through the generic error handling around Pipes, Sources, etc.
+    '''
+
+
+class ExecutionBudget:
+    '''
+    The limits on the resources a single script execution may use, where `None` means unlimited.
+    '''
+    max_items: int | None = 100_000
+    'The total number of items that may be produced, summed over all pipeline segments.'
+    max_chars: int | None = 2_000_000
+    'The total number of characters that may be produced, summed over all pipeline segments.'
+    max_pipe_calls: int | None = 5_000
+    'The number of times a native Pipe may be invoked.'
+    max_source_calls: int | None = 2_000
+    'The number of times a native Source may be invoked.'
+    max_macro_depth: int | None = 64
+    'How deeply Macro calls may be nested.'
+    max_seconds: float | None = 60
+    'How many seconds the script may take to execute.'
+
+    LIMITS = ('max_items', 'max_chars', 'max_pipe_calls', 'max_source_calls', 'max_macro_depth', 'max_seconds')
+
+    def __init__(self, **limits: int | float | None):
+        for key, value in limits.items():
+            if key not in ExecutionBudget.LIMITS:
+                raise ValueError(f'Unknown execution budget limit `{key}`.')
+            setattr(self, key, value)
+
+    def __repr__(self):
+        return 'ExecutionBudget(%s)' % ', '.join(f'{key}={getattr(self, key)}' for key in ExecutionBudget.LIMITS)
+
+
+class Governor:
+    '''
+    Tracks the resources used by a single script execution, and halts it by raising a BudgetExceededError once its budget runs out.
+    Once the budget is exceeded, every subsequent check fails as well, so that all concurrently running parts of the script halt.
+    '''
+    __slots__ = ('budget', 'items', 'chars', 'pipe_calls', 'source_calls', 'deadline', 'exceeded')
+
+    budget: ExecutionBudget
+    items: int
+    chars: int
+    pipe_calls: int
+    source_calls: int
+    deadline: float | None
+    exceeded: str | None
+    'The reason the budget was exceeded, if it has been.'
+
+    def __init__(self, budget: ExecutionBudget=None):
+        self.budget = budget or ExecutionBudget()
+        self.items = 0
+        self.chars = 0
+        self.pipe_calls = 0
+        self.source_calls = 0
+        self.deadline = None if self.budget.max_seconds is None else time.monotonic() + self.budget.max_seconds
+        self.exceeded = None
+
+    def fail(self, reason: str):
+        self.exceeded = reason
+        raise BudgetExceededError(reason)
+
+    def check(self):
+        '''Raise a BudgetExceededError if the budget has been exceeded or the deadline has passed.'''
+        if self.exceeded is not None:
+            raise BudgetExceededError(self.exceeded)
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            self.fail(f'Script took longer than {self.budget.max_seconds} seconds to execute.')
+
+    # ================ Counting
+
+    def count_items(self, items: int, chars: int):
+        self.items += items
+        self.chars += chars
+        if self.budget.max_items is not None and self.items > self.budget.max_items:
+            self.fail(f'Script produced over {self.budget.max_items} items in total.')
+        if self.budget.max_chars is not None and self.chars > self.budget.max_chars:
+            self.fail(f'Script produced over {self.budget.max_chars} characters in total.')
+        self.check()
+
+    def count_pipe_call(self):
+        self.pipe_calls += 1
+        if self.budget.max_pipe_calls is not None and self.pipe_calls > self.budget.max_pipe_calls:
+            self.fail(f'Script invoked Pipes over {self.budget.max_pipe_calls} times.')
+        self.check()
+
+    def count_source_call(self):
+        self.source_calls += 1
+        if self.budget.max_source_calls is not None and self.source_calls > self.budget.max_source_calls:
+            self.fail(f'Script invoked Sources over {self.budget.max_source_calls} times.')
+        self.check()
+
+    def enter_macro(self, depth: int, describe_chain: Callable[[], str]=None):
+        if self.budget.max_macro_depth is not None and depth > self.budget.max_macro_depth:
+            reason = f'Script nested Macro calls over {self.budget.max_macro_depth} levels deep.'
+            if describe_chain is not None:
+                reason += f'\nCall chain: {describe_chain()}'
+            self.fail(reason)
+        self.check()
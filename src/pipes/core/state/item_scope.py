@@ -1,6 +1,7 @@
 '''
 For a comparison between Context and ItemScope, cf. context.py
 '''
+from typing import Sequence
 
 class ItemScopeError(ValueError):
     '''Special error used by the ItemScope class when an item does not exist.'''
@@ -10,18 +11,19 @@ class ItemScope:
     '''
     An object representing a "scope" of items during a script's execution, with possible parent scopes.
     '''
-    items: list[str]
+    items: Sequence[str]
+    'The items in scope, which may be a GroupView into a larger list of items, and should not be modified.'
     parent: 'ItemScope | None'
     to_be_ignored: set[str]
     to_be_removed: set[str]
 
-    def __init__(self, parent: 'ItemScope'=None, items: list[str]=None):
+    def __init__(self, parent: 'ItemScope'=None, items: Sequence[str]=None):
         self.parent = parent
         self.items = items or []
         self.to_be_ignored = set()
         self.to_be_removed = set()
 
-    def set_items(self, items: list[str]):
+    def set_items(self, items: Sequence[str]):
         '''In-place replace this scope with a subsequent sibling to the same parent scope.'''
         self.items = items
         self.to_be_ignored = set()
@@ -47,7 +49,7 @@ class ItemScope:
             (self.to_be_ignored if bang else self.to_be_removed).add(index)
         return scope.items[index]
 
-    def get_items(self, carrots: int, start: int | None, end: int | None, bang: bool) -> list[str]:
+    def get_items(self, carrots: int, start: int | None, end: int | None, bang: bool) -> Sequence[str]:
         '''Retrieves a range of items from this scope or a parent's scope, and possibly marks them for ignoring/removal.'''
         scope = self
         # For each ^ go up a scope
@@ -74,19 +76,20 @@ class ItemScope:
             (self.to_be_ignored if bang else self.to_be_removed).update(range(start, end))
         return scope.items[start:end]
 
-    def extract_ignored(self) -> tuple[set[str], list[str]]:
+    def extract_ignored(self) -> tuple[list[str], Sequence[str]]:
+        '''
+        Split this scope's items into the items to be ignored and the remaining items, leaving out the items to be removed.
+        If no items are to be ignored or removed, this scope's items are returned as is, without copying them.
+        '''
+        if not self.to_be_ignored and not self.to_be_removed:
+            return [], self.items
+
         ### Merge the sets into a clear view:
         # If "conflicting" instances occur (i.e. both {0} and {0!}) give precedence to the {0!}
         # Since the ! is an intentional indicator of what they want to happen; Do not remove the item
-        to_be = [ (i, True) for i in self.to_be_removed.difference(self.to_be_ignored) ] + [ (i, False) for i in self.to_be_ignored ]
-
-        # Finnicky list logic for ignoring/removing the appropriate indices
-        to_be.sort(key=lambda x: x[0], reverse=True)
-        ignored = []
-        items = list(self.items)
-        for i, rem in to_be:
-            if not rem: ignored.append(self.items[i])
-            del items[i]
-        ignored.reverse()
+        # Either way, the item is left out of the remaining items.
+        ignored = [ self.items[i] for i in sorted(self.to_be_ignored) ]
+        left_out = self.to_be_ignored | self.to_be_removed
+        items = [ item for i, item in enumerate(self.items) if i not in left_out ]
 
         return ignored, items
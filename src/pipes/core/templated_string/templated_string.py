@@ -5,11 +5,15 @@ Templated Elements need to be evaluated to yield strings, and may vary depending
 
 import asyncio
 from pyparsing import ParseBaseException, ParseResults
-from itertools import product as iter_product
+from itertools import product as iter_product, islice
+from math import prod
+from typing import Iterator
 from enum import Enum
 
+from utils.util import gather_bounded
 from ..state import ErrorLog, Context, ItemScope, ItemScopeError
-from .. import grammar
+from .. import grammar, config
+from ..parse_cache import parse_cached
 # NOTE: Additional, circular imports below
 
 
@@ -45,6 +49,11 @@ class TemplatedString:
     is_inline_script = False
     inline_script: 'TmplInlineScript' = None
 
+    is_sync = False
+    'Whether the TemplatedString consists only of strings, special symbols and items, meaning it can be evaluated synchronously.'
+    sync_parts: list['str | TmplItem'] = None
+    'For synchronous TemplatedStrings, the pieces with all strings and special symbols pre-joined.'
+
     def __init__(self, pieces: list['str | TemplatedElement'], start_index: int=0, index_items=True, pre_errors=None):
         self.pieces = pieces
         self.pre_errors = ErrorLog() if pre_errors is None else pre_errors
@@ -96,6 +105,7 @@ class TemplatedString:
         return TemplatedString(pieces, start_index, pre_errors=pre_errors)
 
     @staticmethod
+    @parse_cached('templated_string', 500_000)
     def from_string(string: str):
         parsed = grammar.absolute_templated_string.parse_string(string, parse_all=True)
         return TemplatedString.from_parsed(parsed)
@@ -186,6 +196,21 @@ class TemplatedString:
             self.is_inline_script = isinstance(self.pieces[0], TmplInlineScript)
             if self.is_inline_script: self.inline_script = self.pieces[0]
 
+        ## Determine if we can be evaluated without awaiting anything, and if so prepare the parts to do so
+        self.is_sync = all(isinstance(piece, (str, TmplSpecialSymbol, TmplItem)) for piece in self.pieces)
+        self.sync_parts = None
+        if self.is_sync:
+            self.sync_parts = []
+            for piece in self.pieces:
+                if isinstance(piece, TmplItem):
+                    self.sync_parts.append(piece)
+                    continue
+                string = piece if isinstance(piece, str) else piece.symbol
+                if self.sync_parts and isinstance(self.sync_parts[-1], str):
+                    self.sync_parts[-1] += string
+                else:
+                    self.sync_parts.append(string)
+
         return self
 
     @staticmethod
@@ -255,10 +280,34 @@ class TemplatedString:
 
     # ================ Evaluation
 
-    async def evaluate(self, context: Context, scope: ItemScope=None) -> tuple[str|None, ErrorLog]:
-        ''' Evaluate the TemplatedString into a single string. '''
+    def evaluate_sync(self, scope: ItemScope=None) -> tuple[str|None, ErrorLog]:
+        ''' Evaluate a synchronous (see `is_sync`) TemplatedString into a single string, without creating any coroutines. '''
         if self.is_string:
             return self.string, ErrorLog()
+        errors = ErrorLog()
+        if self.pre_errors:
+            errors.extend(self.pre_errors)
+            if errors.terminal: return None, errors
+
+        strings = []
+        for part in self.sync_parts:
+            if isinstance(part, str):
+                strings.append(part)
+                continue
+            try:
+                items = part.evaluate(scope)
+            except ItemScopeError as e:
+                errors.log_exception(f'Error filling in item `{part}`', e)
+                return None, errors
+            # Same as in `evaluate`: Only the first item counts, or the empty string if there are none.
+            strings.append(items[0] if items else '')
+        return ''.join(strings), errors
+
+    async def evaluate(self, context: Context, scope: ItemScope=None) -> tuple[str|None, ErrorLog]:
+        ''' Evaluate the TemplatedString into a single string. '''
+        if self.is_sync:
+            return self.evaluate_sync(scope)
+        context.check_deadline()
 
         intermediate, errors = await self._intermediate_evaluate(context, scope)
         if errors.terminal:
@@ -269,10 +318,16 @@ class TemplatedString:
         flattened_str = ''.join(x if isinstance(x, str) else x[0] if x else '' for x in intermediate)
         return flattened_str, errors
 
-    async def multiple_evaluate(self, context: Context, scope: ItemScope=None) -> tuple[list[str]|None, ErrorLog]:
-        ''' Evaluate the TemplatedString into a list of strings, one for every combination of the templated element's produced values. '''
+    async def multiple_evaluate(self, context: Context, scope: ItemScope=None, max_combinations: int=None, max_chars: int=None) -> tuple[list[str]|None, ErrorLog]:
+        '''
+        Evaluate the TemplatedString into a list of strings, one for every combination of the templated element's produced values.
+
+        Combinations are produced lazily, and only up to `max_combinations` combinations or `max_chars` total characters
+            (by default `config.MAX_COMBINATIONS` and `config.MAX_COMBINATION_CHARS`), logging a warning if the output is truncated.
+        '''
         if self.is_string:
             return [self.string], ErrorLog()
+        context.check_deadline()
 
         intermediate, errors = await self._intermediate_evaluate(context, scope)
         if errors.terminal:
@@ -286,13 +341,32 @@ class TemplatedString:
             else:
                 choices_list.append(item)
 
+        if max_combinations is None: max_combinations = config.MAX_COMBINATIONS
+        if max_chars is None: max_chars = config.MAX_COMBINATION_CHARS
+
         strings = []
-        # Double reversed because we want the combinations to vary left-to-right
-        for combo in iter_product(*reversed(choices_list)):
-            strings.append(''.join(reversed(combo)))
+        chars = 0
+        truncated = False
+        for string in islice(self.iter_combinations(choices_list), max_combinations):
+            chars += len(string)
+            if max_chars is not None and chars > max_chars:
+                truncated = True
+                break
+            strings.append(string)
+
+        total = prod(len(choices) for choices in choices_list)
+        if truncated or len(strings) < total:
+            errors.log(f'Produced only the first {len(strings)} of {total} combinations of values, to stay within limits.')
 
         return strings, errors
 
+    @staticmethod
+    def iter_combinations(choices_list: list[list[str]]) -> Iterator[str]:
+        '''Lazily yield the string for each combination of choices, with the choices varying left-to-right.'''
+        # Double reversed because we want the combinations to vary left-to-right
+        for combo in iter_product(*reversed(choices_list)):
+            yield ''.join(reversed(combo))
+
     async def _intermediate_evaluate(self, context: Context, scope: ItemScope=None) -> tuple[list[str|list[str]]|None, ErrorLog]:
         ''' Evaluate the TemplatedString into an intermediate form, either to be flattened or multiplied later. '''
         errors = ErrorLog()
@@ -404,31 +478,46 @@ class TemplatedString:
         val, errs = await template.evaluate(context, scope)
         return [val], errors.extend(errs)
 
+    async def evaluate_as_items(self, context: Context, scope: ItemScope=None) -> tuple[list[str] | None, ErrorLog]:
+        '''Evaluate the TemplatedString into a list of items, where pure Source, Item or Inline Script TStrings can yield multiple strings.'''
+        if self.is_item:
+            errors = ErrorLog()
+            try:
+                return self.item.evaluate(scope), errors
+            except ItemScopeError as e:
+                errors.log_exception( f'Error filling in item `{self.item}`', e)
+                return None, errors
+        elif self.is_source:
+            return await self.source.evaluate(context, scope)
+        elif self.is_inline_script:
+            return await self.inline_script.evaluate(context, scope)
+        elif self.is_sync:
+            val, errors = self.evaluate_sync(scope)
+            return [val], errors
+        else:
+            val, errors = await self.evaluate(context, scope)
+            return [val], errors
+
     @staticmethod
     async def map_evaluate(tstrings: list['TemplatedString'], context: Context, scope: ItemScope=None) -> tuple[list[str] | None, ErrorLog]:
-        '''Evaluates and aggregates each TemplatedString in an iterable sequentially, pure Source TStrings can yield multiple strings.'''
+        '''
+        Evaluates and aggregates each TemplatedString in a list, pure Source TStrings can yield multiple strings.
+
+        TemplatedStrings that need to be awaited are evaluated concurrently, up to `config.TEMPLATE_CONCURRENCY` at a time,
+            but their values and errors are aggregated in the original order.
+        '''
         errors = ErrorLog()
 
+        # Synchronous TemplatedStrings don't need to be awaited, so there's nothing to be gained from gathering them
+        if len(tstrings) > 1 and any(not ts.is_sync for ts in tstrings):
+            results = await gather_bounded((ts.evaluate_as_items(context, scope) for ts in tstrings), config.TEMPLATE_CONCURRENCY)
+        else:
+            results = [await ts.evaluate_as_items(context, scope) for ts in tstrings]
+
         values = []
-        for tstring in tstrings:
-            if tstring.is_item:
-                try:
-                    vals = tstring.item.evaluate(scope)
-                except ItemScopeError as e:
-                    errors.log_exception( f'Error filling in item `{tstring.item}`', e)
-                if not errors.terminal: values.extend(vals)
-            elif tstring.is_source:
-                vals, errs = await tstring.source.evaluate(context, scope)
-                errors.extend(errs)
-                if not errors.terminal: values.extend(vals)
-            elif tstring.is_inline_script:
-                vals, errs = await tstring.inline_script.evaluate(context, scope)
-                errors.extend(errs)
-                if not errors.terminal: values.extend(vals)
-            else:
-                val, errs = await tstring.evaluate(context, scope)
-                errors.extend(errs)
-                if not errors.terminal: values.append(val)
+        for vals, errs in results:
+            errors.extend(errs)
+            if not errors.terminal: values.extend(vals)
 
         return (values if not errors.terminal else None, errors)
 
@@ -61,6 +61,9 @@ class ExplicitTmplItem(TmplItem):
         ('end', int | Literal[False] | None),
         ('bang', bool)
     ])
+    # NOTE: So that pickle can find them under their attribute names
+    Index.__qualname__ = 'ExplicitTmplItem.Index'
+    Range.__qualname__ = 'ExplicitTmplItem.Range'
 
     __slots__ = ('is_implicit', 'indices')
     indices: list[Index | Range]
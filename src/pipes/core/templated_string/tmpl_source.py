@@ -90,6 +90,7 @@ class TmplSource:
         errors.extend(self.pre_errors)
         NOTHING_BUT_ERRORS = (None, errors)
         if errors.terminal: return NOTHING_BUT_ERRORS
+        context.check_deadline()
 
         ## Determine the arguments if needed
         if args is None:
@@ -99,6 +100,8 @@ class TmplSource:
 
         ### CASE: Native Source
         if self.type == TmplSource.NATIVE_SOURCE:
+            if context.governor:
+                context.governor.count_source_call()
             try:
                 return await self.source.generate(context, args, n=self.amount), errors
             except Exception as e:
@@ -111,6 +114,8 @@ class TmplSource:
             remainder_str, remainder_errors = await self.remainder.evaluate(context, scope)
             errors.extend(remainder_errors, self.name)
             if errors.terminal: return NOTHING_BUT_ERRORS
+            if context.governor:
+                context.governor.count_pipe_call()
             try:
                 return await self.pipe.apply([remainder_str], context, args), errors
             except Exception as e:
@@ -130,8 +135,8 @@ class TmplSource:
                 return NOTHING_BUT_ERRORS
 
             ## STEP 2: Apply Pipeline
-            pipeline = Pipeline.from_string_with_origin(macro.code)
-            values, pl_errors, _ = await pipeline.apply((), macro_ctx)
+            pipeline = macro.get_pipeline()
+            values, pl_errors, _ = await pipeline.apply_as_macro((), macro_ctx)
             return values, errors.extend(pl_errors, self.name)
 
         ## CASE: Macro Pipe
@@ -151,8 +156,8 @@ class TmplSource:
             if errors.terminal: return NOTHING_BUT_ERRORS
 
             ## STEP 3: Apply Pipeline
-            pipeline = Pipeline.from_string(macro.code)
-            values, pl_errors, _ = await pipeline.apply([remainder_str], macro_ctx)
+            pipeline = macro.get_pipeline()
+            values, pl_errors, _ = await pipeline.apply_as_macro([remainder_str], macro_ctx)
             return values, errors.extend(pl_errors, self.name)
 
         else:
@@ -161,7 +166,6 @@ class TmplSource:
 
 
 # These lynes be down here dve to dependencyes cyrcvlaire
-from pipes.core.pipeline import Pipeline
 from pipes.implementations.sources import NATIVE_SOURCES
 from pipes.implementations.pipes import NATIVE_PIPES
 from pipes.core.macros import MACRO_SOURCES, MACRO_PIPES
@@ -20,6 +20,9 @@ def one_to_one(func):
     @wraps(func)
     def _one_to_one(input, *args, **kwargs):
         return [func(item, *args, **kwargs) for item in input]
+    # Expose the item-wise function so items may also be streamed through it one by one
+    _one_to_one.item_function = func
+    _one_to_one.item_flattens = False
     return _one_to_one
 
 def one_to_many(func):
@@ -31,6 +34,9 @@ def one_to_many(func):
     @wraps(func)
     def _one_to_many(input, *args, **kwargs):
         return [out for item in input for out in func(item, *args, **kwargs)]
+    # Expose the item-wise function so items may also be streamed through it one by one
+    _one_to_many.item_function = func
+    _one_to_many.item_flattens = True
     return _one_to_many
 
 def many_to_one(func):
@@ -95,6 +101,7 @@ def pipe_from_class(cls: type[T]) -> type[T]:
     name: str
     aliases: list[str]=None
     command: bool=False
+    pure: bool=False
 
     # Methods:
     @with_signature(...)
@@ -116,6 +123,7 @@ def pipe_from_class(cls: type[T]) -> type[T]:
         category=_PIPE_CATEGORY,
         aliases=get('aliases'),
         may_use=get('may_use'),
+        pure=get('pure', False),
     )
     NATIVE_PIPES.add(pipe, get('command', False))
     return cls
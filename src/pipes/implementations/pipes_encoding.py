@@ -11,7 +11,7 @@ from pipes.core.signature import Par, Option
 #####################################################
 set_category('ENCODING')
 
-@pipe_from_func(command=True)
+@pipe_from_func(command=True, pure=True)
 @one_to_one
 def demoji_pipe(text):
     '''Replaces emoji in text with their official names.'''
@@ -27,7 +27,7 @@ def demoji_pipe(text):
     return ''.join(out)
 
 
-@pipe_from_func(command=True)
+@pipe_from_func(command=True, pure=True)
 @one_to_one
 def unicode_pipe(text):
     '''Replaces unicode characters with their official names.'''
@@ -40,7 +40,7 @@ def unicode_pipe(text):
 
 @pipe_from_func({
     'by': Par(int, 13, 'The number of places to rotate the letters by.'),
-}, command=True)
+}, command=True, pure=True)
 @one_to_one
 def rot_pipe(text, by):
     '''Applies a Caeserian cypher.'''
@@ -56,28 +56,28 @@ def rot_pipe(text, by):
     return ''.join(out)
 
 
-@pipe_from_func
+@pipe_from_func(pure=True)
 @one_to_many
 def ord_pipe(text):
     '''Turns each item into a sequence of integers representing each character.'''
     return [str(ord(s)) for s in text]
 
 
-@pipe_from_func
+@pipe_from_func(pure=True)
 @many_to_one
 def chr_pipe(chars):
     '''Turns a sequence of integers representing characters into a single string.'''
     return [''.join(chr(int(c)) for c in chars)]
 
 
-@pipe_from_func
+@pipe_from_func(pure=True)
 @one_to_one
 def url_encode_pipe(text):
     '''Turns a string into a URL (%) encoded string.'''
     return urllib.parse.quote(text)
 
 
-@pipe_from_func
+@pipe_from_func(pure=True)
 @one_to_one
 def url_decode_pipe(text):
     '''Turns a URL (%) encoded string into its original string.'''
@@ -86,9 +86,10 @@ def url_decode_pipe(text):
 
 HASH_ALG = Option('python', 'blake2b', 'sha224', 'shake_128', 'sha3_384', 'md5', 'sha3_512', 'blake2s', 'sha256', 'sha1', 'sha3_224', 'shake_256', 'sha3_256', 'sha512', 'sha384', name='algorithm')
 
+# NOTE: Python's own hash of a string differs between restarts, so it's only pure for the other algorithms
 @pipe_from_func({
     'algorithm': Par(HASH_ALG, 'python', 'The hash algorithm to use.')
-})
+}, pure=lambda args: args['algorithm'] != HASH_ALG.python)
 @one_to_one
 def hash_pipe(text: str, algorithm: HASH_ALG) -> str:
     '''Applies a hash function.'''
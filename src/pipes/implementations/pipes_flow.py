@@ -1,7 +1,7 @@
 import random
 import math
 
-from .pipes import pipe_from_func, many_to_one, set_category
+from .pipes import pipe_from_func, one_to_many, many_to_one, set_category
 from pipes.core.signature import Par, Option, with_signature
 from utils.rand import choose_slice
 from utils.util import parse_bool
@@ -12,7 +12,7 @@ from utils.util import parse_bool
 #####################################################
 set_category('FLOW')
 
-@pipe_from_func
+@pipe_from_func(pure=True)
 @with_signature(
     times = Par(int, None, 'Number of times repeated'),
     max   = Par(int, -1, 'Maximum number of outputs produced, -1 for unlimited.')
@@ -30,8 +30,9 @@ REMOVE_WHAT = Option('all', 'empty', 'whitespace')
 
 @pipe_from_func({ 
     'what': Par(REMOVE_WHAT, REMOVE_WHAT.all, 'What to filter: all/empty/whitespace') 
-})
-def remove_pipe(items, what):
+}, pure=True)
+@one_to_many
+def remove_pipe(item, what):
     '''
     Removes all items (or specific types of items) from the flow.
 
@@ -39,15 +40,16 @@ def remove_pipe(items, what):
     whitespace: Removes items that only consist of whitespace (including empty ones)
     empty: Only removes items equal to the empty string ("")
     '''
+    # NOTE: Written item by item so that it can be streamed, see StreamedRun
     if what == REMOVE_WHAT.all:
         return []
     if what == REMOVE_WHAT.whitespace:
-        return [x for x in items if x.strip()]
+        return [item] if item.strip() else []
     if what == REMOVE_WHAT.empty:
-        return [x for x in items if x]
+        return [item] if item else []
 
 
-@pipe_from_func
+@pipe_from_func(pure=True)
 def sort_pipe(input):
     '''Sorts the input values lexicographically.'''
     # IMPORTANT: `input` is passed BY REFERENCE, so we are NOT supposed to mess with it!
@@ -56,7 +58,7 @@ def sort_pipe(input):
     return out
 
 
-@pipe_from_func
+@pipe_from_func(pure=True)
 def reverse_pipe(input):
     '''Reverses the order of input items.'''
     return input[::-1]
@@ -119,7 +121,7 @@ def unique_pipe(input, count):
     return [x for tup in zip(values, counts) for x in tup]
 
 
-@pipe_from_func
+@pipe_from_func(pure=True)
 @many_to_one
 def count_pipe(input):
     '''Counts the number of input items.'''
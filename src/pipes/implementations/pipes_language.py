@@ -165,7 +165,7 @@ def detect_language_pipe(text):
     return translate_v2_client.detect_language(text)['language']
 
 
-@pipe_from_func
+@pipe_from_func(pure=True)
 @one_to_many
 def split_sentences_pipe(line):
     ''' Splits text into individual sentences using the Natural Language Toolkit (NLTK). '''
@@ -175,7 +175,7 @@ def split_sentences_pipe(line):
 NUM2WORDS_LANG = Option(*num2words.CONVERTER_CLASSES, name='Language', stringy=True)
 NUM2WORDS_TYPE = Option(*num2words.CONVERTES_TYPES, name='Type', stringy=True)
 
-@pipe_from_func(aliases=['num2word'], command=True)
+@pipe_from_func(aliases=['num2word'], command=True, pure=True)
 @with_signature(
     lang = Par(NUM2WORDS_LANG, 'en', 'The language'),
     type = Par(NUM2WORDS_TYPE, 'cardinal', '/'.join(NUM2WORDS_TYPE)),
@@ -229,7 +229,7 @@ POS_TAG = Option('ADJ', 'ADJ', 'ADP', 'PUNCT', 'ADV', 'AUX', 'SYM', 'INTJ', 'CON
 @pipe_from_func({
     'include': Par(ListOf(POS_TAG), None, 'Which POS tags to replace, separated by commas. If blank, uses the `exclude` list instead.', required=False),
     'exclude': Par(ListOf(POS_TAG), 'PUNCT,SPACE,SYM,X', 'Which POS tags not to replace, separated by commas. Ignored if `include` is given.')
-})
+}, pure=True)
 @one_to_one
 def pos_unfill_pipe(text, include, exclude):
     '''
@@ -246,7 +246,7 @@ def pos_unfill_pipe(text, include, exclude):
         return ''.join( f'%{t.pos_}%{t.whitespace_}' if t.pos_ not in exclude else t.text_with_ws for t in doc )
 
 
-@pipe_from_func
+@pipe_from_func(pure=True)
 @one_to_many
 def pos_analyse_pipe(text):
     '''
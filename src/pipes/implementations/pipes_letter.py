@@ -48,7 +48,7 @@ def letterize2_pipe(text, p):
 
 @pipe_from_func({
     'to' : Par(Option(*converters, stringy=True), None, 'Which conversion should be used.'),
-}, command=True)
+}, command=True, pure=True)
 @one_to_one
 @util.format_doc(convs=', '.join(converters))
 def convert_pipe(text, to):
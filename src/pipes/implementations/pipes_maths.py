@@ -55,7 +55,7 @@ SIMPLE_EVAL = SimpleEval(functions=MATH_FUNCTIONS, names={'e': math.e, 'pi': mat
 
 @pipe_from_func({
     'expr': Par(str, None, 'The mathematical expression to evaluate. Use {} notation to insert items into the expression.')
-}, command=True)
+}, command=True, pure=True)
 @many_to_one
 @util.format_doc(funcs=', '.join(c for c in MATH_FUNCTIONS))
 def math_pipe(values, expr):
@@ -70,28 +70,28 @@ def math_pipe(values, expr):
     return [ smart_format(SIMPLE_EVAL.eval(expr)) ]
 
 
-@pipe_from_func
+@pipe_from_func(pure=True)
 @many_to_one
 def min_pipe(values):
     ''' Produces the minimum value of the inputs evaluated as numbers. '''
     return [smart_format(min(float(x) for x in values))]
 
 
-@pipe_from_func
+@pipe_from_func(pure=True)
 @many_to_one
 def max_pipe(values):
     ''' Produces the maximum value of the inputs evaluated as numbers. '''
     return [smart_format(max(float(x) for x in values))]
 
 
-@pipe_from_func
+@pipe_from_func(pure=True)
 @many_to_one
 def sum_pipe(values):
     ''' Produces the sum of the inputs evaluated as numbers. '''
     return [smart_format(sum(float(x) for x in values))]
 
 
-@pipe_from_func
+@pipe_from_func(pure=True)
 @many_to_one
 def avg_pipe(values):
     ''' Produces the mean average of the inputs evaluated as numbers. '''
@@ -2,7 +2,8 @@ from .pipes import pipe_from_func, many_to_one, set_category, smart_pipe
 from pipes.core.signature import Par
 from pipes.core.state import ErrorLog, Context
 from pipes.core.templated_string.templated_string import TemplatedString
-from utils.util import parse_bool
+from pipes.core import config
+from utils.util import parse_bool, gather_bounded
 
 
 #####################################################
@@ -10,6 +11,7 @@ from utils.util import parse_bool
 #####################################################
 set_category('META')
 
+# NOTE: Not pure, since a format like "{0.join}" produces a method's repr, which includes its memory address
 @pipe_from_func({
     'f': Par(str, None, 'The format string. Items of the form {0}, {1} etc. are replaced with the respective item at that index, twice.')
 })
@@ -32,14 +34,17 @@ def format2_pipe(input, f):
 
 
 @pipe_from_func({
-    'force_single': Par(parse_bool, False, 'Whether to force each input string to evaluate to one output string.')
+    'force_single': Par(parse_bool, False, 'Whether to force each input string to evaluate to one output string.'),
+    'deduplicate': Par(parse_bool, False, 'Whether identical input strings are only evaluated once, reusing the results.'),
 })
 @smart_pipe
-async def evaluate_sources_pipe(items: list[str], context: Context, force_single: bool):
+async def evaluate_sources_pipe(items: list[str], context: Context, force_single: bool, deduplicate: bool):
     '''
     Evaluates Sources in the literal strings it receives.
 
     Evaluation of these Sources is constrained for safety reasons.
+    Strings are evaluated concurrently, but the output stays in the same order.
+    Use `deduplicate` to evaluate repeated strings only once; this changes the output if they contain random Sources.
     '''
     errors = ErrorLog()
     # Create a limited (?) Context for evaluating the TemplatedStrings
@@ -52,13 +57,23 @@ async def evaluate_sources_pipe(items: list[str], context: Context, force_single
         author=None,
         message=context.message,
     )
+    # It does count towards the current execution's budget however
+    eval_context.governor = context.governor
     output = []
     try:
-        for item in items:
-            values, errs = await TemplatedString.evaluate_string(item, eval_context, force_single=force_single)
+        # The strings are evaluated without any items in scope, so identical strings are identical templates with identical inputs
+        unique = list(dict.fromkeys(items)) if deduplicate else items
+        results = await gather_bounded(
+            (TemplatedString.evaluate_string(item, eval_context, force_single=force_single) for item in unique),
+            config.TEMPLATE_CONCURRENCY
+        )
+        if deduplicate:
+            results_by_item = dict(zip(unique, results))
+            results = [results_by_item[item] for item in items]
+        for values, errs in results:
             if values: output.extend(values)
             errors.extend(errs)
-    except:
+    except Exception:
         raise ValueError('Bad source strings! (Can\'t tell you specific errors right now sorry.)')
     if errors.terminal:
         raise ValueError('Bad source strings! (Can\'t tell you specific errors right now sorry.)')
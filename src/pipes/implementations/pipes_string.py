@@ -20,7 +20,7 @@ set_category('STRING')
 
 @pipe_from_func({
     'f' : Par(str, None, 'The format string. Items of the form {0}, {1} etc. are replaced with the respective item at that index.')
-})
+}, pure=True)
 @many_to_one
 def format_pipe(input, f):
     ''' Formats inputs according to a given template. '''
@@ -28,14 +28,14 @@ def format_pipe(input, f):
     return [f]
 
 
-@pipe_from_func
+@pipe_from_func(pure=True)
 @one_to_one
 def reverse_text_pipe(text):
     ''' Reverses each text string individually. '''
     return text[::-1]
 
 
-@pipe_from_func
+@pipe_from_func(pure=True)
 @many_to_one
 def length_pipe(input):
     ''' Gives the total length in characters of all items. '''
@@ -45,7 +45,7 @@ def length_pipe(input):
 @pipe_from_func({
     'on' : Par(regex, None, 'Pattern to split on'),
     'lim': Par(int, 0, 'Maximum number of splits. (0 for no limit)')
-})
+}, pure=True)
 @one_to_many
 def split_pipe(text, on, lim):
     '''Splits the input into multiple outputs according to a pattern.'''
@@ -54,7 +54,7 @@ def split_pipe(text, on, lim):
 
 @pipe_from_func({
     's' : Par(str, '', 'The separator inserted between two items.')
-})
+}, pure=True)
 @many_to_one
 def join_pipe(input, s):
     ''' Joins inputs into a single item, separated by the given separator. '''
@@ -63,7 +63,7 @@ def join_pipe(input, s):
 
 @pipe_from_func({
     'pattern': Par(regex, None, 'The pattern to find')
-})
+}, pure=True)
 @one_to_many
 def find_all_pipe(text, pattern):
     '''
@@ -80,7 +80,7 @@ def find_all_pipe(text, pattern):
 @pipe_from_func({
     'from': Par(regex, None, 'Pattern to replace'),
     'to' : Par(str, None, 'Replacement string'),
-})
+}, pure=True)
 @one_to_one
 def sub_pipe(text, to, **kwargs):
     '''
@@ -135,7 +135,7 @@ DIRECTION = Option(
 @pipe_from_func({
     'width': Par(int, None, 'How many characters to trim each string down to.'),
     'where': Par(DIRECTION, DIRECTION.right, 'Which side to trim from: left/center/right'),
-})
+}, pure=True)
 @one_to_one
 def trim_pipe(text, width, where):
     ''' Trims input text to a certain width, discarding the rest. '''
@@ -152,7 +152,7 @@ def trim_pipe(text, width, where):
     'width': Par(int, None, 'The minimum width to pad to.'),
     'where': Par(DIRECTION, DIRECTION.right, 'Which side to pad on: left/center/right'),
     'fill' : Par(str, ' ', 'The character used to pad out the string.'),
-})
+}, pure=True)
 @one_to_one
 def pad_pipe(text, where, width, fill):
     ''' Pads input text to a certain width. '''
@@ -164,7 +164,7 @@ def pad_pipe(text, where, width, fill):
         return text.ljust(width, fill)
 
 
-@pipe_from_func
+@pipe_from_func(pure=True)
 @one_to_one
 def strip_pipe(value):
     ''' Strips whitespace from the start and end of each input text. '''
@@ -176,7 +176,7 @@ WRAP_MODE = Option('dumb', 'smart')
 @pipe_from_func({
     'mode' : Par(WRAP_MODE, WRAP_MODE.smart, 'How to wrap: dumb (char-by-char) or smart (on spaces).'),
     'width': Par(int, 40, 'The minimum width to pad to.')
-})
+}, pure=True)
 @one_to_many
 def wrap_pipe(text, mode, width):
     '''
@@ -191,7 +191,7 @@ def wrap_pipe(text, mode, width):
 
 @pipe_from_func({
     'pattern': Par(str, None, 'Case pattern to apply'),
-})
+}, pure=True)
 def case_pipe(inputs, pattern):
     '''
     Converts the case of each input according to a pattern.
@@ -219,7 +219,7 @@ def case_pipe(inputs, pattern):
     'sep':        Par(str, ' │ ', 'The column separator'),
     'max_width':  Par(int, 100, 'The maximum desired width the output table should have, -1 for no limit.'),
     'code_block': Par(parse_bool, True, 'If the table should be wrapped in a Discord code block (triple backticks).'),
-})
+}, pure=True)
 @many_to_one
 def table_pipe(input, columns, alignments, sep, code_block, max_width):
     '''
@@ -342,7 +342,7 @@ class MapType:
     'default': Par(str, None, 'The default fallback value. Leave undefined to cause an error instead.', required=False),
     'case': Par(parse_bool, False, 'If mapping should be case sensitive.'),
     'invert': Par(parse_bool, False, 'If the map should map inversely (i.e. values to keys).'),
-})
+}, pure=True)
 @one_to_one
 def map_pipe(item: str, map: MapType, case: bool, invert: bool, default: str):
     '''
@@ -57,6 +57,8 @@ def source_from_func(signature: dict[str, Par]=None, /, *, command=False, **kwar
     * plural: The source's name pluralised, to use as an alias (default: name + 's')
     * depletable: If True, it is allowed to request "ALL" of a source. (e.g. "{all words}" instead of just "{10 words}"),
     in this case `n` will be passed as -1 (default: False)
+    * stable: If True, the source produces the same values for the same arguments throughout a script execution,
+    so they are memoized for the duration of the execution (default: False)
     '''
     func = None
     if callable(signature):
@@ -87,6 +89,7 @@ def source_from_class(cls: type[T]) -> type[T]:
     plural: str=None
     aliases: list[str]=None
     depletable: bool=False
+    stable: bool=False
     command: bool=False
 
     # Methods:
@@ -110,6 +113,7 @@ def source_from_class(cls: type[T]) -> type[T]:
         category=_CATEGORY,
         aliases=get('aliases'),
         depletable=get('depletable', False),
+        stable=get('stable', False),
         may_use=get('may_use'),
     )
     NATIVE_SOURCES.add(source, get('command', False))
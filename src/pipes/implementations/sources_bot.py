@@ -8,7 +8,7 @@ from pipes.core.signature import Par, with_signature, parse_bool
 #####################################################
 set_category('BOT')
 
-@source_from_func
+@source_from_func(stable=True)
 async def output_source(ctx: Context):
     '''The full output from the previous script that was ran in this channel.'''
     return BOT_STATE.previous_pipeline_output[ctx.channel]
@@ -19,6 +19,7 @@ class SourceGet:
     '''Loads variables stored using the `set` spout.'''
     name = 'get'
     command = True
+    stable = True
 
     @with_signature(
         name    = Par(str, None, 'The variable name'),
@@ -46,6 +47,7 @@ class SourceArg:
     OnReact: `{arg emoji}` is the emoji that was reacted with.
     '''
     name = 'arg'
+    stable = True
 
     @with_signature(
         name    = Par(str, None, 'The parameter name'),
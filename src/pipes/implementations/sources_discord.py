@@ -61,7 +61,7 @@ async def next_message_source(ctx: Context, n, what):
     return messages_get_what(messages, what)
 
 
-@source_from_func(aliases=['this'])
+@source_from_func(aliases=['this'], stable=True)
 @with_signature(
     what = Par(ListOf(MESSAGE_WHAT), 'content', '/'.join(MESSAGE_WHAT)),
     id = Par(str, 'this', 'Which message to read from: That/this or message ID (in this channel).'),
@@ -154,7 +154,7 @@ def members_get_what(members: list[discord.Member], what):
     raise ValueError()
 
 
-@source_from_func(aliases=['my'])
+@source_from_func(aliases=['my'], stable=True)
 @with_signature(
     what = Par(ListOf(MEMBER_WHAT), 'name', '/'.join(MEMBER_WHAT)),
 )
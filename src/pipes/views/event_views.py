@@ -36,7 +36,7 @@ class EditEventModal(ui.Modal):
             ## Statically check the new script if needed
             script_value = self.script_input.value
             if script_value != self.event.script:
-                errors = ExecutableScript.from_string(script_value).get_static_errors()
+                errors = ExecutableScript.from_string(script_value).get_definition_errors()
                 if errors.terminal:
                     msg = f'Failed to update Event script\n{block_format(script_value)} due to errors:'
                     # TODO: "save changes anyway" View
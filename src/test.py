@@ -16,6 +16,8 @@ from pipes.core.signature import Arguments
 from pipes.core.templated_string.templated_string import TemplatedString
 from pipes.core.conditions import Condition
 from pipes.core.executable_script import ExecutableScript
+from pipes.core.pipeline import Pipeline
+from pipes.core import parse_cache
 
 from pipes.implementations.pipes import NATIVE_PIPES
 from pipes.core.macros import Macro, MACRO_SOURCES, MACRO_PIPES
@@ -245,6 +247,22 @@ async def statically_analyse_all_macros_and_events():
         print()
 
 
+async def time_parse_all_macros_and_events():
+    '''Parses all Macros and Events from scratch, to check for parse errors and see how long parsing takes.'''
+    codes = [macro.code for macro in itertools.chain(MACRO_PIPES.values(), MACRO_SOURCES.values())]
+    codes += [event.script for event in ALL_EVENTS.values()]
+
+    def parse_all():
+        parse_cache.clear_all()
+        return [Pipeline.from_string(code) for code in codes]
+
+    for code, pipeline in zip(codes, parse_all()):
+        if pipeline.parser_errors:
+            print('\nParse errors in:', code)
+            print(pipeline.parser_errors)
+    print('\nTIME:', timeit.timeit('parse()', globals={'parse': parse_all}, number=1), 'CODES:', len(codes))
+
+
 async def test_script(pl_str):
     pl = ExecutableScript.from_string(pl_str)
 
@@ -289,6 +307,7 @@ if __name__ == '__main__':
         # asyncio.run(test_multiple_evaluate())
 
         # asyncio.run(statically_analyse_all_macros_and_events())
+        # asyncio.run(time_parse_all_macros_and_events())
 
         asyncio.run(test_script_cli())
 
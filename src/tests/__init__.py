@@ -0,0 +1,6 @@
+'''
+Regression tests for Rezbot scripting, run from the src directory using either
+    python -m unittest discover tests
+or
+    python -m pytest tests
+'''
@@ -0,0 +1,104 @@
+'''
+Shared utilities for the tests: A stub Context, shortcuts for running scripts, and Pipes and Sources that only exist for testing.
+'''
+import re
+import asyncio
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Callable
+from contextlib import contextmanager
+from unittest.mock import patch
+
+# NOTE: Same import order as test.py, so the circular imports resolve the same way
+import pipes.core.grammar
+from pipes.core.state import Context, ErrorLog, SpoutState, Governor, ExecutionBudget
+from pipes.core.signature import Signature
+from pipes.core.pipeline import Pipeline
+from pipes.core.pipe import Pipe, Source
+from pipes.implementations.pipes import NATIVE_PIPES
+from pipes.implementations.sources import NATIVE_SOURCES
+from pipes.core.macros import Macro, MACRO_PIPES, MACRO_SOURCES
+from pipes.core import parse_cache, config
+
+
+ACTIVATOR = SimpleNamespace(id=0, name='tester', display_name='Tester')
+'Stub Member who activates every test script.'
+
+
+def make_context(*, governor: Governor=None, **kwargs) -> Context:
+    '''Create a Context for a test script, which only has an activator, and optionally a Governor.'''
+    context = Context(
+        origin=Context.Origin(Context.Origin.Type.COMMAND, name='Test context', activator=ACTIVATOR),
+        **kwargs
+    )
+    context.governor = governor
+    return context
+
+
+def make_governor(**limits) -> Governor:
+    '''Create a Governor whose budget is unlimited except for the given limits.'''
+    return Governor(ExecutionBudget(**{key: None for key in ExecutionBudget.LIMITS} | limits))
+
+
+async def run_script(script: str, context: Context=None, items: list[str]=()) -> tuple[list[str] | None, ErrorLog, SpoutState]:
+    '''Parse and apply a script (which starts with an origin, without the leading ">>"), returning its values, errors and SpoutState.'''
+    pipeline = Pipeline.from_string_with_origin(script)
+    return await pipeline.apply(list(items), context or make_context())
+
+
+def guide_scripts() -> list[str]:
+    '''All inline example scripts from PIPESGUIDE.md, without their leading ">>".'''
+    guide = (Path(__file__).parents[2] / 'PIPESGUIDE.md').read_text(encoding='utf-8')
+    return [script.strip() for script in re.findall(r'`>>([^`]+)`', guide)]
+
+
+def register_pipe(name: str, function: Callable, signature: Signature=None, **kwargs) -> Pipe:
+    '''Register a Pipe that only exists for testing, unless it was already registered.'''
+    if name not in NATIVE_PIPES:
+        NATIVE_PIPES.add(Pipe(signature or Signature({}), function, name=name, **kwargs))
+    return NATIVE_PIPES[name]
+
+def register_source(name: str, function: Callable, signature: Signature=None, **kwargs) -> Source:
+    '''Register a Source that only exists for testing, unless it was already registered.'''
+    if name not in NATIVE_SOURCES:
+        NATIVE_SOURCES.add(Source(signature or Signature({}), function, name=name, plural=False, **kwargs))
+    return NATIVE_SOURCES[name]
+
+
+@contextmanager
+def temporary_macros():
+    '''
+    Context manager within which Macros can be defined without writing them or their compiled Pipelines to disk,
+        and which are all forgotten afterwards. Also clears the parse caches, which may hold parse results from before.
+    '''
+    parse_cache.clear_all()
+    with patch.object(MACRO_PIPES, 'macros', {}), patch.object(MACRO_PIPES, 'write'), \
+            patch.object(MACRO_SOURCES, 'macros', {}), patch.object(MACRO_SOURCES, 'write'), \
+            patch.object(config, 'PERSIST_COMPILED', False):
+        try:
+            yield
+        finally:
+            parse_cache.clear_all()
+
+def define_macro(name: str, code: str, kind: str='Pipe') -> Macro:
+    '''Define a Macro, only to be used inside `temporary_macros`.'''
+    macro = Macro(kind, name, code, ACTIVATOR.name, ACTIVATOR.id)
+    (MACRO_PIPES if kind == 'Pipe' else MACRO_SOURCES)[name] = macro
+    return macro
+
+
+class CallLog:
+    '''Records the calls made to test Pipes and Sources, and how many of them were running at the same time.'''
+    def __init__(self):
+        self.calls: list[str] = []
+        self.running = 0
+        self.max_running = 0
+
+    async def record(self, value: str, delay: float=0):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(delay)
+            self.calls.append(value)
+        finally:
+            self.running -= 1
@@ -0,0 +1,49 @@
+'''
+Tests for the memoization of pure Pipe applications.
+'''
+import unittest
+
+from pipes.core.pipe import Pipe
+from pipes.core.signature import Signature, Par
+from tests.helpers import make_context, register_pipe
+
+
+CALLS: list[list[str]] = []
+
+class Wrapped:
+    '''Argument type compared by identity, like the `map` Pipe's.'''
+    def __init__(self, text: str):
+        self.text = text
+
+def counting_pipe(items: list[str], suffix: str):
+    '''Adds the suffix to each item, keeping track of its calls.'''
+    CALLS.append(list(items))
+    return [item + suffix for item in items]
+
+def counting_wrapped_pipe(items: list[str], suffix: Wrapped):
+    '''Adds the wrapped suffix to each item, keeping track of its calls.'''
+    CALLS.append(list(items))
+    return [item + suffix.text for item in items]
+
+PIPE = register_pipe('test_memo', counting_pipe, Signature({'suffix': Par(str, '!')}), pure=True)
+WRAPPED_PIPE = register_pipe('test_memo_wrapped', counting_wrapped_pipe, Signature({'suffix': Par(Wrapped, '!')}), pure=True)
+
+
+class TestApplyCache(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        CALLS.clear()
+        Pipe.APPLY_CACHE.clear()
+
+    async def test_memoizes_equal_arguments(self):
+        context = make_context()
+        self.assertEqual(await PIPE.apply(['a', 'b'], context, {'suffix': '?'}), ['a?', 'b?'])
+        self.assertEqual(await PIPE.apply(['a', 'b'], context, {'suffix': '?'}), ['a?', 'b?'])
+        self.assertEqual(await PIPE.apply(['a', 'b'], context, {'suffix': '!'}), ['a!', 'b!'])
+        self.assertEqual(len(CALLS), 2)
+
+    async def test_skips_arguments_compared_by_identity(self):
+        context = make_context()
+        for _ in range(3):
+            self.assertEqual(await WRAPPED_PIPE.apply(['a'], context, {'suffix': Wrapped('?')}), ['a?'])
+        self.assertEqual(len(CALLS), 3)
+        self.assertEqual(len(Pipe.APPLY_CACHE), 0)
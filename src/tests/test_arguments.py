@@ -0,0 +1,63 @@
+'''
+Tests for determining a Pipe's arguments: Arguments that need awaiting are determined concurrently,
+    but exceeding the budget in one of them must not leave the others running or any coroutines un-awaited.
+'''
+import gc
+import asyncio
+import unittest
+import warnings
+
+from pipes.core.pipeline import ParsedPipe
+from pipes.core.signature import Signature, Par
+from pipes.core.state import BudgetExceededError
+from tests.helpers import run_script, make_context, make_governor, register_pipe, register_source, CallLog
+
+
+LOG = CallLog()
+
+def joining_pipe(items: list[str], first: str, second: str):
+    '''Appends both arguments to each item.'''
+    return [item + first + second for item in items]
+
+async def slow_source(context):
+    '''Produces a single value after a short delay.'''
+    await LOG.record('slow', 0.03)
+    return ['s']
+
+async def exceeding_source(context):
+    '''Exceeds the budget right away.'''
+    raise BudgetExceededError('Failing on purpose.')
+
+register_pipe('test_two_args', joining_pipe, Signature({'first': Par(str), 'second': Par(str)}))
+register_source('test_arg_slow', slow_source)
+register_source('test_arg_exceeding', exceeding_source)
+
+
+class TestArguments(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        LOG.__init__()
+
+    async def test_determined_concurrently(self):
+        values, errors, _ = await run_script('x > test_two_args first={test_arg_slow} second={test_arg_slow}')
+        self.assertFalse(errors.terminal, str(errors))
+        self.assertEqual(values, ['xss'])
+        self.assertEqual(LOG.max_running, 2)
+
+    async def test_exceeding_budget_cancels_other_arguments(self):
+        before = asyncio.all_tasks()
+        with self.assertRaises(BudgetExceededError):
+            await run_script('x > test_two_args first={test_arg_slow} second={test_arg_exceeding}', make_context(governor=make_governor()))
+        self.assertEqual(asyncio.all_tasks() - before, set())
+        await asyncio.sleep(0.05)
+        self.assertEqual(LOG.calls, [])
+
+    async def test_exceeded_budget_leaves_no_coroutines(self):
+        arguments = ParsedPipe.from_string('test_two_args first={test_arg_slow} second={test_arg_slow}').arguments
+        governor = make_governor()
+        governor.exceeded = 'Exceeded on purpose.'
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            with self.assertRaises(BudgetExceededError):
+                await arguments.determine(make_context(governor=governor))
+            gc.collect()
+        self.assertEqual([str(warning.message) for warning in caught if warning.category is RuntimeWarning], [])
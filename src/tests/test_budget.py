@@ -0,0 +1,116 @@
+'''
+Tests for execution budgets: A script exceeding its budget is halted with a BudgetExceededError, wherever it happens.
+'''
+import asyncio
+import unittest
+from unittest.mock import patch
+
+from pipes.core import config
+from pipes.core.state import BudgetExceededError
+from tests.helpers import run_script, make_context, make_governor, register_pipe, register_source, temporary_macros, define_macro
+
+
+def identity_pipe(items: list[str]):
+    '''Returns its items as they are, without being pure.'''
+    return list(items)
+
+async def sleep_pipe(items: list[str]):
+    '''Returns its items as they are, after a short delay.'''
+    await asyncio.sleep(0.02)
+    return list(items)
+
+async def value_source(context):
+    '''Produces a single constant value.'''
+    return ['v']
+
+register_pipe('test_identity', identity_pipe)
+register_pipe('test_sleep', sleep_pipe)
+register_source('test_value', value_source)
+
+
+class TestBudget(unittest.IsolatedAsyncioTestCase):
+    async def assertExceeds(self, script: str, message: str, **limits) -> BudgetExceededError:
+        context = make_context(governor=make_governor(**limits))
+        with self.assertRaises(BudgetExceededError) as cm:
+            await run_script(script, context)
+        self.assertIn(message, str(cm.exception))
+        return cm.exception
+
+    async def test_within_budget(self):
+        context = make_context(governor=make_governor(max_pipe_calls=3, max_items=10))
+        values, errors, _ = await run_script('a|b > test_identity > test_identity > test_identity', context)
+        self.assertFalse(errors.terminal, str(errors))
+        self.assertEqual(values, ['a', 'b'])
+
+    async def test_pipe_calls(self):
+        await self.assertExceeds('a > test_identity > test_identity > test_identity', 'Pipes over 2 times', max_pipe_calls=2)
+
+    async def test_source_calls(self):
+        await self.assertExceeds('{test_value} {test_value} {test_value}', 'Sources over 2 times', max_source_calls=2)
+
+    async def test_items(self):
+        await self.assertExceeds('a|b|c|d > test_identity', 'over 3 items', max_items=3)
+
+    async def test_deadline(self):
+        await self.assertExceeds('a > test_sleep > test_sleep > test_sleep > test_sleep', 'longer than 0.03 seconds', max_seconds=0.03)
+
+    async def test_evaluate_sources_counts_towards_budget(self):
+        # The Sources are only evaluated by evaluate_sources, which must neither escape the budget nor turn exceeding it into a Pipe error
+        await self.assertExceeds('~{test_value~}|~{test_value~}|~{test_value~} > evaluate_sources', 'Sources over 2 times', max_source_calls=2)
+
+    async def test_evaluate_sources_deduplicates(self):
+        # Identical strings are only evaluated once, so the Source is only called once
+        context = make_context(governor=make_governor(max_source_calls=1))
+        values, errors, _ = await run_script('~{test_value~}|~{test_value~}|~{test_value~} > evaluate_sources deduplicate=true', context)
+        self.assertFalse(errors.terminal, str(errors))
+        self.assertEqual(values, ['v', 'v', 'v'])
+
+    async def test_macro_depth(self):
+        with temporary_macros():
+            define_macro('test_recursion', 'test_recursion')
+            error = await self.assertExceeds('a > test_recursion', 'over 5 levels deep', max_macro_depth=5)
+            self.assertIn('`test_recursion` → `test_recursion`', str(error))
+
+    async def test_ungoverned_macro_depth(self):
+        # A Macro called outside of a Governed execution starts its own, with the configured budget
+        with temporary_macros():
+            define_macro('test_recursion', 'test_recursion')
+            with self.assertRaises(BudgetExceededError) as cm:
+                await run_script('a > test_recursion')
+            self.assertIn('levels deep', str(cm.exception))
+
+
+class TestMacroTrampoline(unittest.IsolatedAsyncioTestCase):
+    DEPTH = 200
+
+    def setUp(self):
+        # Otherwise the chain would simply be spliced into a single Pipeline
+        self.enterContext(patch.object(config, 'INLINE_MACROS', False))
+
+    def define_chain(self, last: str):
+        '''Define Macros `test_chain0` through `test_chainN`, each calling the next, with the last one running the given script.'''
+        for i in range(self.DEPTH):
+            define_macro(f'test_chain{i}', f'test_chain{i+1}')
+        define_macro(f'test_chain{self.DEPTH}', last)
+
+    async def test_deep_macro_chain(self):
+        with temporary_macros():
+            self.define_chain('format f="{0}!"')
+            context = make_context(governor=make_governor())
+            values, errors, _ = await run_script('a > test_chain0', context)
+            self.assertFalse(errors.terminal, str(errors))
+            self.assertEqual(values, ['a!'])
+
+    async def test_cancelling_deep_macro_chain(self):
+        with temporary_macros():
+            self.define_chain('test_sleep > test_sleep > test_sleep')
+            context = make_context(governor=make_governor())
+            before = asyncio.all_tasks()
+            task = asyncio.create_task(run_script('a > test_chain0', context))
+            await asyncio.sleep(0.03)
+            self.assertGreater(len(asyncio.all_tasks() - before), 1, 'Deep Macro calls should run in separate Tasks')
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            # Every Task started along the Macro call chain is cancelled along with it
+            self.assertEqual(asyncio.all_tasks() - before, set())
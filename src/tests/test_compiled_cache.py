@@ -0,0 +1,100 @@
+'''
+Tests for the on-disk cache of compiled scripts: Pipelines must survive the round trip unchanged, and stale files must be cleaned up.
+'''
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from pipes.core import compiled_cache, config, parse_cache
+from pipes.core.pipeline import Pipeline
+from pipes.core.macros import MACRO_PIPES
+from tests.helpers import guide_scripts, temporary_macros, define_macro, make_context, make_governor
+
+
+SCRIPTS = guide_scripts() + [
+    'a|b|c > (1) format f="{0} and {word}" > [convert fraktur | nop]',
+    'x > ( format f="({0})" > repeat times=2 ) > join s="|"',
+    'hello > convert fraktur > {0} {word}',
+]
+
+
+class TestCompiledCache(unittest.TestCase):
+    def setUp(self):
+        directory = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(patch.object(compiled_cache, 'DIR', lambda filename='': os.path.join(directory, filename)))
+        self.enterContext(patch.object(config, 'PERSIST_COMPILED', True))
+        self.enterContext(patch.object(config, 'COMPILED_CACHE_MAX_FILES', 3))
+        self.compiled = []
+        # Folding modifies the Pipelines shared through the parse cache
+        parse_cache.clear_all()
+
+    def compile(self, code: str) -> Pipeline:
+        self.compiled.append(code)
+        return Pipeline.from_string_with_origin(code)
+
+    def load_or_compile(self, code: str) -> Pipeline:
+        return compiled_cache.load_or_compile('event', code, self.compile)
+
+    def test_round_trip(self):
+        for script in SCRIPTS:
+            with self.subTest(script=script):
+                pipeline = Pipeline.from_string_with_origin(script)
+                loaded = compiled_cache.loads(compiled_cache.dumps(pipeline))
+                self.assertEqual(repr(loaded), repr(pipeline))
+                self.assertEqual(str(loaded.get_static_errors()), str(pipeline.get_static_errors()))
+
+    def test_load_or_compile(self):
+        first = self.load_or_compile('hello > convert fraktur')
+        second = self.load_or_compile('hello > convert fraktur')
+        self.assertEqual(self.compiled, ['hello > convert fraktur'])
+        self.assertIsNot(first, second)
+        self.assertEqual(repr(first), repr(second))
+
+    def test_folded_results_are_not_persisted(self):
+        pipeline = Pipeline.from_string_with_origin('hello > convert fraktur')
+        pipeline.fold_constants(make_context(governor=make_governor()))
+        folded = pipeline.segments[0].origins[0].string
+        self.assertNotIn(folded.encode(), compiled_cache.dumps(pipeline))
+        # But they are folded again once loaded and applied
+        loaded = compiled_cache.loads(compiled_cache.dumps(pipeline))
+        self.assertEqual(len(loaded.segments), 2)
+        loaded.fold_constants(make_context(governor=make_governor()))
+        self.assertEqual(loaded.segments[0].origins[0].string, folded)
+
+    def test_stale_file_is_compiled_anew(self):
+        path = compiled_cache.get_path('event', 'hello')
+        os.makedirs(compiled_cache.DIR(), exist_ok=True)
+        with open(path, 'wb') as file:
+            file.write(b'rezbot compiled script\0format 0\n' + compiled_cache.dumps(Pipeline.from_string_with_origin('hello')))
+        self.load_or_compile('hello')
+        self.assertEqual(self.compiled, ['hello'])
+        with open(path, 'rb') as file:
+            self.assertTrue(file.read().startswith(compiled_cache.HEADER))
+
+    def test_least_recently_used_are_evicted(self):
+        codes = ['one', 'two', 'three', 'four']
+        for i, code in enumerate(codes[:3]):
+            self.load_or_compile(code)
+            os.utime(compiled_cache.get_path('event', code), (i, i))
+        # Using 'one' makes 'two' the least recently used
+        self.load_or_compile('one')
+        self.load_or_compile('four')
+        remaining = [code for code in codes if os.path.exists(compiled_cache.get_path('event', code))]
+        self.assertEqual(remaining, ['one', 'three', 'four'])
+
+    def test_edited_and_deleted_macros_are_discarded(self):
+        with temporary_macros(), patch.object(config, 'PERSIST_COMPILED', True):
+            macro = define_macro('test_macro', 'convert fraktur')
+            macro.get_pipeline()
+            old_path = compiled_cache.get_path('pipe_macro', 'convert fraktur')
+            self.assertTrue(os.path.exists(old_path))
+
+            macro.code = 'convert smallcaps'
+            self.assertFalse(os.path.exists(old_path))
+            macro.get_pipeline()
+            new_path = compiled_cache.get_path('pipe_macro', 'convert smallcaps')
+            self.assertTrue(os.path.exists(new_path))
+
+            del MACRO_PIPES['test_macro']
+            self.assertFalse(os.path.exists(new_path))
@@ -0,0 +1,118 @@
+'''
+Tests for constant folding: Constant origins followed by pure Pipes are evaluated once when first applied, with the same result as evaluating them each time.
+'''
+import unittest
+
+from pipes.core import parse_cache
+from pipes.core.pipeline import Pipeline, ParsedOrigin
+from pipes.core.state import BudgetExceededError
+from tests.helpers import make_context, make_governor, register_pipe
+
+
+FOLDED = [
+    'hello > convert fraktur',
+    'a|b|c > join s="+"',
+    'x > repeat times=3 > join s="," > split on=","',
+    'abc > hash algorithm=sha256',
+    'one|two > length > sum',
+]
+
+NOT_FOLDED = [
+    # Python's hash differs between restarts
+    'abc > hash',
+    'abc > hash algorithm=python',
+    # Not pure
+    '{0}|a|b > format2 {}',
+    # Not a constant origin
+    'a {word} > convert fraktur',
+    # Not applied to all items at once
+    'a|b|c > (2) join s="+"',
+    # Fails, and should fail at execution time instead
+    'a > chr',
+]
+
+
+CALLS: list[list[str]] = []
+
+def counting_pipe(items: list[str]):
+    '''Returns its items as they are, keeping track of its calls.'''
+    CALLS.append(list(items))
+    return list(items)
+
+register_pipe('test_fold_counting', counting_pipe, pure=True)
+
+
+async def apply(pipeline: Pipeline, **limits):
+    return await pipeline.apply([], make_context(governor=make_governor(**limits)))
+
+def parse_unfolded(script: str) -> Pipeline:
+    '''Parse a script anew, so that folding it has not been attempted yet.'''
+    parse_cache.clear_all()
+    return Pipeline.from_string_with_origin(script)
+
+
+class TestConstantFolding(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        parse_cache.clear_all()
+
+    def tearDown(self):
+        parse_cache.clear_all()
+
+    async def test_folded_result_is_equivalent(self):
+        for script in FOLDED:
+            with self.subTest(script=script):
+                folded = parse_unfolded(script)
+                self.assertGreater(len(folded.segments), 1)
+                await apply(folded)
+                self.assertEqual(len(folded.segments), 1)
+                self.assertIsInstance(folded.segments[0], ParsedOrigin)
+
+                unfolded = parse_unfolded(script)
+                unfolded._fold_pending = False
+                values, errors, _ = await apply(folded)
+                expected_values, expected_errors, _ = await apply(unfolded)
+                self.assertGreater(len(unfolded.segments), 1)
+                self.assertEqual(values, expected_values)
+                self.assertEqual(str(errors), str(expected_errors))
+
+    async def test_not_folded(self):
+        for script in NOT_FOLDED:
+            with self.subTest(script=script):
+                pipeline = parse_unfolded(script)
+                await apply(pipeline)
+                self.assertGreater(len(pipeline.segments), 1)
+
+    async def test_not_folded_when_parsed_or_ungoverned(self):
+        CALLS.clear()
+        pipeline = parse_unfolded('a > test_fold_counting')
+        await pipeline.apply([], make_context())
+        self.assertEqual(len(pipeline.segments), 2)
+        await apply(pipeline)
+        self.assertEqual(len(pipeline.segments), 1)
+        # Once when applied without a Governor, once when folded, and not again
+        await apply(pipeline)
+        self.assertEqual(CALLS, [['a'], ['a']])
+
+    async def test_folding_counts_towards_budget(self):
+        script = 'x > repeat times=3 > join s="," > split on=","'
+        counts = []
+        for fold in (True, False):
+            pipeline = parse_unfolded(script)
+            pipeline._fold_pending = fold
+            governor = make_governor()
+            await pipeline.apply([], make_context(governor=governor))
+            counts.append((governor.items, governor.chars, governor.pipe_calls))
+        self.assertEqual(counts[0], counts[1])
+
+    async def test_folding_exceeding_budget(self):
+        pipeline = parse_unfolded('x > repeat times=50 > join')
+        with self.assertRaises(BudgetExceededError):
+            await apply(pipeline, max_items=10)
+        # Tried again next time
+        self.assertEqual(len(pipeline.segments), 3)
+        await apply(pipeline)
+        self.assertEqual(len(pipeline.segments), 1)
+
+    async def test_failing_pipe_fails_at_execution(self):
+        values, errors, _ = await apply(Pipeline.from_string_with_origin('a > chr'))
+        self.assertTrue(errors.terminal)
@@ -0,0 +1,104 @@
+'''
+Tests for fused runs of one-to-one Pipes: Applying them as a single step must be indistinguishable from applying them one segment at a time,
+    including what is memoized and what is counted towards the execution budget.
+'''
+import unittest
+from contextlib import contextmanager
+from unittest.mock import patch
+
+from pipes.core import config, parse_cache
+from pipes.core.pipe import Pipe
+from pipes.core.pipeline import Pipeline, FusedRun
+from pipes.core.state import BudgetExceededError
+from pipes.implementations.pipes import one_to_one
+from tests.helpers import run_script, make_context, make_governor, register_pipe
+
+
+CALLS: list[str] = []
+
+@one_to_one
+def counting_upper(item: str):
+    '''Uppercases the item, keeping track of every item it's called on.'''
+    CALLS.append(item)
+    return item.upper()
+
+@one_to_one
+def exclaim(item: str):
+    '''Adds an exclamation mark, failing on items that already end in one.'''
+    if item.endswith('!'):
+        raise ValueError(f'Failing on purpose on "{item}".')
+    return item + '!'
+
+def unfoldable(items: list[str]):
+    '''Returns its items as they are, but isn't pure so that the Pipes after it are not folded into the origin.'''
+    return list(items)
+
+register_pipe('test_fused_upper', counting_upper, pure=True)
+register_pipe('test_fused_exclaim', exclaim)
+register_pipe('test_unfoldable', unfoldable)
+
+
+@contextmanager
+def fusing(enabled: bool):
+    '''Within this context, newly parsed Pipelines are planned with pipe fusion enabled or disabled.'''
+    parse_cache.clear_all()
+    with patch.object(config, 'FUSE_PIPES', enabled):
+        try:
+            yield
+        finally:
+            parse_cache.clear_all()
+
+
+class TestFusion(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        CALLS.clear()
+        Pipe.APPLY_CACHE.clear()
+
+    async def run_both(self, script: str, **limits) -> list[tuple]:
+        '''Run the script unfused and fused, returning the outcome (or budget error) and the Governor's counts for each.'''
+        outcomes = []
+        for enabled in (False, True):
+            Pipe.APPLY_CACHE.clear()
+            governor = make_governor(**limits)
+            with fusing(enabled):
+                try:
+                    values, errors, _ = await run_script(script, make_context(governor=governor))
+                    outcome = (values, str(errors))
+                except BudgetExceededError as e:
+                    outcome = ('exceeded', str(e))
+            outcomes.append((outcome, governor.items, governor.chars, governor.pipe_calls))
+        return outcomes
+
+    async def test_fuses_runs(self):
+        with fusing(True):
+            plan = Pipeline.from_string_with_origin('a > test_unfoldable > test_fused_upper > test_fused_exclaim > test_fused_upper').get_plan()
+        self.assertIsInstance(plan[2].__self__, FusedRun)
+        self.assertEqual(len(plan), 3)
+        with fusing(False):
+            plan = Pipeline.from_string_with_origin('a > test_unfoldable > test_fused_upper > test_fused_exclaim > test_fused_upper').get_plan()
+        self.assertEqual(len(plan), 5)
+
+    async def test_same_outcome_and_accounting(self):
+        scripts = [
+            'a|b|c > test_unfoldable > test_fused_upper > test_fused_exclaim > test_fused_upper',
+            'a|b! > test_unfoldable > test_fused_upper > test_fused_exclaim > test_fused_upper',
+            'a|b > test_unfoldable > test_fused_exclaim > test_fused_exclaim > test_fused_upper',
+        ]
+        for script in scripts:
+            with self.subTest(script=script):
+                unfused, fused = await self.run_both(script)
+                self.assertEqual(fused, unfused)
+
+    async def test_same_budget_errors(self):
+        for limits in ({'max_pipe_calls': 2}, {'max_items': 7}, {'max_chars': 10}):
+            with self.subTest(**limits):
+                unfused, fused = await self.run_both('a|b|c > test_unfoldable > test_fused_upper > test_fused_exclaim > test_fused_upper', **limits)
+                self.assertEqual(fused[0][0], 'exceeded')
+                self.assertEqual(fused, unfused)
+
+    async def test_uses_apply_cache(self):
+        with fusing(True):
+            await run_script('x|y > test_unfoldable > test_fused_upper > test_fused_exclaim')
+            await run_script('x|y > test_unfoldable > test_fused_upper > test_fused_exclaim')
+        # The second application of the pure Pipe was memoized
+        self.assertEqual(CALLS, ['x', 'y'])
@@ -0,0 +1,135 @@
+'''
+Tests for how the groups of a segment are processed: concurrently where that's safe, but always with the same outcome as processing them in order.
+'''
+import asyncio
+import unittest
+from unittest.mock import patch
+
+from pipes.core import config
+from pipes.core.groupmodes import GroupView
+from pipes.core.pipeline import Pipeline
+from pipes.core.state import BudgetExceededError
+from tests.helpers import run_script, register_pipe, register_source, CallLog
+
+
+LOG = CallLog()
+DELAYS = {'a': 0.04, 'b': 0.03, 'c': 0.02, 'd': 0.01}
+
+async def delayed_upper_pipe(items: list[str]):
+    '''Uppercases each item after a delay depending on the item, failing on items ending in "!".'''
+    out = []
+    for item in items:
+        if item.endswith('!'):
+            raise ValueError(f'Failing on purpose on "{item}".')
+        await LOG.record(item, DELAYS.get(item, 0))
+        out.append(item.upper())
+    return out
+
+async def counting_source(context):
+    '''Counts its own calls, failing on the second call.'''
+    count = 1 + sum(call.isdigit() for call in LOG.calls)
+    await LOG.record(str(count), 0.01)
+    if count == 2:
+        raise ValueError('Failing on purpose on the second call.')
+    return [str(count)]
+
+async def exceeding_pipe(items: list[str]):
+    '''
+    After a delay depending on the item, fails on items ending in "!" and exceeds the budget otherwise,
+        which is not caught like regular Pipe errors.
+    '''
+    item = items[0]
+    await asyncio.sleep(DELAYS.get(item.rstrip('!'), 0))
+    if item.endswith('!'):
+        raise ValueError(f'Failing on purpose on "{item}".')
+    raise BudgetExceededError(f'Failing on purpose on "{item}".')
+
+register_pipe('test_delayed_upper', delayed_upper_pipe)
+register_pipe('test_delayed_exceeding', exceeding_pipe)
+register_source('test_counting', counting_source)
+
+
+class TestGroupProcessing(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        LOG.__init__()
+
+    async def test_concurrent_groups_keep_their_order(self):
+        values, errors, _ = await run_script('a|b|c|d > (1) test_delayed_upper')
+        self.assertFalse(errors.terminal, str(errors))
+        self.assertEqual(values, ['A', 'B', 'C', 'D'])
+        # The groups finish in reverse order, so they must have been processed concurrently
+        self.assertGreater(LOG.max_running, 1)
+        self.assertEqual(LOG.calls, ['d', 'c', 'b', 'a'])
+
+    async def test_terminal_error_cancels_later_groups(self):
+        values, errors, _ = await run_script('a|b!|c > (1) test_delayed_upper')
+        self.assertIsNone(values)
+        self.assertTrue(errors.terminal)
+        # Groups before the failing group still finish, groups after it are cancelled before they finish
+        self.assertEqual(LOG.calls, ['a'])
+
+    async def test_first_terminal_error_in_group_order_is_reported(self):
+        values, errors, _ = await run_script('a|b!|c! > (1) test_delayed_upper')
+        self.assertTrue(errors.terminal)
+        self.assertIn('"b!"', str(errors))
+        self.assertNotIn('"c!"', str(errors))
+
+    async def test_concurrency_is_bounded(self):
+        with patch.object(config, 'GROUP_CONCURRENCY', 2):
+            values, errors, _ = await run_script('a|b|c|d > (1) test_delayed_upper')
+        self.assertEqual(values, ['A', 'B', 'C', 'D'])
+        self.assertEqual(LOG.max_running, 2)
+
+    async def test_no_groups_started_after_failure(self):
+        with patch.object(config, 'GROUP_CONCURRENCY', 1):
+            values, errors, _ = await run_script('a|b!|c|d > (1) test_delayed_upper')
+        self.assertTrue(errors.terminal)
+        self.assertEqual(LOG.calls, ['a'])
+
+    async def test_synchronous_groups_are_not_concurrent(self):
+        # Nothing to be gained from concurrency if no group ever awaits anything
+        for script, concurrent in [('a|b > (1) nop', False), ('a|b > (1) [nop|test_delayed_upper]', True), ('a|b > (1) (nop > nop)', False)]:
+            with self.subTest(script=script):
+                step = Pipeline.from_string_with_origin(script).get_plan()[-1]
+                self.assertEqual(step.args[2], concurrent)
+
+    async def test_exceptions_of_later_groups_are_retrieved(self):
+        tasks = []
+        create_task = asyncio.create_task
+        def record_task(coro, **kwargs):
+            tasks.append(create_task(coro, **kwargs))
+            return tasks[-1]
+        # The first group fails last, so the later group's exception is never raised, but it should still be retrieved
+        with patch.object(asyncio, 'create_task', record_task):
+            values, errors, _ = await run_script('a!|d > (1) test_delayed_exceeding')
+        self.assertTrue(errors.terminal)
+        self.assertIn('"a!"', str(errors))
+        self.assertEqual(len(tasks), 2)
+        for task in tasks:
+            self.assertTrue(task.done())
+            # Otherwise "Task exception was never retrieved" is logged once the task is garbage collected
+            self.assertFalse(task._log_traceback)
+
+    async def test_groups_with_sources_run_in_order(self):
+        values, errors, _ = await run_script('a|b|c > (1) test_counting')
+        self.assertTrue(errors.terminal)
+        # Processed one at a time, and the third group never ran since the second one failed
+        self.assertEqual(LOG.max_running, 1)
+        self.assertEqual(LOG.calls, ['1', '2'])
+
+    async def test_groups_with_sources_in_arguments_run_in_order(self):
+        values, errors, _ = await run_script('a|b|c > (1) test_delayed_upper > (1) format f={test_counting}')
+        self.assertTrue(errors.terminal)
+        self.assertEqual(LOG.calls, ['c', 'b', 'a', '1', '2'])
+
+
+class TestGroupView(unittest.TestCase):
+    def test_slices_like_a_list(self):
+        items = list('abcdefgh')
+        slices = [slice(None), slice(2, 6), slice(None, None, 3), slice(None, None, -1), slice(6, 1, -2), slice(-3, None), slice(5, 2)]
+        for first in slices:
+            for second in slices:
+                with self.subTest(first=first, second=second):
+                    view = GroupView(items)[first][second]
+                    self.assertEqual(view.to_list(), items[first][second])
+                    self.assertEqual(list(view), items[first][second])
@@ -0,0 +1,109 @@
+'''
+Tests for Macros calling other Macros, which are spliced into each other's compiled Pipelines where possible,
+    and statically linked to each other's compiled Pipelines otherwise.
+'''
+import unittest
+from unittest.mock import patch
+
+from pipes.core import config
+from pipes.core.pipeline import Pipeline
+from pipes.core.macros import MACRO_PIPES, MacroParam
+from tests.helpers import run_script, temporary_macros, define_macro
+
+
+class TestMacroLinking(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.enterContext(temporary_macros())
+        self.enterContext(patch.object(config, 'INLINE_MACROS', True))
+
+    async def assertOutput(self, script: str, expected: list[str]):
+        values, errors, _ = await run_script(script)
+        self.assertFalse(errors.terminal, str(errors))
+        self.assertEqual(values, expected)
+
+    def get_linked_macro(self, pipeline: Pipeline):
+        return next(pipeline.iter_parsed_pipes()).linked_macro
+
+    def define_suffix_macro(self, name: str, code: str='format f="{0}{arg suffix}"'):
+        '''Define a Macro that uses its own argument, so that it cannot be spliced into its callers.'''
+        macro = define_macro(name, code)
+        macro.signature = {'suffix': MacroParam('suffix', '!')}
+        return macro
+
+    async def test_link(self):
+        inner = self.define_suffix_macro('inner')
+        outer = define_macro('outer', 'inner')
+        await self.assertOutput('x > outer', ['x!'])
+        self.assertIs(self.get_linked_macro(outer.get_pipeline())[0], inner)
+
+    async def test_splice(self):
+        define_macro('inner', 'format f="{0}!"')
+        define_macro('middle', 'inner > inner')
+        outer = define_macro('outer', 'middle > format f="{0}?"')
+        await self.assertOutput('x > outer', ['x!!?'])
+        pipeline = outer.get_pipeline()
+        self.assertEqual([parsed_pipe.name for parsed_pipe in pipeline.iter_parsed_pipes()], ['format', 'format', 'format'])
+        self.assertEqual(len(pipeline.segments), 3)
+
+    async def test_not_spliced(self):
+        self.define_suffix_macro('inner')
+        for code in ('inner', 'inner suffix={0}', '(1) inner'):
+            with self.subTest(code=code):
+                outer = define_macro('outer', code)
+                self.assertIsNotNone(self.get_linked_macro(outer.get_pipeline()))
+        await self.assertOutput('x > outer', ['x!'])
+
+    async def test_long_chain(self):
+        # Linking (and splicing) Macros doesn't recurse, no matter how long the chain of Macros is
+        length = 3000
+        define_macro('spliced0', 'format f="{0}!"')
+        self.define_suffix_macro('linked0')
+        for i in range(1, length):
+            define_macro(f'spliced{i}', f'spliced{i-1}')
+            self.define_suffix_macro(f'linked{i}', f'linked{i-1} suffix={{arg suffix}}')
+        spliced = MACRO_PIPES[f'spliced{length-1}'].get_pipeline()
+        self.assertEqual([parsed_pipe.name for parsed_pipe in spliced.iter_parsed_pipes()], ['format'])
+        await self.assertOutput(f'x > spliced{length-1}', ['x!'])
+        linked = MACRO_PIPES[f'linked{length-1}'].get_pipeline()
+        self.assertIs(self.get_linked_macro(linked)[0], MACRO_PIPES[f'linked{length-2}'])
+        self.assertIs(self.get_linked_macro(MACRO_PIPES['linked1'].get_pipeline())[0], MACRO_PIPES['linked0'])
+
+    async def test_editing_callee_invalidates_link(self):
+        inner = define_macro('inner', 'format f="{0}!"')
+        define_macro('outer', 'inner')
+        await self.assertOutput('x > outer', ['x!'])
+        inner.code = 'format f="{0}?"'
+        await self.assertOutput('x > outer', ['x?'])
+
+    async def test_replacing_callee_invalidates_link(self):
+        define_macro('inner', 'format f="{0}!"')
+        define_macro('outer', 'inner')
+        await self.assertOutput('x > outer', ['x!'])
+        define_macro('inner', 'format f="{0}?"')
+        await self.assertOutput('x > outer', ['x?'])
+
+    async def test_deleting_callee_invalidates_link(self):
+        define_macro('inner', 'format f="{0}!"')
+        define_macro('outer', 'inner')
+        await self.assertOutput('x > outer', ['x!'])
+        del MACRO_PIPES['inner']
+        values, errors, _ = await run_script('x > outer')
+        self.assertTrue(errors.terminal)
+        self.assertIn('Unknown pipe `inner`', str(errors))
+
+    async def test_link_does_not_modify_shared_pipeline(self):
+        self.define_suffix_macro('inner')
+        outer = define_macro('outer', 'inner')
+        # The same code parsed elsewhere gives the same, cached Pipeline, which must stay unlinked
+        shared = Pipeline.from_string('inner')
+        self.assertIsNone(self.get_linked_macro(shared))
+        self.assertIsNotNone(self.get_linked_macro(outer.get_pipeline()))
+        self.assertIsNot(outer.get_pipeline(), shared)
+        self.assertIsNone(self.get_linked_macro(shared))
+
+    async def test_cyclical_macros_are_not_linked(self):
+        ping = define_macro('ping', 'pong')
+        pong = define_macro('pong', 'ping')
+        # ping links to pong, but pong's link back to ping is refused while linking ping
+        self.assertIs(self.get_linked_macro(ping.get_pipeline())[0], pong)
+        self.assertIsNone(self.get_linked_macro(pong.get_pipeline()))
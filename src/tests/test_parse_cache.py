@@ -0,0 +1,58 @@
+'''
+Tests for the parse caches: Parsing with the caches must give the same result as parsing without them.
+'''
+import unittest
+
+from pipes.core import parse_cache
+from pipes.core.pipeline import Pipeline
+from tests.helpers import guide_scripts
+
+
+SCRIPTS = guide_scripts() + [
+    'a|b|c > (1) format f="{0} and {word}" > [case (A) | nop]',
+    '{2 words} -> convert fraktur => join s=", "',
+    'x|y > (1) IF ({0}=="x") format f="<{0}>"',
+    'x > ( format f="({0})" > repeat times=2 ) > join s="|"',
+]
+
+
+def parse_uncached(script: str) -> Pipeline:
+    parse_cache.clear_all()
+    return Pipeline.from_string_with_origin(script)
+
+
+class TestParseCache(unittest.TestCase):
+    def tearDown(self):
+        parse_cache.clear_all()
+
+    def test_cached_parse_is_equivalent(self):
+        uncached = {script: parse_uncached(script) for script in SCRIPTS}
+        # Parse everything once to fill all caches, then only forget the parsed Pipelines themselves,
+        #   so that parsing them again is done from cached parts (arguments, templated strings, group modes...)
+        parse_cache.clear_all()
+        for script in SCRIPTS:
+            Pipeline.from_string_with_origin(script)
+        Pipeline.from_string.cache.clear()
+
+        for script in SCRIPTS:
+            with self.subTest(script=script):
+                cached = Pipeline.from_string_with_origin(script)
+                self.assertEqual(repr(cached), repr(uncached[script]))
+                self.assertEqual(str(cached.get_static_errors()), str(uncached[script].get_static_errors()))
+
+    def test_arguments_cache_is_hit(self):
+        cache = parse_cache.PARSE_CACHES['arguments']
+        Pipeline.from_string_with_origin('x > format f="{0}!"')
+        Pipeline.from_string.cache.clear()
+        hits = cache.hits
+        Pipeline.from_string_with_origin('x > format f="{0}!"')
+        self.assertGreater(cache.hits, hits)
+        self.assertEqual(cache.unhashable, 0)
+
+    def test_cached_errors_are_copied(self):
+        first = Pipeline.from_string_with_origin('x > case (A)')
+        Pipeline.from_string.cache.clear()
+        second = Pipeline.from_string_with_origin('x > case (A)')
+        first_errors = first.segments[1][1][0].errors
+        self.assertIsNot(first_errors, second.segments[1][1][0].errors)
+        self.assertEqual(str(first_errors), str(second.segments[1][1][0].errors))
@@ -0,0 +1,92 @@
+'''
+Tests for streaming mode: Runs of item-wise Pipes streamed item by item must produce the same outcome as applying each Pipe in turn,
+    while doing no more work than needed to produce the items that are kept.
+'''
+import unittest
+from contextlib import contextmanager
+from unittest.mock import patch
+
+from pipes.core import config, parse_cache
+from pipes.core.pipeline import Pipeline, StreamedRun
+from pipes.implementations.pipes import one_to_one, one_to_many
+from tests.helpers import run_script, register_pipe
+
+
+CALLS: list[str] = []
+
+@one_to_one
+def counting_upper(item: str):
+    '''Uppercases the item, keeping track of every item it's called on.'''
+    CALLS.append(item)
+    return item.upper()
+
+@one_to_many
+def doubling(item: str):
+    '''Produces each item twice.'''
+    return [item, item]
+
+register_pipe('test_stream_upper', counting_upper)
+register_pipe('test_stream_double', doubling)
+
+
+@contextmanager
+def streaming(enabled: bool):
+    '''Within this context, newly parsed Pipelines are planned with streaming mode enabled or disabled.'''
+    parse_cache.clear_all()
+    with patch.object(config, 'STREAMING', enabled):
+        try:
+            yield
+        finally:
+            parse_cache.clear_all()
+
+
+class TestStreaming(unittest.IsolatedAsyncioTestCase):
+    SCRIPTS = [
+        'a|b|c > test_stream_upper > test_stream_double',
+        'a|b|c > test_stream_double > test_stream_upper > #0:3!',
+        'a|b|c > test_stream_double > test_stream_upper > #1:4! (2) test_stream_double',
+        'a|b|c > test_stream_upper > #-2:! test_stream_double',
+        'a||b| |c > test_stream_upper > remove what=empty > remove what=whitespace',
+        'a|b|c > test_stream_upper > remove > test_stream_double',
+        'a|b|c > test_stream_upper > #1 test_stream_double',
+        'a|b|c > test_stream_upper > #5:8!',
+    ]
+
+    def setUp(self):
+        CALLS.clear()
+
+    async def test_same_outcome(self):
+        for script in self.SCRIPTS:
+            with self.subTest(script=script):
+                with streaming(False):
+                    expected, _, _ = await run_script(script)
+                with streaming(True):
+                    values, errors, _ = await run_script(script)
+                self.assertFalse(errors.terminal, str(errors))
+                self.assertEqual(values, expected)
+
+    async def test_streams_runs(self):
+        with streaming(True):
+            plan = Pipeline.from_string_with_origin('a > test_stream_upper > test_stream_double > #0:2!').get_plan()
+        self.assertIsInstance(plan[1].__self__, StreamedRun)
+        self.assertEqual(plan[1].__self__.limit, 2)
+
+    async def test_stops_at_head_limit(self):
+        with streaming(True):
+            values, errors, _ = await run_script('a > repeat times=1000 > test_stream_upper > #0:5!')
+        self.assertFalse(errors.terminal, str(errors))
+        self.assertEqual(values, ['A'] * 5)
+        self.assertEqual(len(CALLS), 5)
+
+    async def test_stops_at_head_limit_after_filter(self):
+        with streaming(True):
+            values, errors, _ = await run_script('a| > repeat times=1000 > remove what=empty > test_stream_upper > #0:5! (1) test_stream_double')
+        self.assertFalse(errors.terminal, str(errors))
+        self.assertEqual(values, ['A'] * 10)
+        self.assertEqual(len(CALLS), 5)
+
+    async def test_no_head_limit_with_conditions(self):
+        # The condition could refer to any of the items, so all of them have to be produced
+        with streaming(True):
+            plan = Pipeline.from_string_with_origin('a > test_stream_upper > test_stream_double > #0:2! IF ({0} == A) test_stream_double').get_plan()
+        self.assertIsNone(plan[1].__self__.limit)
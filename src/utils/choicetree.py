@@ -51,8 +51,8 @@ class ChoiceTree:
 
     class Text(Node):
         '''Text end node.'''
-        def __init__(self, text: ParseResults):
-            self.text: str = text if text == '' else ''.join(text.as_list())
+        def __init__(self, text: ParseResults | str):
+            self.text: str = text if isinstance(text, str) else ''.join(text.as_list())
             self.count = 1
 
         def __repr__(self):
@@ -73,8 +73,8 @@ class ChoiceTree:
 
     class Choice(Node):
         '''Conjunction of nodes [A|B|C]'''
-        def __init__(self, vals: ParseResults):
-            self.nodes: list[ChoiceTree.Node] = vals.as_list()
+        def __init__(self, vals: ParseResults | list['ChoiceTree.Node']):
+            self.nodes: list[ChoiceTree.Node] = vals if isinstance(vals, list) else vals.as_list()
             self.count = sum(v.count for v in self.nodes)
 
         def __repr__(self):
@@ -104,8 +104,8 @@ class ChoiceTree:
         [1] does absolutely nothing, [2] behaves as [|], 3 as [||], etc.
         [0] annihilates the current choice entirely, something unrepresentable otherwise.
         '''
-        def __init__(self, val: ParseResults):
-            self.count = int(val[0])
+        def __init__(self, val: ParseResults | int):
+            self.count = val if isinstance(val, int) else int(val[0])
 
         def __repr__(self):
             return f'[{self.count}]'
@@ -126,8 +126,8 @@ class ChoiceTree:
 
     class Concat(Node):
         '''Multiple choices and text strings attached end to end.'''
-        def __init__(self, vals):
-            self.nodes: list[ChoiceTree.Node] = vals.as_list()
+        def __init__(self, vals: ParseResults | list['ChoiceTree.Node']):
+            self.nodes: list[ChoiceTree.Node] = vals if isinstance(vals, list) else vals.as_list()
             self.count = functools.reduce(lambda x, y: x*y, (n.count for n in self.nodes), 1)
 
         def __repr__(self):
@@ -0,0 +1,73 @@
+from collections import OrderedDict
+from typing import Generic, Hashable, TypeVar
+
+K = TypeVar('K', bound=Hashable)
+V = TypeVar('V')
+
+
+class SizedLRUCache(Generic[K, V]):
+    '''
+    A least-recently-used cache bounded by the total "weight" of its entries, rather than just their number.
+    The weight of an entry is given when it is stored, e.g. the number of characters it represents.
+    Keeps track of hits, misses and evictions for diagnostic purposes.
+    '''
+    max_weight: int
+    max_entries: int | None
+    weight: int
+    hits: int
+    misses: int
+    evictions: int
+
+    def __init__(self, max_weight: int, max_entries: int=None):
+        self.max_weight = max_weight
+        self.max_entries = max_entries
+        self._entries: OrderedDict[K, tuple[V, int]] = OrderedDict()
+        self.weight = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: K, default: V=None) -> V:
+        '''Get the value stored at the given key, marking it as recently used, or the default if there is none.'''
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key: K, value: V, weight: int=1):
+        '''Store the value at the given key, evicting the least recently used entries if needed, unless it's too heavy to store at all.'''
+        if weight > self.max_weight:
+            return
+        if key in self._entries:
+            self.weight -= self._entries.pop(key)[1]
+        self._entries[key] = (value, weight)
+        self.weight += weight
+        while self.weight > self.max_weight or (self.max_entries is not None and len(self._entries) > self.max_entries):
+            _, (_, evicted_weight) = self._entries.popitem(last=False)
+            self.weight -= evicted_weight
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+        self.weight = 0
+
+    def __contains__(self, key: K):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    # ================ Statistics
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats_str(self) -> str:
+        return '{} entries, weight {}/{}, {} hits, {} misses ({:.1%} hit rate), {} evictions'.format(
+            len(self._entries), self.weight, self.max_weight, self.hits, self.misses, self.hit_rate, self.evictions
+        )
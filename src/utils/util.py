@@ -62,6 +62,17 @@ async def dict_from_gather(keys: Iterable[T], futures: Iterable[Awaitable[U]]) -
     return dict(zip(keys, values))
 
 
+async def gather_bounded(futures: Iterable[Awaitable[U]], limit: int=None) -> list[U]:
+    '''Like asyncio.gather, but awaits at most `limit` of the coroutines at any one time. Results are in the same order.'''
+    if not limit:
+        return await asyncio.gather(*futures)
+    semaphore = asyncio.Semaphore(limit)
+    async def bounded(future: Awaitable[U]) -> U:
+        async with semaphore:
+            return await future
+    return await asyncio.gather(*(bounded(future) for future in futures))
+
+
 def normalize_name(name: str):
     '''Normalizes a user-entered name to a lowercase name of only alphanumeric/underscore chars.'''
     # Cut off anything past the first space